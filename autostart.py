@@ -0,0 +1,41 @@
+import os
+import sys
+
+# 启动脚本（开发时写入注册表的路径）
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MouseScrollStabilizer.py")
+
+
+# ===========================
+# Windows Startup Management
+# ===========================
+def configure_startup(enable: bool, headless: bool = False):
+    """Create or remove HKCU Run entry for this script."""
+    import winreg
+
+    run_key = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
+    name = "MouseScrollLock"
+    
+    # 修复打包后的路径问题
+    if getattr(sys, 'frozen', False):
+        # 打包后的情况
+        path = f'"{sys.executable}"'
+    else:
+        # 开发时的情况
+        path = f'"{sys.executable}" "{MAIN_SCRIPT}"'
+    if headless:
+        path += " --headless"
+    
+    try:
+        if enable:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, run_key, 0, winreg.KEY_WRITE) as key:
+                winreg.SetValueEx(key, name, 0, winreg.REG_SZ, path)
+            print(f"开机启动已启用: {path}")
+        else:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, run_key, 0, winreg.KEY_WRITE) as key:
+                try:
+                    winreg.DeleteValue(key, name)
+                except FileNotFoundError:
+                    pass
+            print("开机启动已禁用")
+    except Exception as e:
+        print(f"配置开机启动失败: {e}")
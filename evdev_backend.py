@@ -0,0 +1,443 @@
+# =========================
+# Linux evdev / uinput Backend
+# =========================
+# Linux 上的滚轮防抖：独占（EVIOCGRAB）鼠标的 evdev 设备，用与 MouseHook.hook_proc 相同的
+# ScrollFilter 决定每个滚轮事件，放行的事件连同移动、按键等其他事件通过 uinput 虚拟设备重新发出。
+#
+# 读取：epoll 等待设备可读，readinto 把一批 input_event 读进预分配的缓冲区（不为每次读取分配内存）。
+# 处理：按 SYN_REPORT 划分帧。每帧中的垂直滚轮事件只做一次决策（Pipeline.process）：
+#   有 REL_WHEEL_HI_RES 时用它的值作为 delta（1/120 格），否则用 REL_WHEEL × 120；
+#   被拦截时从帧中去掉 REL_WHEEL / REL_WHEEL_HI_RES，帧中没有其他事件时整帧丢弃。
+# 输出：一批读取中放行的所有帧拼接到预分配的输出缓冲区，一次 write 发出。
+#
+# 设备和输出都隔着最小的接口（fileno/grab/release，write），FakeEventSource（管道）和
+# FakeEventSink 可以在没有输入设备和 /dev/uinput 权限的环境中测试和压测。
+#
+# 用法:
+#   python evdev_backend.py --list
+#   python evdev_backend.py /dev/input/event5 [--config config/Settings.ini]
+
+import argparse
+import fcntl
+import glob
+import os
+import select
+import struct
+import sys
+import time
+
+from scroll_adaptive import AdaptiveTuner
+from scroll_filter import ScrollFilter, BLOCK
+from scroll_pipeline import Pipeline
+
+# struct input_event { struct timeval time; __u16 type; __u16 code; __s32 value; }
+INPUT_EVENT = struct.Struct("@llHHi")
+
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_REL = 0x02
+EV_MSC = 0x04
+SYN_REPORT = 0
+REL_HWHEEL = 0x06
+REL_WHEEL = 0x08
+REL_WHEEL_HI_RES = 0x0b
+REL_HWHEEL_HI_RES = 0x0c
+KEY_MAX = 0x2ff
+REL_MAX = 0x0f
+MSC_MAX = 0x07
+
+WHEEL_DELTA = 120
+CLOCK_MONOTONIC = 1
+
+
+def _ioc(direction, kind, number, size):
+    return (direction << 30) | (size << 16) | (ord(kind) << 8) | number
+
+
+def _iow(kind, number, size):
+    return _ioc(1, kind, number, size)
+
+
+def _ior(kind, number, size):
+    return _ioc(2, kind, number, size)
+
+
+EVIOCGRAB = _iow("E", 0x90, 4)
+EVIOCSCLOCKID = _iow("E", 0xa0, 4)
+EVIOCGID = _ior("E", 0x02, 8)
+
+
+def EVIOCGNAME(length):
+    return _ior("E", 0x06, length)
+
+
+def EVIOCGBIT(ev, length):
+    return _ior("E", 0x20 + ev, length)
+
+
+UINPUT_SETUP = struct.Struct("HHHH80sI")
+UI_SET_EVBIT = _iow("U", 100, 4)
+UI_SET_KEYBIT = _iow("U", 101, 4)
+UI_SET_RELBIT = _iow("U", 102, 4)
+UI_SET_MSCBIT = _iow("U", 104, 4)
+UI_DEV_SETUP = _iow("U", 3, UINPUT_SETUP.size)
+UI_DEV_CREATE = _ioc(0, "U", 1, 0)
+UI_DEV_DESTROY = _ioc(0, "U", 2, 0)
+
+
+def _bits(data):
+    """位图 -> 置位的编号列表"""
+    return [i * 8 + b for i, byte in enumerate(data) for b in range(8) if byte >> b & 1]
+
+
+# =========================
+# Sources and Sinks
+# =========================
+class EvdevDevice:
+    """/dev/input/eventN 设备"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        self.file = os.fdopen(self.fd, "rb", buffering=0, closefd=False)
+        try:
+            # 事件时间戳使用单调时钟，与 ScrollFilter 的整数纳秒时间一致
+            fcntl.ioctl(self.fd, EVIOCSCLOCKID, struct.pack("i", CLOCK_MONOTONIC))
+        except OSError:
+            pass
+
+    @property
+    def name(self):
+        buffer = bytearray(256)
+        fcntl.ioctl(self.fd, EVIOCGNAME(len(buffer)), buffer)
+        return buffer.split(b"\0", 1)[0].decode(errors="replace")
+
+    @property
+    def id(self):
+        return struct.unpack("HHHH", fcntl.ioctl(self.fd, EVIOCGID, bytes(8)))
+
+    def capabilities(self, ev, maximum):
+        buffer = bytearray(maximum // 8 + 1)
+        fcntl.ioctl(self.fd, EVIOCGBIT(ev, len(buffer)), buffer)
+        return _bits(buffer)
+
+    def has_wheel(self):
+        try:
+            return REL_WHEEL in self.capabilities(EV_REL, REL_MAX)
+        except OSError:
+            return False
+
+    def fileno(self):
+        return self.fd
+
+    def readinto(self, buffer):
+        return self.file.readinto(buffer)
+
+    def grab(self):
+        fcntl.ioctl(self.fd, EVIOCGRAB, 1)
+
+    def release(self):
+        try:
+            fcntl.ioctl(self.fd, EVIOCGRAB, 0)
+        except OSError:
+            pass
+
+    def close(self):
+        self.file.close()
+        os.close(self.fd)
+
+
+class UinputSink:
+    """复制源设备能力的 uinput 虚拟设备"""
+
+    def __init__(self, device, name=None):
+        self.fd = os.open("/dev/uinput", os.O_WRONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        try:
+            for ev, maximum, bit in ((EV_KEY, KEY_MAX, UI_SET_KEYBIT),
+                                     (EV_REL, REL_MAX, UI_SET_RELBIT),
+                                     (EV_MSC, MSC_MAX, UI_SET_MSCBIT)):
+                try:
+                    codes = device.capabilities(ev, maximum)
+                except OSError:
+                    continue
+                if codes:
+                    fcntl.ioctl(self.fd, UI_SET_EVBIT, ev)
+                    for code in codes:
+                        fcntl.ioctl(self.fd, bit, code)
+            bustype, vendor, product, version = device.id
+            label = (name or f"{device.name} (scroll stabilized)").encode()[:79]
+            fcntl.ioctl(self.fd, UI_DEV_SETUP, UINPUT_SETUP.pack(bustype, vendor, product, version, label, 0))
+            fcntl.ioctl(self.fd, UI_DEV_CREATE)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def write(self, data):
+        os.write(self.fd, data)
+
+    def close(self):
+        try:
+            fcntl.ioctl(self.fd, UI_DEV_DESTROY)
+        finally:
+            os.close(self.fd)
+
+
+class FakeEventSource:
+    """用管道模拟 evdev 设备：write_events 写入的事件由后端读取"""
+
+    def __init__(self):
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        self.file = os.fdopen(self._read_fd, "rb", buffering=0)
+        self.grabbed = False
+
+    def fileno(self):
+        return self._read_fd
+
+    def readinto(self, buffer):
+        return self.file.readinto(buffer)
+
+    def grab(self):
+        self.grabbed = True
+
+    def release(self):
+        self.grabbed = False
+
+    def write_events(self, events):
+        """events 为 (时间戳纳秒, type, code, value) 序列"""
+        os.write(self._write_fd, pack_events(events))
+
+    def close_writer(self):
+        """关闭写入端，后端读到 EOF 后退出"""
+        os.close(self._write_fd)
+
+    def close(self):
+        self.file.close()
+
+
+class FakeEventSink:
+    """收集输出的事件数据"""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    def events(self):
+        return unpack_events(self.data)
+
+    def close(self):
+        pass
+
+
+def pack_events(events):
+    out = bytearray()
+    for timestamp, type, code, value in events:
+        sec, nsec = divmod(timestamp, 1_000_000_000)
+        out += INPUT_EVENT.pack(sec, nsec // 1000, type, code, value)
+    return bytes(out)
+
+
+def unpack_events(data):
+    return [(sec * 1_000_000_000 + usec * 1000, type, code, value)
+            for sec, usec, type, code, value in INPUT_EVENT.iter_unpack(data)]
+
+
+# =========================
+# Backend
+# =========================
+class EvdevScrollFilter:
+    """从 source 读取事件，过滤垂直滚轮后写入 sink"""
+
+    def __init__(self, source, sink, pipeline=None, batch_events=256):
+        self.source = source
+        self.sink = sink
+        self.pipeline = pipeline or Pipeline()
+        size = INPUT_EVENT.size
+        self.record_size = size
+        # 输入缓冲区前部留给上一批未完成的帧
+        self.in_buffer = bytearray(size * batch_events * 2)
+        self.in_view = memoryview(self.in_buffer)
+        self.out_buffer = bytearray(size * batch_events * 2)
+        self.out_view = memoryview(self.out_buffer)
+        self.pending = 0            # in_buffer 开头尚未处理完的帧的字节数
+        self.batch_bytes = size * batch_events
+        self.events = 0
+        self.blocked_frames = 0
+        self._stop_r, self._stop_w = os.pipe()
+
+    def stop(self):
+        os.write(self._stop_w, b"x")
+
+    def run(self):
+        """独占设备并处理事件，直到 stop() 或设备关闭"""
+        source = self.source
+        epoll = select.epoll()
+        epoll.register(source.fileno(), select.EPOLLIN)
+        epoll.register(self._stop_r, select.EPOLLIN)
+        source.grab()
+        try:
+            while True:
+                for fd, _ in epoll.poll():
+                    if fd == self._stop_r:
+                        return
+                    if not self.read_batch():
+                        return
+        finally:
+            source.release()
+            epoll.close()
+            os.close(self._stop_r)
+            os.close(self._stop_w)
+
+    def read_batch(self):
+        """读取并处理一批事件，返回 False 表示设备已关闭"""
+        pending = self.pending
+        try:
+            n = self.source.readinto(self.in_view[pending:pending + self.batch_bytes])
+        except BlockingIOError:
+            return True
+        if not n:
+            return False
+        self.process(pending + n)
+        return True
+
+    def process(self, length):
+        """处理 in_buffer[:length]：完整的帧写入 sink，未完成的帧移到缓冲区开头"""
+        process = self.pipeline.process
+        size = self.record_size
+        src = self.in_view
+        dst = self.out_view
+        out = 0
+        frame_start = 0
+        wheel_at = -1       # 本帧 REL_WHEEL 的偏移
+        hires_at = -1       # 本帧 REL_WHEEL_HI_RES 的偏移
+        wheel_value = 0
+        hires_value = 0
+        offset = 0
+        for sec, usec, type, code, value in INPUT_EVENT.iter_unpack(src[:length - length % size]):
+            at = offset
+            offset += size
+            if type == EV_REL:
+                if code == REL_WHEEL:
+                    wheel_at = at
+                    wheel_value = value
+                elif code == REL_WHEEL_HI_RES:
+                    hires_at = at
+                    hires_value = value
+                continue
+            if type != EV_SYN or code != SYN_REPORT:
+                continue
+
+            # 一帧结束
+            if wheel_at < 0 and hires_at < 0:
+                dst[out:out + offset - frame_start] = src[frame_start:offset]
+                out += offset - frame_start
+            else:
+                delta = hires_value if hires_at >= 0 else wheel_value * WHEEL_DELTA
+                now = sec * 1_000_000_000 + usec * 1000
+                decision = process(delta, now)
+                if decision != BLOCK:
+                    dst[out:out + offset - frame_start] = src[frame_start:offset]
+                    out += offset - frame_start
+                else:
+                    self.blocked_frames += 1
+                    # 去掉滚轮事件，帧中还有其他事件时保留
+                    if offset - frame_start > size * (1 + (wheel_at >= 0) + (hires_at >= 0)):
+                        for start in range(frame_start, offset, size):
+                            if start != wheel_at and start != hires_at:
+                                dst[out:out + size] = src[start:start + size]
+                                out += size
+                wheel_at = hires_at = -1
+            frame_start = offset
+
+        self.events += frame_start // size
+        if out:
+            self.sink.write(dst[:out])
+        # 未完成的帧留到下一批
+        rest = length - frame_start
+        if rest:
+            src[:rest] = src[frame_start:length]
+        self.pending = rest
+        if rest > len(self.in_buffer) - self.batch_bytes:
+            # 一帧超过了缓冲区，原样转发
+            self.sink.write(src[:rest])
+            self.pending = 0
+
+
+def list_devices():
+    """列出有滚轮的 evdev 设备"""
+    devices = []
+    for path in sorted(glob.glob("/dev/input/event*"), key=lambda p: int(p[16:] or 0)):
+        try:
+            device = EvdevDevice(path)
+        except OSError:
+            continue
+        try:
+            if device.has_wheel():
+                devices.append((path, device.name))
+        finally:
+            device.close()
+    return devices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Linux evdev 滚轮防抖")
+    parser.add_argument("device", nargs="?", help="evdev 设备，例如 /dev/input/event5")
+    parser.add_argument("--list", action="store_true", help="列出有滚轮的设备")
+    parser.add_argument("--config", default=None, help="配置文件，默认 config/Settings.ini")
+    args = parser.parse_args(argv)
+
+    if args.list or not args.device:
+        for path, name in list_devices():
+            print(f"{path}\t{name}")
+        return 0
+
+    from settings import Settings
+    from settings_watch import SettingsWatcher
+
+    settings = Settings(args.config)
+    snapshot = settings.snapshot()
+    scroll_filter = ScrollFilter(config=snapshot.filter)
+    device = None
+    try:
+        device = EvdevDevice(args.device)
+        sink = UinputSink(device)
+    except OSError as e:
+        if device is not None:
+            device.close()
+        print(f"无法打开设备（需要读取 {args.device} 和写入 /dev/uinput 的权限）: {e}", file=sys.stderr)
+        return 1
+
+    pipeline = Pipeline(scroll_filter)
+    tuner = None
+    if snapshot.adaptive is not None:
+        # 自适应模式（scroll_adaptive.py），开关变化需要重启后端
+        tuner = AdaptiveTuner(scroll_filter, snapshot.adaptive)
+        pipeline.set_stages((tuner,))
+
+    def reload(snapshot):
+        if tuner is not None:
+            tuner.rebase(snapshot.filter, snapshot.adaptive)
+        else:
+            scroll_filter.apply(snapshot.filter)
+
+    backend = EvdevScrollFilter(device, sink, pipeline)
+    watcher = SettingsWatcher(settings, reload)
+    print(f"正在过滤 {device.name} ({args.device})，按 Ctrl+C 退出")
+    started = time.perf_counter()
+    try:
+        backend.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        sink.close()
+        device.close()
+    print(f"运行 {time.perf_counter() - started:.0f} 秒，{backend.events} 个事件，"
+          f"拦截 {backend.blocked_frames} 次滚动")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# =========================
+# Wheel Event Ring Buffer
+# =========================
+# 钩子线程（唯一写入者）与界面/记录器等读取者之间的无锁环形缓冲区。
+# 每个字段一个预分配的 array，写入只做数组下标赋值，不分配内存；
+# 占用内存固定，与程序运行多久无关。
+#
+# 读取者各自持有游标（EventRingReader），互不影响，也不会阻塞写入者。
+# 读取者落后超过一圈时，被覆盖的事件计入 dropped 并跳过。
+
+from array import array
+
+
+class EventRing:
+    """单写多读的滚轮事件环形缓冲区
+
+    字段: timestamp（纳秒）, delta（有符号滚动量）, flags（MSLLHOOKSTRUCT.flags）,
+          decision（ALLOW/BLOCK）, reason（状态码）
+    """
+
+    __slots__ = ("capacity", "mask", "timestamps", "deltas", "flags", "decisions", "reasons", "write_index")
+
+    def __init__(self, capacity=4096):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.deltas = array('i', bytes(4 * capacity))
+        self.flags = array('I', bytes(4 * capacity))
+        self.decisions = array('b', bytes(capacity))
+        self.reasons = array('b', bytes(capacity))
+        # 已写入事件总数；先写数据再递增，读取者据此判断哪些槽位已就绪
+        self.write_index = 0
+
+    def push(self, timestamp, delta, flags, decision, reason):
+        """写入一个事件（仅由钩子线程调用）"""
+        index = self.write_index
+        slot = index & self.mask
+        self.timestamps[slot] = timestamp
+        self.deltas[slot] = delta
+        self.flags[slot] = flags
+        self.decisions[slot] = decision
+        self.reasons[slot] = reason
+        self.write_index = index + 1
+
+    def reader(self, batch_size=1024, from_start=False):
+        """创建一个读取者，默认只读取之后写入的事件"""
+        return EventRingReader(self, batch_size, from_start)
+
+
+class EventRingReader:
+    """环形缓冲区的读取游标，drain() 每次把一批事件复制到自己的预分配数组中"""
+
+    __slots__ = ("ring", "cursor", "batch_size", "timestamps", "deltas", "flags", "decisions", "reasons", "dropped")
+
+    def __init__(self, ring, batch_size=1024, from_start=False):
+        self.ring = ring
+        self.batch_size = batch_size
+        self.cursor = max(0, ring.write_index - ring.capacity) if from_start else ring.write_index
+        self.timestamps = array('q', bytes(8 * batch_size))
+        self.deltas = array('i', bytes(4 * batch_size))
+        self.flags = array('I', bytes(4 * batch_size))
+        self.decisions = array('b', bytes(batch_size))
+        self.reasons = array('b', bytes(batch_size))
+        self.dropped = 0
+
+    def pending(self):
+        """尚未读取的事件数（可能包含已被覆盖的）"""
+        return self.ring.write_index - self.cursor
+
+    def drain(self):
+        """读取一批事件，返回本批数量；数据位于 self.timestamps[:n] 等数组中"""
+        ring = self.ring
+        capacity = ring.capacity
+        mask = ring.mask
+
+        while True:
+            end = ring.write_index
+            start = self.cursor
+            if end - start > capacity:
+                self.dropped += end - start - capacity
+                start = end - capacity
+            n = min(end - start, self.batch_size)
+            if n <= 0:
+                return 0
+
+            # 分成至多两段连续区间复制
+            first = start & mask
+            count1 = min(n, capacity - first)
+            count2 = n - count1
+            for dst, src in ((self.timestamps, ring.timestamps), (self.deltas, ring.deltas),
+                             (self.flags, ring.flags), (self.decisions, ring.decisions),
+                             (self.reasons, ring.reasons)):
+                dst[0:count1] = src[first:first + count1]
+                if count2:
+                    dst[count1:n] = src[0:count2]
+
+            self.cursor = start + n
+
+            # 复制期间写入者可能已经覆盖了最旧的槽位（包括正在写入的那一个），丢弃这部分
+            overwritten = ring.write_index - capacity + 1 - start
+            if overwritten <= 0:
+                return n
+            if overwritten < n:
+                self.dropped += overwritten
+                n -= overwritten
+                for column in (self.timestamps, self.deltas, self.flags, self.decisions, self.reasons):
+                    column[0:n] = column[overwritten:overwritten + n]
+                return n
+            # 整批都被覆盖：更新的事件仍在缓冲区中，从新的位置重新读取
+            self.dropped += n
@@ -0,0 +1,233 @@
+# =========================
+# Foreground Process Tracking
+# =========================
+# 根据前台窗口所属的进程选择配置（见 Settings 中的 [profile:<exe>] 节）。
+#
+# 窗口 -> 进程 ID -> 可执行文件名 的解析放在 ProcessResolver 接口后面：
+#   - Win32ProcessResolver: GetForegroundWindow / GetWindowThreadProcessId / QueryFullProcessImageNameW
+#   - FakeProcessResolver:  用字典模拟，在 Linux 上测试选择和缓存逻辑
+# ForegroundTracker 按 (窗口, 进程 ID) 缓存可执行文件名（LRU，超过上限时淘汰最久未用的项），
+# 只在前台窗口变化时解析一次，并通过 on_change(exe) 通知 MouseHook 替换过滤器配置；
+# 钩子回调中不做任何进程查询。
+# Win32ForegroundWatcher 在自己的线程里用 SetWinEventHook(EVENT_SYSTEM_FOREGROUND) 接收前台切换通知，
+# 并用 EVENT_OBJECT_DESTROY 在顶层窗口销毁（包括进程退出）时丢弃该窗口的缓存项：
+# 窗口句柄和进程 ID 都会被系统重用，不能让新窗口命中旧进程的可执行文件名。
+
+import ctypes
+import os
+import threading
+from collections import OrderedDict
+
+
+class ProcessResolver:
+    """前台窗口到可执行文件名的解析接口"""
+
+    def foreground_window(self):
+        """当前前台窗口句柄，没有时返回 0"""
+        raise NotImplementedError
+
+    def window_process(self, hwnd):
+        """窗口所属进程 ID，失败时返回 0"""
+        raise NotImplementedError
+
+    def process_executable(self, pid):
+        """进程的可执行文件名（小写，不含路径），失败时返回 None"""
+        raise NotImplementedError
+
+
+class FakeProcessResolver(ProcessResolver):
+    """用字典模拟窗口和进程，记录 process_executable 的调用次数"""
+
+    def __init__(self, windows=None, processes=None, foreground=0):
+        self.windows = dict(windows or {})        # hwnd -> pid
+        self.processes = dict(processes or {})    # pid -> exe
+        self.foreground = foreground
+        self.lookups = 0
+
+    def foreground_window(self):
+        return self.foreground
+
+    def window_process(self, hwnd):
+        return self.windows.get(hwnd, 0)
+
+    def process_executable(self, pid):
+        self.lookups += 1
+        exe = self.processes.get(pid)
+        return exe.lower() if exe else None
+
+
+class Win32ProcessResolver(ProcessResolver):
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+    def __init__(self):
+        from ctypes import wintypes
+        user32 = ctypes.WinDLL("user32", use_last_error=True)
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        user32.GetForegroundWindow.restype = wintypes.HWND
+        user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+        user32.GetWindowThreadProcessId.restype = wintypes.DWORD
+        kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.QueryFullProcessImageNameW.argtypes = [
+            wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)]
+        kernel32.QueryFullProcessImageNameW.restype = wintypes.BOOL
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self._user32 = user32
+        self._kernel32 = kernel32
+        self._pid = wintypes.DWORD()
+        self._buffer = ctypes.create_unicode_buffer(1024)
+        self._size = wintypes.DWORD()
+
+    def foreground_window(self):
+        return self._user32.GetForegroundWindow() or 0
+
+    def window_process(self, hwnd):
+        self._pid.value = 0
+        self._user32.GetWindowThreadProcessId(hwnd, ctypes.byref(self._pid))
+        return self._pid.value
+
+    def process_executable(self, pid):
+        if not pid:
+            return None
+        handle = self._kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            self._size.value = len(self._buffer)
+            if not self._kernel32.QueryFullProcessImageNameW(handle, 0, self._buffer, ctypes.byref(self._size)):
+                return None
+            return os.path.basename(self._buffer.value).lower()
+        finally:
+            self._kernel32.CloseHandle(handle)
+
+
+class ForegroundTracker:
+    """跟踪前台进程，变化时调用 on_change(exe)；exe 为 None 表示无法确定"""
+
+    def __init__(self, resolver, on_change, cache_size=64):
+        self.resolver = resolver
+        self.on_change = on_change
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (hwnd, pid) -> exe
+        self._lock = threading.Lock()
+        self.exe = None
+
+    def lookup(self, hwnd):
+        """窗口所属的可执行文件名，命中缓存时不打开进程"""
+        pid = self.resolver.window_process(hwnd)
+        if not pid:
+            return None
+        key = (hwnd, pid)
+        with self._lock:
+            cache = self._cache
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        exe = self.resolver.process_executable(pid)
+        with self._lock:
+            cache[key] = exe
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return exe
+
+    def update(self, hwnd=None):
+        """前台窗口变化（hwnd 为 None 时查询当前前台窗口）"""
+        if hwnd is None:
+            hwnd = self.resolver.foreground_window()
+        exe = self.lookup(hwnd) if hwnd else None
+        if exe != self.exe:
+            self.exe = exe
+            self.on_change(exe)
+
+    def invalidate(self, hwnd=None):
+        """丢弃缓存（hwnd 为 None 时全部丢弃）"""
+        with self._lock:
+            if hwnd is None:
+                self._cache.clear()
+            else:
+                for key in [key for key in self._cache if key[0] == hwnd]:
+                    del self._cache[key]
+
+
+class Win32ForegroundWatcher:
+    """在独立线程中接收 EVENT_SYSTEM_FOREGROUND / EVENT_OBJECT_DESTROY，不占用鼠标钩子线程"""
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_DESTROY = 0x8001
+    OBJID_WINDOW = 0
+    CHILDID_SELF = 0
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WM_QUIT = 0x0012
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self._thread = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ForegroundWatcher", daemon=True)
+        self._thread.start()
+        self._ready.wait(1.0)
+
+    def stop(self, timeout=1.0):
+        if self._thread is None:
+            return
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def handle_event(self, event, hwnd, id_object=0, id_child=0):
+        """处理一个 WinEvent 通知（在监视线程中调用）"""
+        if event == self.EVENT_SYSTEM_FOREGROUND:
+            self.tracker.update(hwnd or None)
+        elif event == self.EVENT_OBJECT_DESTROY:
+            # 只关心窗口本身，忽略控件、光标等子对象
+            if hwnd and id_object == self.OBJID_WINDOW and id_child == self.CHILDID_SELF:
+                self.tracker.invalidate(hwnd)
+
+    def _run(self):
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, time):
+            try:
+                self.handle_event(event, hwnd, id_object, id_child)
+            except Exception as e:
+                print(f"前台进程解析失败: {e}")
+
+        callback = WinEventProc(on_event)
+        hook = user32.SetWinEventHook(
+            self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND,
+            None, callback, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+        # 两个事件不相邻，分别注册；销毁通知失败时缓存仍然可用，只是可能保留已关闭窗口的项
+        destroy_hook = user32.SetWinEventHook(
+            self.EVENT_OBJECT_DESTROY, self.EVENT_OBJECT_DESTROY,
+            None, callback, 0, 0, self.WINEVENT_OUTOFCONTEXT)
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        self._ready.set()
+
+        # 启动时先按当前前台窗口选择一次
+        on_event(None, self.EVENT_SYSTEM_FOREGROUND, None, 0, 0, 0, 0)
+        if not hook:
+            print("前台窗口通知注册失败，配置档案只按启动时的前台进程选择")
+            if destroy_hook:
+                user32.UnhookWinEvent(destroy_hook)
+            return
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+        if destroy_hook:
+            user32.UnhookWinEvent(destroy_hook)
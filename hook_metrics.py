@@ -0,0 +1,109 @@
+# =========================
+# Hook Latency Histogram
+# =========================
+# 记录每次钩子回调耗时（纳秒）的定长直方图。
+# 桶采用"对数-线性"划分：每个 2 的幂区间再等分 8 份，相对误差不超过 12.5%。
+# 所有存储预先分配在 array 中，record() 只做整数运算和数组写入。
+
+import math
+import time
+from array import array
+
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS          # 每个 2 的幂区间的子桶数
+MAX_SHIFT = 36                              # 最大约 2^40 ns（约 18 分钟）
+BUCKET_COUNT = (MAX_SHIFT + 2) * SUB_BUCKETS
+
+
+def bucket_index(ns):
+    """纳秒值 -> 桶下标"""
+    if ns < SUB_BUCKETS * 2:
+        return ns if ns > 0 else 0
+    shift = ns.bit_length() - (SUB_BUCKET_BITS + 1)
+    index = (shift << SUB_BUCKET_BITS) + (ns >> shift)
+    return index if index < BUCKET_COUNT else BUCKET_COUNT - 1
+
+
+def bucket_upper_bound(index):
+    """桶下标 -> 该桶可容纳的最大纳秒值"""
+    if index < SUB_BUCKETS * 2:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = (index & (SUB_BUCKETS - 1)) | SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+def format_ns(ns):
+    """把纳秒格式化成便于阅读的字符串"""
+    if ns < 1_000:
+        return f"{ns}ns"
+    if ns < 1_000_000:
+        return f"{ns / 1_000:.1f}µs"
+    if ns < 1_000_000_000:
+        return f"{ns / 1_000_000:.2f}ms"
+    return f"{ns / 1_000_000_000:.2f}s"
+
+
+class LatencyHistogram:
+    """钩子回调耗时直方图
+
+    record() 在钩子线程中调用；snapshot() / reset() 在界面线程中调用。
+    reset() 通过整体替换计数数组实现，钩子线程无需加锁。
+    """
+
+    __slots__ = ("budget_ns", "counts", "count", "max_ns", "over_budget", "created")
+
+    def __init__(self, budget_ns=1_000_000):
+        self.budget_ns = budget_ns
+        self.reset()
+
+    def reset(self):
+        """清空所有统计"""
+        self.counts = array('Q', bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.max_ns = 0
+        self.over_budget = 0
+        # 开始统计的时间（Unix 秒），指标接口据此识别计数被重置
+        self.created = time.time()
+
+    def record(self, ns):
+        """记录一次回调耗时"""
+        if ns < SUB_BUCKETS * 2:
+            index = ns if ns > 0 else 0
+        else:
+            shift = ns.bit_length() - (SUB_BUCKET_BITS + 1)
+            index = (shift << SUB_BUCKET_BITS) + (ns >> shift)
+            if index >= BUCKET_COUNT:
+                index = BUCKET_COUNT - 1
+        self.counts[index] += 1
+        self.count += 1
+        if ns > self.max_ns:
+            self.max_ns = ns
+        if ns > self.budget_ns:
+            self.over_budget += 1
+
+    def percentile(self, q):
+        """返回第 q 分位（0~1）所在桶的上界，单位纳秒"""
+        counts = self.counts
+        total = sum(counts)
+        if not total:
+            return 0
+        target = max(1, math.ceil(q * total))
+        seen = 0
+        for index, n in enumerate(counts):
+            seen += n
+            if seen >= target:
+                return min(bucket_upper_bound(index), self.max_ns)
+        return self.max_ns
+
+    def snapshot(self):
+        """获取当前统计摘要"""
+        return {
+            "count": self.count,
+            "p50": self.percentile(0.50),
+            "p99": self.percentile(0.99),
+            "p999": self.percentile(0.999),
+            "max": self.max_ns,
+            "over_budget": self.over_budget,
+            "budget": self.budget_ns,
+        }
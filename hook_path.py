@@ -0,0 +1,89 @@
+# =========================
+# Hook Callback
+# =========================
+# WH_MOUSE_LL 回调中的全部 Python 工作。MouseHook.start 用 make_hook_proc 生成安装到系统的回调，
+# scroll_bench 的压测和内存分配检查、测试用同一个函数生成回调，测的就是实际运行的代码。
+#
+# 回调每次都从 hook 上读取 clock / coalescer / on_change 等属性：
+# 它们会在其他线程中被替换（重新加载配置、开关合并），替换后下一个事件即生效。
+#
+# lParam 用 WheelHookStruct.from_address 读取：每个事件创建一个不拥有内存的结构体对象，
+# 回调返回前即释放（没有净分配）；用 memmove 复制到预先分配的结构体反而慢数倍。
+
+import time
+
+from hook_metrics import LatencyHistogram
+from hook_struct import WheelHookStruct, WM_MOUSEWHEEL, LLMHF_INJECTED
+from scroll_coalesce import COALESCE_TAG
+from scroll_filter import BLOCK
+
+
+class HookState:
+    """make_hook_proc 需要的钩子状态，MouseHook 提供同名属性；压测和测试直接使用这个类"""
+
+    def __init__(self, pipeline, clock, latency=None):
+        self.pipeline = pipeline
+        self.clock = clock
+        self.latency = latency or LatencyHistogram()
+        self.coalescer = None
+        self.hook_id = None
+        self.heartbeat = 0
+        self.generation = 0
+        self.change_pending = False
+        self.on_change = None
+
+
+def make_hook_proc(hook, call_next_hook):
+    """生成钩子回调 hook_proc(nCode, wParam, lParam)
+
+    hook 为 MouseHook 或 HookState；call_next_hook 为 CallNextHookEx（测试中可以是任意同签名的函数）。
+    """
+    # 回调中用到的对象和方法都预先取到局部变量
+    pipeline = hook.pipeline
+    record_latency = hook.latency.record
+    perf_counter_ns = time.perf_counter_ns
+
+    # lParam 指向的 MSLLHOOKSTRUCT 按 WheelHookStruct 的布局直接读取
+    read_struct = WheelHookStruct.from_address
+
+    def hook_proc(nCode, wParam, lParam):
+        t0 = perf_counter_ns()
+        hook.heartbeat += 1
+        if nCode == 0 and wParam == WM_MOUSEWHEEL:
+            ms = read_struct(lParam)
+            if ms.flags & LLMHF_INJECTED and ms.dwExtraInfo == COALESCE_TAG:
+                # 合并后重新注入的事件：原事件已经过滤和记录过，直接放行
+                result = call_next_hook(hook.hook_id, nCode, wParam, lParam)
+                record_latency(perf_counter_ns() - t0)
+                return result
+
+            # HIWORD(mouseData) contains the wheel delta, read as int16 (already sign-extended)
+            delta_short = ms.wheelDelta
+
+            now = hook.clock(ms.time)
+            # 过滤并写入环形缓冲区（只记录状态码和整数参数，文字由界面线程按需格式化）
+            # 每次通过 pipeline.process 调用：开关自适应模式时替换的阶段下一个事件即生效
+            decision = pipeline.process(delta_short, now, ms.flags)
+
+            hook.generation += 1
+            if not hook.change_pending:
+                hook.change_pending = True
+                on_change = hook.on_change
+                if on_change is not None:
+                    on_change()
+
+            if decision == BLOCK:
+                record_latency(perf_counter_ns() - t0)
+                return 1  # block
+
+            # 合并：放行的事件并入待注入的总和，原事件拦截，由合并线程在窗口结束时注入
+            coalescer = hook.coalescer
+            if coalescer is not None and coalescer.take(delta_short):
+                record_latency(perf_counter_ns() - t0)
+                return 1
+
+        result = call_next_hook(hook.hook_id, nCode, wParam, lParam)
+        record_latency(perf_counter_ns() - t0)
+        return result
+
+    return hook_proc
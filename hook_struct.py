@@ -0,0 +1,53 @@
+# =========================
+# Low-Level Hook Structures
+# =========================
+# WH_MOUSE_LL 回调参数的解码。
+#
+# 字段使用固定宽度的类型定义（而不是 wintypes），在 Windows 上与 MSLLHOOKSTRUCT 的布局一致，
+# 在 Linux 上也能构造出同样的内存布局，便于测试和压测。
+#
+# 钩子回调中直接用 WheelHookStruct.from_address(lParam) 读取字段：
+# 与 ctypes.cast(lParam, POINTER(...)).contents 相比，不再创建指针对象和 c_short，
+# 滚轮 delta 由 int16 字段直接完成符号扩展；from_address 应在安装钩子前绑定到局部变量。
+
+import ctypes
+
+WH_MOUSE_LL = 14
+WM_MOUSEWHEEL = 0x020A
+WM_MOUSEHWHEEL = 0x020E
+
+# MSLLHOOKSTRUCT.flags
+LLMHF_INJECTED = 0x00000001
+LLMHF_LOWER_IL_INJECTED = 0x00000002
+
+
+class POINT(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int32),
+        ("y", ctypes.c_int32),
+    ]
+
+
+class MSLLHOOKSTRUCT(ctypes.Structure):
+    _fields_ = [
+        ("pt", POINT),
+        ("mouseData", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("time", ctypes.c_uint32),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class WheelHookStruct(ctypes.Structure):
+    """与 MSLLHOOKSTRUCT 布局相同，但把 mouseData 拆成低 16 位和有符号的滚轮 delta（高 16 位）"""
+    _fields_ = [
+        ("pt", POINT),
+        ("mouseDataLow", ctypes.c_uint16),
+        ("wheelDelta", ctypes.c_int16),
+        ("flags", ctypes.c_uint32),
+        ("time", ctypes.c_uint32),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+assert ctypes.sizeof(WheelHookStruct) == ctypes.sizeof(MSLLHOOKSTRUCT)
@@ -0,0 +1,146 @@
+# =========================
+# Hook Supervisor
+# =========================
+# 管理钩子线程的完整生命周期：安装、心跳检查、WM_QUIT、卸载、join、自动重装。
+#
+# 保证钩子链中最多只有一个本程序的钩子：只有旧线程确认退出（已卸载钩子）后才会启动新线程，
+# 旧线程在超时内没有退出时不再安装第二个钩子，而是报告失败。
+#
+# 看门狗每 check_interval 秒检查一次：
+#   - 钩子线程已经退出                                   -> 重装
+#   - 向钩子线程投递 WM_HOOK_PING，上一次的 ping 没有被处理 -> 消息循环卡住，重装
+#   - GetLastInputInfo 显示有新的输入、鼠标位置也变了，
+#     但钩子回调一次都没有被调用（heartbeat 未变化）        -> Windows 已因超时移除钩子，重装
+# 只有键盘输入时鼠标位置不变，不会误判。
+
+import ctypes
+import threading
+
+from mouse_hook import MouseHook, WM_HOOK_PING
+
+
+class LASTINPUTINFO(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", ctypes.c_uint32),
+        ("dwTime", ctypes.c_uint32),
+    ]
+
+
+class POINT(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int32),
+        ("y", ctypes.c_int32),
+    ]
+
+
+class HookSupervisor:
+    def __init__(self, hook: MouseHook, check_interval=2.0, stop_timeout=2.0):
+        self.hook = hook
+        self.check_interval = check_interval
+        self.stop_timeout = stop_timeout
+        self.restarts = 0           # 自动或手动重装的次数
+        self.on_restart = None      # 重装后调用 on_restart(reason)
+
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._watchdog = None
+
+        user32 = ctypes.windll.user32
+        user32.GetLastInputInfo.argtypes = [ctypes.POINTER(LASTINPUTINFO)]
+        user32.GetCursorPos.argtypes = [ctypes.POINTER(POINT)]
+        self._user32 = user32
+        self._last_input = LASTINPUTINFO(ctypes.sizeof(LASTINPUTINFO), 0)
+        self._cursor = POINT()
+
+    @property
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive() and self.hook.install_ok
+
+    def start(self, timeout=2.0):
+        """安装钩子、启动后台服务和看门狗，返回钩子是否安装成功"""
+        with self._lock:
+            ok = self._start_thread(timeout)
+        self.hook.start_services()
+        self._stopping.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="HookWatchdog", daemon=True)
+        self._watchdog.start()
+        return ok
+
+    def stop(self):
+        """停止看门狗、卸载钩子并等待钩子线程退出"""
+        self._stopping.set()
+        if self._watchdog is not None:
+            self._watchdog.join(self.stop_timeout)
+            self._watchdog = None
+        with self._lock:
+            self._stop_thread()
+        self.hook.stop_services()
+
+    def restart(self, reason="manual"):
+        """卸载并重新安装钩子，返回是否成功"""
+        with self._lock:
+            if not self._stop_thread():
+                print("钩子线程没有退出，放弃重装以免钩子链中出现两个钩子")
+                return False
+            ok = self._start_thread(self.stop_timeout)
+            self.restarts += 1
+        print(f"钩子已重新安装（{reason}）")
+        on_restart = self.on_restart
+        if on_restart is not None:
+            on_restart(reason)
+        return ok
+
+    def _start_thread(self, timeout):
+        hook = self.hook
+        hook.installed.clear()
+        self._thread = threading.Thread(target=hook.start, name="MouseHook", daemon=True)
+        self._thread.start()
+        hook.installed.wait(timeout)
+        return hook.install_ok
+
+    def _stop_thread(self):
+        """投递 WM_QUIT 并 join，返回线程是否已退出"""
+        thread = self._thread
+        if thread is None:
+            return True
+        if thread.is_alive():
+            self.hook.stop()
+            thread.join(self.stop_timeout)
+            if thread.is_alive():
+                return False
+        self._thread = None
+        return True
+
+    # 看门狗
+    def _input_tick(self):
+        self._user32.GetLastInputInfo(ctypes.byref(self._last_input))
+        self._user32.GetCursorPos(ctypes.byref(self._cursor))
+        return self._last_input.dwTime, (self._cursor.x, self._cursor.y)
+
+    def _watch(self):
+        hook = self.hook
+        last_tick, last_cursor = self._input_tick()
+        last_heartbeat = hook.heartbeat
+        expected_pong = hook.pong
+
+        while not self._stopping.wait(self.check_interval):
+            reason = None
+            if self._thread is None or not self._thread.is_alive():
+                reason = "thread exited"
+            elif hook.pong < expected_pong:
+                reason = "message loop stalled"
+            else:
+                tick, cursor = self._input_tick()
+                if tick != last_tick and cursor != last_cursor and hook.heartbeat == last_heartbeat:
+                    reason = "hook removed by system"
+                last_tick, last_cursor = tick, cursor
+
+            if reason is not None:
+                print(f"看门狗检测到钩子失效: {reason}")
+                self.restart(reason)
+
+            # 下一次检查时钩子线程应当已经处理了这个 ping
+            pong = hook.pong
+            expected_pong = pong + 1 if hook.post(WM_HOOK_PING) else pong
+            last_heartbeat = hook.heartbeat
@@ -0,0 +1,185 @@
+# =========================
+# Local Metrics Endpoint
+# =========================
+# 可选的 OpenMetrics 指标接口，只监听 127.0.0.1（设置 metrics_port，0 为关闭）：
+#   curl http://127.0.0.1:<port>/metrics
+#
+# 所有数值都读自已有的计数器，抓取不会在钩子线程中执行任何代码，也不加锁：
+#   - 放行/拦截总数:   ScrollFilter.total_events / blocked_events
+#   - 按状态码的计数:  挂在事件管线上的 CounterSink（在 sink 线程中批量统计）
+#   - 回调耗时直方图:  MouseHook.latency（LatencyHistogram，按固定的秒级边界累加）
+#   - 重装次数:        HookSupervisor.restarts
+#   - 合并/注入事件数: WheelCoalescer.coalesced / injected（开启合并时）
+# MouseHook 在重装钩子时保持不变，这些计数器在整个进程生命周期内单调递增；
+# 只有界面上的"重置延迟统计"会清空耗时直方图，此时 _created 随之更新。
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hook_metrics import BUCKET_COUNT, bucket_upper_bound
+from scroll_filter import (STATUS_WAITING, STATUS_DISABLED, STATUS_INITIAL_UP, STATUS_INITIAL_DOWN,
+                           STATUS_SAME_DIRECTION, STATUS_DIRECTION_CHANGED, STATUS_BLOCKED)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+REASON_LABELS = {
+    STATUS_WAITING: "waiting",
+    STATUS_DISABLED: "disabled",
+    STATUS_INITIAL_UP: "initial_up",
+    STATUS_INITIAL_DOWN: "initial_down",
+    STATUS_SAME_DIRECTION: "same_direction",
+    STATUS_DIRECTION_CHANGED: "direction_changed",
+    STATUS_BLOCKED: "blocked",
+}
+
+# 回调耗时直方图的边界（秒）
+LATENCY_BUCKETS = (1e-6, 2e-6, 5e-6, 10e-6, 20e-6, 50e-6, 100e-6, 200e-6, 500e-6,
+                   1e-3, 2e-3, 5e-3, 10e-3, 50e-3, 200e-3, 1.0)
+
+# 细粒度桶 -> 输出边界的下标（桶上界不超过该边界的第一个边界，超过所有边界的只计入 +Inf）
+_BUCKET_TARGET = []
+for _index in range(BUCKET_COUNT):
+    _upper = bucket_upper_bound(_index) / 1e9
+    _BUCKET_TARGET.append(next((i for i, le in enumerate(LATENCY_BUCKETS) if _upper <= le), len(LATENCY_BUCKETS)))
+
+
+def _format_le(value):
+    return f"{value:.6f}".rstrip("0").rstrip(".")
+
+
+def render(supervisor, counter):
+    """生成 OpenMetrics 文本"""
+    hook = supervisor.hook
+    scroll_filter = hook.filter
+    latency = hook.latency
+    reasons = dict(counter.reasons)
+    lines = []
+    add = lines.append
+
+    add("# TYPE mss_events counter")
+    add("# HELP mss_events Wheel events by decision.")
+    add(f'mss_events_total{{decision="allowed"}} {scroll_filter.total_events}')
+    add(f'mss_events_total{{decision="blocked"}} {scroll_filter.blocked_events}')
+
+    add("# TYPE mss_event_reasons counter")
+    add("# HELP mss_event_reasons Wheel events by filter status.")
+    for code, label in REASON_LABELS.items():
+        add(f'mss_event_reasons_total{{reason="{label}"}} {reasons.get(code, 0)}')
+
+    add("# TYPE mss_direction_changes counter")
+    add("# HELP mss_direction_changes Accepted scroll direction changes.")
+    add(f"mss_direction_changes_total {reasons.get(STATUS_DIRECTION_CHANGED, 0)}")
+
+    add("# TYPE mss_metrics_dropped_events counter")
+    add("# HELP mss_metrics_dropped_events Events overwritten in the ring before the metrics sink read them.")
+    add(f"mss_metrics_dropped_events_total {counter.dropped}")
+
+    add("# TYPE mss_hook_callbacks counter")
+    add("# HELP mss_hook_callbacks Low-level mouse hook callbacks (all mouse messages).")
+    add(f"mss_hook_callbacks_total {hook.heartbeat}")
+
+    # 先取数组引用：reset() 整体替换数组，不会读到一半新一半旧的数据
+    counts = latency.counts
+    buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+    for index, n in enumerate(counts):
+        if n:
+            buckets[_BUCKET_TARGET[index]] += n
+    add("# TYPE mss_hook_latency_seconds histogram")
+    add("# HELP mss_hook_latency_seconds Hook callback duration.")
+    cumulative = 0
+    for le, n in zip(LATENCY_BUCKETS, buckets):
+        cumulative += n
+        add(f'mss_hook_latency_seconds_bucket{{le="{_format_le(le)}"}} {cumulative}')
+    cumulative += buckets[-1]
+    add(f'mss_hook_latency_seconds_bucket{{le="+Inf"}} {cumulative}')
+    add(f"mss_hook_latency_seconds_count {cumulative}")
+    add(f"mss_hook_latency_seconds_created {latency.created:.3f}")
+
+    add("# TYPE mss_hook_over_budget counter")
+    add("# HELP mss_hook_over_budget Hook callbacks slower than latency_budget_us.")
+    add(f"mss_hook_over_budget_total {latency.over_budget}")
+    add(f"mss_hook_over_budget_created {latency.created:.3f}")
+
+    add("# TYPE mss_hook_reinstalls counter")
+    add("# HELP mss_hook_reinstalls Hook reinstalls (watchdog or manual).")
+    add(f"mss_hook_reinstalls_total {supervisor.restarts}")
+
+    coalescer = hook.coalescer
+    if coalescer is not None:
+        add("# TYPE mss_coalesced_events counter")
+        add("# HELP mss_coalesced_events Allowed wheel events held back and merged into injected events.")
+        add(f"mss_coalesced_events_total {coalescer.coalesced}")
+        add("# TYPE mss_injected_events counter")
+        add("# HELP mss_injected_events Wheel events injected by the coalescing stage.")
+        add(f"mss_injected_events_total {coalescer.injected}")
+
+    add("# TYPE mss_hook_installed gauge")
+    add("# HELP mss_hook_installed Whether the hook is currently installed.")
+    add(f"mss_hook_installed {int(supervisor.alive)}")
+
+    add("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """在后台线程中提供 /metrics"""
+
+    def __init__(self, supervisor, port, counter=None):
+        if not 0 < port < 65536:
+            raise ValueError(f"invalid metrics port: {port}")
+        self.supervisor = supervisor
+        self.counter = counter
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render(server.supervisor, server.counter).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        # 只监听回环地址，不对局域网开放
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+        if counter is None:
+            # 按状态码计数在 sink 线程中完成，钩子线程只负责写环形缓冲区
+            from pipeline_sinks import CounterSink
+            self.counter = supervisor.hook.add_sink(CounterSink())
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+        print(f"指标接口: http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.httpd.server_close()
+
+
+def start_metrics(settings, supervisor):
+    """按设置启动指标接口，未开启或端口不可用时返回 None"""
+    try:
+        port = settings.get_metrics_port()
+        if not port:
+            return None
+        server = MetricsServer(supervisor, port)
+    except (OSError, ValueError) as e:
+        print(f"无法启动指标接口: {e}")
+        return None
+    server.start()
+    return server
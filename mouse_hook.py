@@ -0,0 +1,334 @@
+import ctypes
+from ctypes import wintypes
+import os
+import threading
+
+from event_ring import EventRing
+from foreground import ForegroundTracker, Win32ForegroundWatcher, Win32ProcessResolver
+from hook_metrics import LatencyHistogram
+from hook_path import make_hook_proc
+from hook_struct import WH_MOUSE_LL
+from scroll_clock import make_clock
+from scroll_coalesce import SendInputInjector, WheelCoalescer
+from scroll_filter import ScrollFilter
+from scroll_adaptive import AdaptiveTuner
+from scroll_pipeline import Pipeline
+from settings import Settings
+
+# 钩子线程消息
+WM_QUIT = 0x0012
+WM_APP = 0x8000
+WM_HOOK_PING = WM_APP + 1    # 看门狗探测钩子线程的消息循环是否仍在运行
+
+
+# =======================
+# Low-Level Mouse Hooker
+# =======================
+class MouseHook:
+    def __init__(self, settings: Settings, translator=None):
+        self.settings = settings
+        self.translator = translator
+
+        # 钩子安装完成（成功或失败）时置位，install_ok 为安装结果
+        self.installed = threading.Event()
+        self.install_ok = False
+
+        # 当前使用的配置快照（不可修改，配置变化时整体替换）
+        self.snapshot = self.settings.snapshot()
+
+        # 防抖决策引擎（纯 Python，见 scroll_filter.py）
+        self.filter = ScrollFilter(config=self.snapshot.filter)
+        # 事件时间源（整数纳秒，单调递增）
+        self.clock = make_clock(self.snapshot.timestamp_source)
+
+        # 前台进程（可执行文件名），用于选择 [profile:<exe>] 配置档案；
+        # 配置快照和前台进程可能在不同线程中同时变化，替换过滤器配置时加锁
+        self.foreground_exe = None
+        self.foreground_watcher = None
+        self._config_lock = threading.Lock()
+
+        # 界面刷新通知：generation 每个滚轮事件加一；
+        # change_pending 为 False 时才调用 on_change，界面处理完后再清除，
+        # 因此无论事件多密集，每次界面刷新之间最多只通知一次
+        self.generation = 0
+        self.change_pending = False
+        self.on_change = None
+
+        # 同步决策阶段：过滤后写入最近滚轮事件的环形缓冲区，供界面和 sink 批量读取。
+        # 高精度滚轮每秒可达上千个事件，容量要能容纳最慢的 sink（HistorySink，5 秒）一个读取间隔的事件
+        self.pipeline = Pipeline(self.filter, EventRing(16384))
+        self.ring = self.pipeline.ring
+
+        # 自适应模式（scroll_adaptive.AdaptiveTuner，作为决策阶段的附加阶段），开启时才创建
+        self.tuner = None
+        self._configure_tuner(self.snapshot)
+
+        # 放行事件的合并（scroll_coalesce.WheelCoalescer），设置了 coalesce_ms 时由 start_services 创建
+        self.coalescer = None
+
+        # 异步 sink（记录、统计等，见 pipeline_sinks.py），有 sink 时才创建
+        self.sinks = None
+
+        # 跨会话的滚动统计（scroll_history.HistoryStore），由 HistorySink 写入
+        self.history = None
+
+        # 每次回调的耗时直方图
+        self.latency = LatencyHistogram(self.snapshot.latency_budget_us * 1000)
+
+        # win32 - 使用cdll而不是windll来避免126错误
+        self.user32 = ctypes.cdll.user32
+        self.kernel32 = ctypes.cdll.kernel32
+        self.hook_id = None
+        self.hook_cb = None
+
+        # 钩子线程（由 HookSupervisor 管理，见 hook_supervisor.py）
+        self.thread_id = 0
+        # 心跳：heartbeat 每次回调（任意鼠标消息）加一，pong 每处理一次 WM_HOOK_PING 加一
+        self.heartbeat = 0
+        self.pong = 0
+        
+        # 确保DLL函数有正确的参数类型
+        self.user32.SetWindowsHookExA.argtypes = [
+            ctypes.c_int, 
+            ctypes.c_void_p, 
+            wintypes.HINSTANCE, 
+            ctypes.c_uint
+        ]
+        self.user32.SetWindowsHookExA.restype = ctypes.c_void_p
+        
+        self.user32.CallNextHookEx.argtypes = [
+            ctypes.c_void_p, 
+            ctypes.c_int, 
+            wintypes.WPARAM, 
+            wintypes.LPARAM
+        ]
+        self.user32.CallNextHookEx.restype = ctypes.c_long
+        
+        self.kernel32.GetModuleHandleW.argtypes = [wintypes.LPCWSTR]
+        self.kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+        self.user32.UnhookWindowsHookEx.argtypes = [ctypes.c_void_p]
+        self.user32.UnhookWindowsHookEx.restype = wintypes.BOOL
+        self.user32.PostThreadMessageW.argtypes = [wintypes.DWORD, ctypes.c_uint, wintypes.WPARAM, wintypes.LPARAM]
+        self.user32.PostThreadMessageW.restype = wintypes.BOOL
+
+    def reload_settings(self, snapshot=None):
+        """应用新的配置快照（默认取 Settings 的当前快照）
+
+        过滤器配置通过一次引用替换生效；时间源不变时，过滤器的方向、
+        时间和连续反向计数都保留，修改配置不会放过正在进行的抖动。
+        """
+        snapshot = snapshot or self.settings.snapshot()
+        with self._config_lock:
+            previous = self.snapshot
+            if snapshot is previous:
+                return
+            if not snapshot.compatible_with(previous):
+                # 新旧时间源的时间基准不同，让过滤器重新确定初始方向
+                self.clock = make_clock(snapshot.timestamp_source)
+                self.filter.last_dir = 0
+            self._configure_tuner(snapshot)
+            self._apply_filter(snapshot)
+            self.latency.budget_ns = snapshot.latency_budget_us * 1000
+            if self.coalescer is not None or snapshot.coalesce_ms != previous.coalesce_ms:
+                self._configure_coalescer(snapshot)
+            self.snapshot = snapshot
+
+    def set_foreground(self, exe):
+        """前台进程变化（由前台窗口监视线程调用），切换到对应的配置档案"""
+        with self._config_lock:
+            self.foreground_exe = exe
+            self._apply_filter(self.snapshot)
+
+    def _configure_tuner(self, snapshot):
+        """按快照开启或关闭自适应模式；范围由 _apply_filter 更新，估计结果在范围变化时保留"""
+        bounds = snapshot.adaptive
+        if bounds is None:
+            if self.tuner is not None:
+                self.tuner = None
+                self.pipeline.set_stages(())
+        elif self.tuner is None:
+            self.tuner = AdaptiveTuner(self.filter, bounds)
+            self.pipeline.set_stages((self.tuner,))
+
+    def _configure_coalescer(self, snapshot):
+        """按快照开启、关闭合并或修改窗口；关闭时先注入尚未注入的事件"""
+        coalescer = self.coalescer
+        if not snapshot.coalesce_ms:
+            if coalescer is not None:
+                self.coalescer = None
+                coalescer.stop()
+        elif coalescer is not None:
+            try:
+                coalescer.set_window(snapshot.coalesce_ms)
+            except ValueError as e:
+                print(f"合并窗口无效，保持原来的窗口: {e}")
+        else:
+            try:
+                coalescer = WheelCoalescer(SendInputInjector(), snapshot.coalesce_ms)
+            except (OSError, ValueError) as e:
+                print(f"无法注入滚轮事件，合并不生效: {e}")
+                return
+            coalescer.start()
+            self.coalescer = coalescer
+
+    def _apply_filter(self, snapshot):
+        """按前台程序替换过滤器配置
+
+        自适应模式下作为基础配置：前台程序的配置档案改了 block_interval / threshold 时按档案的值过滤，
+        否则已有估计结果时仍按估计值过滤，配置档案只切换 enabled。
+        """
+        config = snapshot.filter_for(self.foreground_exe)
+        tuner = self.tuner
+        if tuner is not None:
+            general = snapshot.filter
+            pinned = (config.block_interval_ns != general.block_interval_ns
+                      or config.direction_change_threshold != general.direction_change_threshold)
+            tuner.rebase(config, snapshot.adaptive, pinned)
+        else:
+            self.filter.apply(config)
+
+    def get_status(self):
+        """获取当前状态信息"""
+        return {
+            "total_events": self.filter.total_events,
+            "blocked_events": self.filter.blocked_events,
+            "current_direction": self.filter.current_direction,
+            "status": self.filter.status,
+            "status_arg": self.filter.status_arg,
+            "threshold": self.filter.direction_change_threshold,
+            "profile": self.foreground_exe if self.foreground_exe in self.snapshot.profiles else None,
+            "latency": self.latency.snapshot(),
+            "adaptive": self.tuner.estimates() if self.tuner is not None else None
+        }
+
+    def post(self, message):
+        """向钩子线程的消息队列投递消息，线程未运行时返回 False"""
+        thread_id = self.thread_id
+        return bool(thread_id) and bool(self.user32.PostThreadMessageW(thread_id, message, 0, 0))
+
+    def stop(self):
+        """让钩子线程退出消息循环并卸载钩子（start() 随后返回）"""
+        return self.post(WM_QUIT)
+
+    def start(self):
+        """在当前线程安装钩子并运行消息循环，直到收到 WM_QUIT；退出前卸载钩子"""
+        self.thread_id = self.kernel32.GetCurrentThreadId()
+        self.install_ok = False
+
+        # Callback type: LowLevelMouseProc
+        CMPFUNC = ctypes.WINFUNCTYPE(
+            ctypes.c_int, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM
+        )
+
+        # 回调的 Python 部分见 hook_path.py
+        hook_proc = make_hook_proc(self, self.user32.CallNextHookEx)
+        self.hook_cb = CMPFUNC(hook_proc)
+        
+        # 获取当前模块句柄
+        hmod = self.kernel32.GetModuleHandleW(None)
+        if not hmod:
+            error_code = self.kernel32.GetLastError()
+            print(f"获取模块句柄失败，错误代码: {error_code}")
+            self.thread_id = 0
+            self.installed.set()
+            return False
+
+        self.hook_id = self.user32.SetWindowsHookExA(
+            WH_MOUSE_LL,
+            self.hook_cb,
+            hmod,
+            0,
+        )
+
+        if not self.hook_id:
+            error_code = self.kernel32.GetLastError()
+            print(f"钩子安装失败，错误代码: {error_code}")
+            self.thread_id = 0
+            self.installed.set()
+            return False
+
+        self.install_ok = True
+        self.installed.set()
+        print("鼠标钩子安装成功")
+
+        # Message loop (runs in this thread)
+        msg = wintypes.MSG()
+        while True:
+            b = self.user32.GetMessageA(ctypes.byref(msg), None, 0, 0)
+            if b == 0 or b == -1:  # WM_QUIT or error
+                break
+            if msg.message == WM_HOOK_PING:
+                self.pong += 1
+                continue
+            self.user32.TranslateMessage(ctypes.byref(msg))
+            self.user32.DispatchMessageA(ctypes.byref(msg))
+
+        # 卸载钩子（Windows 已经因超时移除钩子时会失败，忽略即可）
+        self.user32.UnhookWindowsHookEx(self.hook_id)
+        self.hook_id = None
+        self.thread_id = 0
+        print("鼠标钩子已卸载")
+        return True
+
+    def add_sink(self, sink):
+        """添加一个异步 sink，第一次调用时启动 sink 线程"""
+        if self.sinks is None:
+            # 只有用到 sink 时才加载（asyncio 导入较慢，启动时不需要）
+            from pipeline_sinks import SinkRunner
+            self.sinks = SinkRunner(self.ring)
+            self.sinks.start()
+        return self.sinks.add(sink)
+
+    def start_services(self):
+        """启动与钩子线程无关的后台服务：sink、前台进程监视（重装钩子时保持运行）"""
+        # 按配置开始记录滚轮事件
+        trace_path = self.snapshot.trace_path
+        if trace_path:
+            from pipeline_sinks import TraceSink
+            try:
+                self.add_sink(TraceSink(trace_path))
+                print(f"滚轮事件记录到: {trace_path}")
+            except OSError as e:
+                print(f"无法打开记录文件: {e}")
+
+        # 按分钟累计滚动统计，保存到配置目录（history_path 为空时不保存）
+        history_path = self.settings.get_history_path()
+        if history_path and self.history is None:
+            from scroll_history import HistoryStore
+            from pipeline_sinks import HistorySink
+            try:
+                self.history = HistoryStore(os.path.join(os.path.dirname(self.settings.file_path), history_path))
+                # 重新加载配置时时间源可能被替换，每批读取当前的时间源
+                self.add_sink(HistorySink(self.history, lambda: self.clock.now()))
+            except OSError as e:
+                self.history = None
+                print(f"无法打开统计历史文件: {e}")
+
+        # 合并快速滚动的放行事件
+        if self.coalescer is None and self.snapshot.coalesce_ms:
+            self._configure_coalescer(self.snapshot)
+
+        # 按前台进程切换配置档案（前台切换通知在独立线程中处理）
+        if self.foreground_watcher is None:
+            try:
+                tracker = ForegroundTracker(Win32ProcessResolver(), self.set_foreground)
+                self.foreground_watcher = Win32ForegroundWatcher(tracker)
+                self.foreground_watcher.start()
+            except OSError as e:
+                self.foreground_watcher = None
+                print(f"无法监视前台窗口，配置档案不生效: {e}")
+
+    def stop_services(self):
+        if self.coalescer:
+            coalescer, self.coalescer = self.coalescer, None
+            coalescer.stop()
+        if self.foreground_watcher:
+            self.foreground_watcher.stop()
+            self.foreground_watcher = None
+        if self.sinks:
+            self.sinks.stop()
+            self.sinks = None
+        if self.history:
+            self.history.close()
+            self.history = None
@@ -0,0 +1,253 @@
+# =========================
+# Asynchronous Pipeline Sinks
+# =========================
+# sink 在独立线程的 asyncio 事件循环中运行，每个 sink 一个任务和一个 EventRing 读取游标：
+# 每隔 sink.interval 秒读取新事件，按批调用 sink.consume(reader, n)
+# （数据位于 reader.timestamps[:n] 等数组中，consume 可以是普通函数或协程）。
+# 某个 sink 变慢只会让它自己落后，落后超过一圈时被覆盖的事件计入 reader.dropped，
+# 不影响其他 sink，更不会阻塞事件源线程。
+#
+# 实时：   runner = SinkRunner(pipeline.ring, [TraceSink(path)]); runner.start(); ...; runner.stop()
+# 离线：   run_source(TraceSource(path), Pipeline(...), [CounterSink()])
+#          事件源每处理半圈事件就等待所有 sink 读完，离线回放再快也不会丢事件。
+
+import asyncio
+import inspect
+import threading
+import time
+
+from scroll_clock import NS_PER_SECOND
+from scroll_filter import ALLOW, STATUS_DIRECTION_CHANGED
+
+
+class Sink:
+    """sink 接口"""
+
+    interval = 0.25     # 读取间隔（秒）
+    batch_size = 1024   # 每批最多事件数
+
+    def consume(self, reader, n):
+        """处理 reader 本批读取的 n 个事件"""
+        raise NotImplementedError
+
+    def close(self):
+        """所有事件处理完后调用一次"""
+
+
+class CounterSink(Sink):
+    """按决策和状态码计数"""
+
+    def __init__(self):
+        self.events = 0
+        self.allowed = 0
+        self.blocked = 0
+        self.reasons = {}       # 状态码 -> 事件数
+        self.dropped = 0        # 读取前已被覆盖、没有计入的事件数
+
+    def consume(self, reader, n):
+        decisions = reader.decisions
+        reasons = self.reasons
+        allowed = 0
+        for i in range(n):
+            if decisions[i] == ALLOW:
+                allowed += 1
+        for reason in reader.reasons[:n]:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        self.events += n
+        self.allowed += allowed
+        self.blocked += n - allowed
+        self.dropped = reader.dropped
+
+
+class TraceSink(Sink):
+    """把事件写入 trace 文件（scroll_trace.py 格式）"""
+
+    batch_size = 4096
+
+    def __init__(self, path):
+        from scroll_trace import TraceWriter
+        self.writer = TraceWriter(path)
+
+    def consume(self, reader, n):
+        self.writer.write_from_reader(reader, n)
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+
+
+class HistorySink(Sink):
+    """把每批的放行、拦截、方向切换数按事件发生的分钟累加到 HistoryStore（scroll_history.py）
+
+    now() 返回此刻在事件时间戳基准下的时间（scroll_clock 中时间源的 now），用来把事件时间换算为 Unix 时间。
+    """
+
+    interval = 5.0
+
+    def __init__(self, store, now):
+        self.store = store
+        self.now = now
+
+    def consume(self, reader, n):
+        # 事件时间戳加上 offset 即为 Unix 纳秒；本批的事件都在最近几秒内，用同一个偏移
+        offset = time.time_ns() - self.now()
+        timestamps = reader.timestamps
+        decisions = reader.decisions
+        reasons = reader.reasons
+        add = self.store.add
+        minute = None
+        allowed = blocked = changes = 0
+        for i in range(n):
+            second = (timestamps[i] + offset) // NS_PER_SECOND
+            if second // 60 != minute:
+                if minute is not None:
+                    add(minute * 60, allowed, blocked, changes)
+                minute = second // 60
+                allowed = blocked = changes = 0
+            if decisions[i] == ALLOW:
+                allowed += 1
+                if reasons[i] == STATUS_DIRECTION_CHANGED:
+                    changes += 1
+            else:
+                blocked += 1
+        if minute is not None:
+            add(minute * 60, allowed, blocked, changes)
+
+    def close(self):
+        self.store.flush()
+
+
+class CallbackSink(Sink):
+    """测试替身 / 临时接入：每批调用 callback(reader, n)"""
+
+    def __init__(self, callback, interval=0.25):
+        self.callback = callback
+        self.interval = interval
+
+    def consume(self, reader, n):
+        return self.callback(reader, n)
+
+
+# =========================
+# Runner
+# =========================
+class SinkRunner:
+    """在后台线程的 asyncio 事件循环中运行一组 sink"""
+
+    def __init__(self, ring, sinks=()):
+        self.ring = ring
+        self._sinks = []            # [(sink, reader)]
+        self._loop = None
+        self._stopped = None
+        self._tasks = []
+        self._thread = None
+        self._ready = threading.Event()
+        for sink in sinks:
+            self.add(sink)
+
+    @property
+    def sinks(self):
+        return [sink for sink, _ in self._sinks]
+
+    def add(self, sink):
+        """添加 sink（可以在运行中调用），只读取添加之后写入的事件"""
+        entry = (sink, self.ring.reader(sink.batch_size))
+        self._sinks.append(entry)
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._spawn, entry)
+        return sink
+
+    def start(self):
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),), name="PipelineSinks", daemon=True)
+        self._thread.start()
+        self._ready.wait(1.0)
+
+    def stop(self, timeout=2.0):
+        """停止所有 sink：各自读完剩余事件后调用 close()"""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def flush(self):
+        """立即让所有 sink 读完当前事件"""
+        for sink, reader in self._sinks:
+            await _drain(sink, reader)
+
+    async def close(self):
+        await self.flush()
+        for sink, _ in self._sinks:
+            sink.close()
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        for entry in self._sinks:
+            self._spawn(entry)
+        self._ready.set()
+        try:
+            await self._stopped.wait()
+            self._loop = None
+            # 新添加的 sink 可能还在排队启动，等待它们的任务也结束
+            while self._tasks:
+                tasks, self._tasks = self._tasks, []
+                await asyncio.gather(*tasks)
+        finally:
+            self._loop = None
+
+    def _spawn(self, entry):
+        self._tasks.append(asyncio.get_running_loop().create_task(self._run_sink(*entry)))
+
+    async def _run_sink(self, sink, reader):
+        stopped = self._stopped
+        try:
+            while not stopped.is_set():
+                await _drain(sink, reader)
+                try:
+                    await asyncio.wait_for(stopped.wait(), sink.interval)
+                except asyncio.TimeoutError:
+                    pass
+            await _drain(sink, reader)
+        except Exception as e:
+            print(f"sink {type(sink).__name__} 出错，已停止: {e}")
+        finally:
+            sink.close()
+
+
+async def _drain(sink, reader):
+    n = reader.drain()
+    while n:
+        result = sink.consume(reader, n)
+        if inspect.isawaitable(result):
+            await result
+        else:
+            # 让出事件循环，避免一个 sink 连续处理大量积压时其他 sink 等待
+            await asyncio.sleep(0)
+        n = reader.drain()
+
+
+def run_source(source, pipeline, sinks=()):
+    """在当前线程中把离线事件源送入 pipeline，sink 读完所有事件后返回处理的事件数"""
+    return asyncio.run(_run_source(source, pipeline, sinks))
+
+
+async def _run_source(source, pipeline, sinks):
+    runner = SinkRunner(pipeline.ring, sinks)
+    process = pipeline.process
+    # 每处理半圈就让 sink 读完，读取游标永远不会落后一圈
+    chunk = pipeline.ring.capacity // 2
+    count = 0
+    pending = 0
+    for timestamp, delta, flags in source.events():
+        process(delta, timestamp, flags)
+        pending += 1
+        if pending == chunk:
+            count += pending
+            pending = 0
+            await runner.flush()
+    count += pending
+    await runner.close()
+    return count
@@ -0,0 +1,265 @@
+# =========================
+# Adaptive Filter Parameters
+# =========================
+# 自适应模式：在钩子回调中根据滚轮事件的时间分布持续估计 block_interval 和 direction_change_threshold。
+#
+# 事件按原始方向序列分类（与过滤器的决策无关，因此不受当前参数影响）：
+#   - 同向间隔：连续两个同方向事件的时间差（超过 1 秒的停顿不计），即用户的滚动节奏
+#   - 抖动：方向序列 A…A B…B A 中夹在中间的短反向段（回到原方向，说明不是有意换向），
+#           并且反向、反向段内部和返回的间隔都短于同向间隔的中位数（手动换向不会比滚动节奏更快）；
+#           记录 A 到第一个 B 的时间差（抖动间隔）和反向段长度（滚动量，按格计，与过滤器的加权阈值一致）
+#   反向段超过 max_threshold 格或任一间隔不短于滚动节奏，视为有意换向。
+#
+# 每个量用 P² 算法（Jain & Chlamtac, 1985）估计分位数：5 个标记，内存固定，每次更新 O(1)，不保存样本。
+# 推导：
+#   block_interval = clamp(max(抖动间隔 p95 × INTERVAL_MARGIN, 同向间隔 p50), min_interval, max_interval)
+#   threshold      = clamp(反向段长度 p99 向上取整 + 1, min_threshold, max_threshold)
+# 至少观察到 MIN_JITTER_SAMPLES 次抖动后才开始调整，此前使用配置中的值。
+# 每 DERIVE_EVERY 次抖动推导一次，结果变化时才创建新的 FilterConfig 并替换，回调中通常不分配对象。
+
+import math
+import threading
+
+from scroll_clock import seconds_to_ns
+from scroll_filter import FilterConfig, WHEEL_DELTA
+
+INTERVAL_MARGIN = 1.5
+MIN_JITTER_SAMPLES = 20
+# 同向间隔超过该值视为停顿
+PAUSE_NS = 1_000_000_000
+# 推导结果的精度：interval 取整到 10ms
+INTERVAL_STEP_NS = 10_000_000
+# 同向间隔每 SAME_GAP_SAMPLING 个取一个样本（中位数不需要每个样本，省下大部分估计开销）
+SAME_GAP_SAMPLING = 16
+# 每 DERIVE_EVERY 次抖动推导一次参数（MIN_JITTER_SAMPLES 是它的倍数）
+DERIVE_EVERY = 4
+
+
+class P2Quantile:
+    """P² 流式分位数估计"""
+
+    __slots__ = ("p", "count", "heights", "positions", "desired", "increments")
+
+    def __init__(self, p):
+        if not 0.0 < p < 1.0:
+            raise ValueError(f"quantile must be in (0, 1): {p!r}")
+        self.p = p
+        self.count = 0
+        self.heights = [0.0] * 5
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.increments = (0.0, p / 2, p, (1 + p) / 2, 1.0)
+
+    def add(self, x):
+        q = self.heights
+        count = self.count
+        self.count = count + 1
+        if count < 5:
+            q[count] = x
+            if count == 4:
+                q.sort()
+            return
+
+        # 找到 x 所在的区间，更新最小/最大值，右侧标记的位置加一
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            n[1] += 1
+            n[2] += 1
+            n[3] += 1
+        elif x < q[1]:
+            n[1] += 1
+            n[2] += 1
+            n[3] += 1
+        elif x < q[2]:
+            n[2] += 1
+            n[3] += 1
+        elif x < q[3]:
+            n[3] += 1
+        elif x > q[4]:
+            q[4] = x
+        n[4] += 1
+
+        # 只有中间三个标记的期望位置参与调整
+        desired = self.desired
+        increments = self.increments
+        desired[1] += increments[1]
+        desired[2] += increments[2]
+        desired[3] += increments[3]
+
+        # 调整中间三个标记的高度
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # 抛物线插值，越界时改用线性插值
+                qi = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qi < q[i + 1]:
+                    qi = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qi
+                n[i] += d
+
+    def value(self):
+        """当前估计值，没有样本时返回 0"""
+        count = self.count
+        if count >= 5:
+            return self.heights[2]
+        if not count:
+            return 0.0
+        # 样本不足 5 个时直接取样本分位数
+        sample = sorted(self.heights[:count])
+        return sample[min(count - 1, int(self.p * count))]
+
+
+class AdaptiveBounds:
+    """自适应模式下参数的取值范围（来自设置），创建后不可修改"""
+
+    __slots__ = ("min_interval_ns", "max_interval_ns", "min_threshold", "max_threshold")
+
+    def __init__(self, min_interval=0.05, max_interval=1.0, min_threshold=2, max_threshold=6):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f"invalid interval bounds: {min_interval!r}..{max_interval!r}")
+        if not 1 <= min_threshold <= max_threshold:
+            raise ValueError(f"invalid threshold bounds: {min_threshold!r}..{max_threshold!r}")
+        object.__setattr__(self, "min_interval_ns", seconds_to_ns(min_interval))
+        object.__setattr__(self, "max_interval_ns", seconds_to_ns(max_interval))
+        object.__setattr__(self, "min_threshold", int(min_threshold))
+        object.__setattr__(self, "max_threshold", int(max_threshold))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, AdaptiveBounds):
+            return NotImplemented
+        return (self.min_interval_ns == other.min_interval_ns and self.max_interval_ns == other.max_interval_ns
+                and self.min_threshold == other.min_threshold and self.max_threshold == other.max_threshold)
+
+    def __hash__(self):
+        return hash((self.min_interval_ns, self.max_interval_ns, self.min_threshold, self.max_threshold))
+
+    def __repr__(self):
+        return (f"AdaptiveBounds(min_interval={self.min_interval_ns / 1e9!r}, max_interval={self.max_interval_ns / 1e9!r}, "
+                f"min_threshold={self.min_threshold}, max_threshold={self.max_threshold})")
+
+
+class AdaptiveTuner:
+    """Pipeline 阶段：观察每个事件，按估计结果替换 scroll_filter 的配置
+
+    stage(delta, timestamp, decision) 原样返回决策，新参数从下一个事件开始生效。
+    估计量的更新和推导只在换向、抖动和同向间隔采样时进行，持续同向滚动的事件只记录时间；
+    这部分与 rebase（设置、前台程序变化，在其他线程调用）用 _lock 互斥。
+    """
+
+    __slots__ = ("filter", "bounds", "base", "pinned", "same_gap", "jitter_gap", "run_length", "cadence_ns",
+                 "last_time", "base_dir", "run", "run_gap", "same_count", "derived", "_lock")
+
+    def __init__(self, scroll_filter, bounds=None):
+        self.filter = scroll_filter
+        self.bounds = bounds or AdaptiveBounds()
+        # 估计结果可用之前使用的配置（以及 enabled）
+        self.base = scroll_filter.config
+        self.pinned = False     # 为 True 时使用 base（配置档案指定了参数），只估计不替换
+        self.same_gap = P2Quantile(0.5)
+        self.jitter_gap = P2Quantile(0.95)
+        self.run_length = P2Quantile(0.99)
+        self.cadence_ns = 0     # same_gap 的中位数，样本不足时为 0（使用 max_interval）
+        self.last_time = 0
+        self.base_dir = 0       # 反向段之前的方向，0 表示还没有事件
+        self.run = 0            # 当前反向段的滚动量（1/WHEEL_DELTA 格）
+        self.run_gap = 0        # 反向段第一个事件距上一个原方向事件的时间
+        self.same_count = 0
+        self.derived = None     # 最近一次推导出的 FilterConfig
+        self._lock = threading.Lock()
+
+    def __call__(self, delta, timestamp, decision):
+        gap = timestamp - self.last_time
+        self.last_time = timestamp
+        direction = 1 if delta > 0 else -1
+        if self.run == 0 and direction == self.base_dir:
+            # 同向滚动（最常见的情况）：每 SAME_GAP_SAMPLING 个间隔取一个样本
+            if gap < PAUSE_NS:
+                self.same_count += 1
+                if self.same_count == SAME_GAP_SAMPLING:
+                    self.same_count = 0
+                    with self._lock:
+                        self.same_gap.add(gap)
+                        if self.same_gap.count >= 5:
+                            self.cadence_ns = self.same_gap.value()
+            return decision
+
+        if self.base_dir == 0:
+            self.base_dir = direction
+        elif self.run == 0:
+            if gap >= self.cadence():
+                # 不比正常滚动节奏快的换向：有意换向
+                self.base_dir = direction
+            else:
+                self.run = delta if delta > 0 else -delta
+                self.run_gap = gap
+        elif direction != self.base_dir:
+            self.run += delta if delta > 0 else -delta
+            if self.run > self.bounds.max_threshold * WHEEL_DELTA or gap >= self.cadence():
+                # 持续反向：有意换向
+                self.base_dir = direction
+                self.run = 0
+        else:
+            # 很快回到原方向：刚才的反向段是抖动
+            if gap < self.cadence():
+                with self._lock:
+                    self.jitter_gap.add(self.run_gap)
+                    self.run_length.add(self.run / WHEEL_DELTA)
+                    if self.jitter_gap.count % DERIVE_EVERY == 0:
+                        self._derive()
+            self.run = 0
+        return decision
+
+    def cadence(self):
+        """同向滚动间隔的中位数；抖动引起的反向和返回都比它快。样本不足时使用 max_interval"""
+        return self.cadence_ns or self.bounds.max_interval_ns
+
+    def _derive(self):
+        """按估计值和范围推导并替换过滤器配置，调用时需持有 _lock"""
+        if self.pinned or self.jitter_gap.count < MIN_JITTER_SAMPLES:
+            return
+        bounds = self.bounds
+        interval = max(self.jitter_gap.value() * INTERVAL_MARGIN, self.same_gap.value())
+        interval = math.ceil(interval / INTERVAL_STEP_NS) * INTERVAL_STEP_NS
+        interval = min(max(interval, bounds.min_interval_ns), bounds.max_interval_ns)
+        threshold = math.ceil(self.run_length.value()) + 1
+        threshold = min(max(threshold, bounds.min_threshold), bounds.max_threshold)
+
+        current = self.filter.config
+        if (current.block_interval_ns != interval or current.direction_change_threshold != threshold
+                or current.enabled != self.base.enabled):
+            self.derived = FilterConfig(interval / 1e9, threshold, self.base.enabled)
+            self.filter.apply(self.derived)
+
+    def rebase(self, config, bounds=None, pinned=False):
+        """配置或前台程序变化：更新基础配置和范围
+
+        pinned 为 True（前台程序的配置档案指定了自己的 block_interval / threshold）时按 config 过滤，
+        估计照常进行，直到下一次不带 pinned 的 rebase；否则已有估计结果时立即按新范围重新推导，
+        config 只提供 enabled。
+        """
+        with self._lock:
+            self.base = config
+            self.pinned = pinned
+            if bounds is not None:
+                self.bounds = bounds
+            self.filter.apply(config)
+            self._derive()
+
+    def estimates(self):
+        """当前估计值，供设置卡片显示；时间单位为秒"""
+        derived = self.filter.config if self.jitter_gap.count >= MIN_JITTER_SAMPLES else None
+        return {
+            "same_gap_p50": self.same_gap.value() / 1e9,
+            "jitter_gap_p95": self.jitter_gap.value() / 1e9,
+            "run_length_p99": self.run_length.value(),
+            "jitter_samples": self.jitter_gap.count,
+            "interval": derived.block_interval_ns / 1e9 if derived else None,
+            "threshold": derived.direction_change_threshold if derived else None,
+        }
@@ -0,0 +1,735 @@
+import sys
+import time
+
+from PyQt5 import QtWidgets, QtCore
+
+from autostart import configure_startup
+from hook_metrics import format_ns
+from hook_supervisor import HookSupervisor
+from mouse_hook import MouseHook
+from scroll_filter import ALLOW, STATUS_DIRECTION_CHANGED, STATUS_BLOCKED
+from scroll_history import MINUTE, HOUR, DAY
+from settings_watch import SettingsWatcher
+
+# =========================
+# System Tray
+# =========================
+# 系统托盘类
+class SystemTrayIcon(QtWidgets.QSystemTrayIcon):
+    def __init__(self, main_window, parent=None):
+        super().__init__(parent)
+        self.main_window = main_window
+        
+        # 设置托盘图标
+        app = QtWidgets.QApplication.instance()
+        self.setIcon(app.style().standardIcon(QtWidgets.QStyle.SP_ComputerIcon))
+        
+        # 创建托盘菜单
+        self.create_menu()
+        
+        # 连接激活信号
+        self.activated.connect(self.on_tray_activated)
+        
+    def create_menu(self):
+        """创建托盘菜单"""
+        menu = QtWidgets.QMenu()
+        
+        show_action = menu.addAction(self.main_window.translator.tr('tray_show'))
+        show_action.triggered.connect(self.main_window.show_normal)
+        
+        menu.addSeparator()
+        
+        quit_action = menu.addAction(self.main_window.translator.tr('tray_quit'))
+        quit_action.triggered.connect(self.main_window.quit_application)
+        
+        self.setContextMenu(menu)
+        
+    def on_tray_activated(self, reason):
+        """处理托盘图标激活"""
+        if reason == QtWidgets.QSystemTrayIcon.DoubleClick:
+            self.main_window.show_normal()
+
+# =========================
+# History View
+# =========================
+class HistoryDialog(QtWidgets.QDialog):
+    """跨会话的滚动统计（见 scroll_history.py），最新的时间段在最上面"""
+
+    # 时间范围: (翻译键, 秒数)
+    RANGES = (
+        ('history_range_day', 86400),
+        ('history_range_week', 7 * 86400),
+        ('history_range_month', 30 * 86400),
+        ('history_range_year', 365 * 86400),
+    )
+    TIME_FORMATS = {MINUTE: "%m-%d %H:%M", HOUR: "%m-%d %H:00", DAY: "%Y-%m-%d"}
+
+    def __init__(self, store, translator, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.translator = translator
+        self.setWindowTitle(translator.tr('history_title'))
+        self.resize(480, 520)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.range_combo = QtWidgets.QComboBox()
+        for key, seconds in self.RANGES:
+            self.range_combo.addItem(translator.tr(key), seconds)
+        self.range_combo.currentIndexChanged.connect(self.refresh)
+        layout.addWidget(self.range_combo)
+
+        self.summary_label = QtWidgets.QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QtWidgets.QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels([translator.tr(key) for key in (
+            'history_time', 'history_allowed', 'history_blocked', 'history_changes', 'history_block_rate')])
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.refresh()
+
+    def refresh(self):
+        """按所选范围查询（只扫描一种粒度的固定数量槽位，一年的数据也能立即返回）"""
+        end = time.time()
+        resolution, rows = self.store.query(end - self.range_combo.currentData(), end)
+
+        allowed = sum(row[1] for row in rows)
+        blocked = sum(row[2] for row in rows)
+        changes = sum(row[3] for row in rows)
+        total = allowed + blocked
+        self.summary_label.setText(self.translator.tr(
+            'history_summary', allowed=allowed, blocked=blocked, changes=changes,
+            rate=f"{blocked / total:.1%}" if total else "-"))
+
+        time_format = self.TIME_FORMATS[resolution]
+        self.table.setRowCount(len(rows))
+        for index, (start, allowed, blocked, changes) in enumerate(reversed(rows)):
+            total = allowed + blocked
+            values = (time.strftime(time_format, time.localtime(start)), str(allowed), str(blocked), str(changes),
+                      f"{blocked / total:.1%}" if total else "-")
+            for column, value in enumerate(values):
+                self.table.setItem(index, column, QtWidgets.QTableWidgetItem(value))
+
+
+# 主窗口类
+class ScrollLockApp(QtWidgets.QMainWindow):
+    # 钩子线程有新事件时发出，跨线程自动排队到界面线程
+    hook_changed = QtCore.pyqtSignal()
+    # 配置文件被外部修改并重新加载后发出（来自监视线程）
+    settings_reloaded = QtCore.pyqtSignal()
+    # 钩子被重新安装后发出（看门狗线程或界面线程），参数为原因
+    hook_reinstalled = QtCore.pyqtSignal(str)
+
+    # 方向 -> (翻译键, 样式)
+    DIRECTION_DISPLAY = {
+        1: ('direction_up', "color: #107c10; font-weight: bold;"),
+        -1: ('direction_down', "color: #0078d7; font-weight: bold;"),
+        0: ('direction_none', "color: #666666;"),
+    }
+
+    def __init__(self, settings, translator):
+        super().__init__()
+        self.settings = settings
+        self.translator = translator
+        self.hook = None
+        self.supervisor = None
+        self.tray_icon = None
+        self.event_reader = None
+        self.last_event_time = None
+
+        # 控件当前显示的文本/样式，只有变化时才调用 setText / setStyleSheet
+        self._shown_text = {}
+        self._shown_style = {}
+        self._shown_generation = -1
+        
+        # 初始化UI
+        self.init_ui()
+        
+        # 状态刷新由钩子事件驱动：收到通知后最多按屏幕刷新率合并刷新一次，
+        # 窗口隐藏时不刷新，钩子也不会再发通知，空闲时没有任何定时唤醒
+        screen = QtWidgets.QApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen else 0
+        self.refresh_interval_ms = max(1, int(1000 / (refresh_rate or 60)))
+        self.status_timer = QtCore.QTimer(self)
+        self.status_timer.setSingleShot(True)
+        self.status_timer.timeout.connect(self.update_status)
+        self.hook_changed.connect(self.schedule_status_update)
+        self.hook_reinstalled.connect(self.on_hook_reinstalled)
+
+        # 监视配置文件的外部修改，新配置在监视线程中直接交给钩子，界面随后同步显示
+        self.settings_reloaded.connect(self.refresh_settings_widgets)
+        self.settings_watcher = SettingsWatcher(self.settings, self.on_settings_file_changed)
+        
+    def init_ui(self):
+        # 设置窗口标题和大小
+        self.setWindowTitle(self.translator.tr('app_title'))
+        self.resize(450, 720)
+        self.setMinimumSize(400, 650)
+        
+        # 设置窗口图标
+        app = QtWidgets.QApplication.instance()
+        self.setWindowIcon(app.style().standardIcon(QtWidgets.QStyle.SP_ComputerIcon))
+        
+        # 创建中央窗口部件
+        central_widget = QtWidgets.QWidget()
+        self.setCentralWidget(central_widget)
+        
+        # 创建主布局
+        main_layout = QtWidgets.QVBoxLayout(central_widget)
+        main_layout.setSpacing(15)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        
+        # 标题区域
+        title_layout = QtWidgets.QHBoxLayout()
+        
+        # 应用图标
+        app_icon = QtWidgets.QLabel()
+        app_icon.setPixmap(QtWidgets.QApplication.instance().style().standardIcon(
+            QtWidgets.QStyle.SP_ComputerIcon).pixmap(24, 24))
+        title_layout.addWidget(app_icon)
+        
+        # 标题文本
+        self.title_label = QtWidgets.QLabel(self.translator.tr('app_title'))
+        self.title_label.setStyleSheet("font-size: 16pt; font-weight: bold;")
+        title_layout.addWidget(self.title_label)
+        
+        # 语言选择下拉框
+        self.language_combo = QtWidgets.QComboBox()
+        self.language_combo.addItem("中文", "zh_CN")
+        self.language_combo.addItem("English", "en_US")
+        self.language_combo.setCurrentText("中文" if self.settings.get_language() == "zh_CN" else "English")
+        self.language_combo.currentIndexChanged.connect(self.change_language)
+        title_layout.addWidget(self.language_combo)
+        
+        main_layout.addLayout(title_layout)
+        
+        # 设置卡片
+        self.settings_card = QtWidgets.QGroupBox(self.translator.tr('settings'))
+        settings_layout = QtWidgets.QVBoxLayout(self.settings_card)
+        
+        # 设置表单
+        form_layout = QtWidgets.QFormLayout()
+        form_layout.setVerticalSpacing(10)
+        form_layout.setHorizontalSpacing(15)
+        
+        # 时间阈值设置
+        self.interval_label = QtWidgets.QLabel(self.translator.tr('block_interval'))
+        self.interval_spin = QtWidgets.QDoubleSpinBox()
+        self.interval_spin.setRange(0.05, 2.0)
+        self.interval_spin.setSingleStep(0.05)
+        self.interval_spin.setValue(self.settings.get_interval())
+        self.interval_spin.setSuffix(self.translator.tr('seconds'))
+        self.interval_spin.valueChanged.connect(self.update_settings)
+        form_layout.addRow(self.interval_label, self.interval_spin)
+        
+        # 方向改变阈值设置
+        self.threshold_label = QtWidgets.QLabel(self.translator.tr('direction_threshold'))
+        self.threshold_spin = QtWidgets.QSpinBox()
+        self.threshold_spin.setRange(1, 10)
+        self.threshold_spin.setValue(self.settings.get_direction_change_threshold())
+        self.threshold_spin.valueChanged.connect(self.update_settings)
+        form_layout.addRow(self.threshold_label, self.threshold_spin)
+        
+        # 启用/禁用拦截
+        self.enable_checkbox = QtWidgets.QCheckBox(self.translator.tr('enable_blocking'))
+        self.enable_checkbox.setChecked(self.settings.get_enabled())
+        self.enable_checkbox.stateChanged.connect(self.toggle_interception)
+        form_layout.addRow("", self.enable_checkbox)
+
+        # 自适应模式：开启后上面两个值作为初始值，由钩子根据滚动习惯自动调整
+        self.adaptive_checkbox = QtWidgets.QCheckBox(self.translator.tr('adaptive'))
+        self.adaptive_checkbox.setChecked(self.settings.get_adaptive())
+        self.adaptive_checkbox.stateChanged.connect(self.toggle_adaptive)
+        form_layout.addRow("", self.adaptive_checkbox)
+        self.adaptive_label = QtWidgets.QLabel(self.translator.tr('adaptive_estimates'))
+        self.adaptive_value_label = QtWidgets.QLabel("-")
+        form_layout.addRow(self.adaptive_label, self.adaptive_value_label)
+        
+        # 开机启动设置
+        self.startup_checkbox = QtWidgets.QCheckBox(self.translator.tr('startup'))
+        self.startup_checkbox.setChecked(self.settings.get_startup())
+        self.startup_checkbox.stateChanged.connect(self.toggle_startup)
+        form_layout.addRow("", self.startup_checkbox)
+        
+        settings_layout.addLayout(form_layout)
+        main_layout.addWidget(self.settings_card)
+        
+        # 状态卡片
+        self.status_card = QtWidgets.QGroupBox(self.translator.tr('status'))
+        status_layout = QtWidgets.QVBoxLayout(self.status_card)
+        
+        # 状态网格布局
+        status_grid = QtWidgets.QGridLayout()
+        status_grid.setVerticalSpacing(10)
+        status_grid.setHorizontalSpacing(15)
+        
+        # 总事件数
+        self.total_label = QtWidgets.QLabel(self.translator.tr('total_events'))
+        self.total_events_label = QtWidgets.QLabel("0")
+        status_grid.addWidget(self.total_label, 0, 0)
+        status_grid.addWidget(self.total_events_label, 0, 1)
+        
+        # 拦截事件数
+        self.blocked_label = QtWidgets.QLabel(self.translator.tr('blocked_events'))
+        self.blocked_events_label = QtWidgets.QLabel("0")
+        status_grid.addWidget(self.blocked_label, 0, 2)
+        status_grid.addWidget(self.blocked_events_label, 0, 3)
+        
+        # 当前方向
+        self.direction_label = QtWidgets.QLabel(self.translator.tr('current_direction'))
+        self.direction_value_label = QtWidgets.QLabel(self.translator.tr('direction_none'))
+        self.direction_value_label.setAlignment(QtCore.Qt.AlignCenter)
+        status_grid.addWidget(self.direction_label, 1, 0)
+        status_grid.addWidget(self.direction_value_label, 1, 1)
+        
+        # 状态信息
+        self.status_info_label = QtWidgets.QLabel(self.translator.tr('status_label'))
+        self.status_value_label = QtWidgets.QLabel("正在初始化...")
+        self.status_value_label.setAlignment(QtCore.Qt.AlignCenter)
+        status_grid.addWidget(self.status_info_label, 1, 2)
+        status_grid.addWidget(self.status_value_label, 1, 3)
+        
+        # 回调延迟
+        self.latency_label = QtWidgets.QLabel(self.translator.tr('hook_latency'))
+        self.latency_value_label = QtWidgets.QLabel("-")
+        status_grid.addWidget(self.latency_label, 2, 0)
+        status_grid.addWidget(self.latency_value_label, 2, 1, 1, 3)
+
+        # 超出预算次数
+        self.over_budget_label = QtWidgets.QLabel(self.translator.tr('over_budget'))
+        self.over_budget_value_label = QtWidgets.QLabel("0")
+        status_grid.addWidget(self.over_budget_label, 3, 0)
+        status_grid.addWidget(self.over_budget_value_label, 3, 1)
+
+        # 重置延迟统计
+        self.reset_latency_button = QtWidgets.QPushButton(self.translator.tr('reset_latency'))
+        self.reset_latency_button.clicked.connect(self.reset_latency)
+        status_grid.addWidget(self.reset_latency_button, 3, 2, 1, 2)
+
+        status_layout.addLayout(status_grid)
+
+        # 最近事件
+        self.recent_events_label = QtWidgets.QLabel(self.translator.tr('recent_events'))
+        status_layout.addWidget(self.recent_events_label)
+        self.recent_events_view = QtWidgets.QPlainTextEdit()
+        self.recent_events_view.setReadOnly(True)
+        self.recent_events_view.setMaximumBlockCount(200)
+        self.recent_events_view.setFixedHeight(100)
+        self.recent_events_view.setStyleSheet("font-family: Consolas, monospace; font-size: 9pt;")
+        status_layout.addWidget(self.recent_events_view)
+        main_layout.addWidget(self.status_card)
+        
+        # 说明卡片
+        self.info_card = QtWidgets.QGroupBox(self.translator.tr('how_it_works'))
+        info_layout = QtWidgets.QVBoxLayout(self.info_card)
+        
+        # 说明文本
+        self.info_text = QtWidgets.QLabel(self.translator.tr('how_it_works_text'))
+        self.info_text.setWordWrap(True)
+        info_layout.addWidget(self.info_text)
+        
+        main_layout.addWidget(self.info_card)
+        
+        # 底部按钮
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.setSpacing(10)
+        
+        self.restart_button = QtWidgets.QPushButton(self.translator.tr('restart_hook'))
+        self.restart_button.clicked.connect(self.restart_hook)
+        button_layout.addWidget(self.restart_button)
+
+        self.history_button = QtWidgets.QPushButton(self.translator.tr('history'))
+        self.history_button.clicked.connect(self.show_history)
+        button_layout.addWidget(self.history_button)
+        
+        self.minimize_button = QtWidgets.QPushButton(self.translator.tr('minimize_to_tray'))
+        self.minimize_button.clicked.connect(self.hide_to_tray)
+        button_layout.addWidget(self.minimize_button)
+        
+        button_layout.addStretch()
+        
+        self.quit_button = QtWidgets.QPushButton(self.translator.tr('quit'))
+        self.quit_button.clicked.connect(self.quit_application)
+        button_layout.addWidget(self.quit_button)
+        
+        main_layout.addLayout(button_layout)
+        
+    def set_tray_icon(self, tray_icon):
+        """设置托盘图标引用"""
+        self.tray_icon = tray_icon
+        
+    def change_language(self):
+        """切换语言"""
+        lang = self.language_combo.currentData()
+        self.translator.set_language(lang)
+        self.settings.set_language(lang)
+        self.settings.save_later()
+        self.update_ui_text()
+        
+    def update_ui_text(self):
+        """更新UI文本"""
+        # 更新窗口标题
+        self.setWindowTitle(self.translator.tr('app_title'))
+        
+        # 更新标题
+        self.title_label.setText(self.translator.tr('app_title'))
+        
+        # 更新设置卡片
+        self.settings_card.setTitle(self.translator.tr('settings'))
+        self.interval_label.setText(self.translator.tr('block_interval'))
+        self.interval_spin.setSuffix(self.translator.tr('seconds'))
+        self.threshold_label.setText(self.translator.tr('direction_threshold'))
+        self.enable_checkbox.setText(self.translator.tr('enable_blocking'))
+        self.adaptive_checkbox.setText(self.translator.tr('adaptive'))
+        self.adaptive_label.setText(self.translator.tr('adaptive_estimates'))
+        self.startup_checkbox.setText(self.translator.tr('startup'))
+        
+        # 更新状态卡片
+        self.status_card.setTitle(self.translator.tr('status'))
+        self.total_label.setText(self.translator.tr('total_events'))
+        self.blocked_label.setText(self.translator.tr('blocked_events'))
+        self.direction_label.setText(self.translator.tr('current_direction'))
+        self.status_info_label.setText(self.translator.tr('status_label'))
+        self.latency_label.setText(self.translator.tr('hook_latency'))
+        self.over_budget_label.setText(self.translator.tr('over_budget'))
+        self.reset_latency_button.setText(self.translator.tr('reset_latency'))
+        self.recent_events_label.setText(self.translator.tr('recent_events'))
+        
+        # 更新说明卡片
+        self.info_card.setTitle(self.translator.tr('how_it_works'))
+        self.info_text.setText(self.translator.tr('how_it_works_text'))
+        
+        # 更新按钮
+        self.restart_button.setText(self.translator.tr('restart_hook'))
+        self.history_button.setText(self.translator.tr('history'))
+        self.minimize_button.setText(self.translator.tr('minimize_to_tray'))
+        self.quit_button.setText(self.translator.tr('quit'))
+        
+        # 更新托盘菜单
+        if self.tray_icon:
+            self.tray_icon.create_menu()
+            
+        # 用新语言重新显示状态
+        self._shown_generation = -1
+        self.update_status()
+
+    def set_label(self, label, text, style=None):
+        """只在内容变化时更新控件，避免无谓的重绘和样式重新计算"""
+        if self._shown_text.get(label) != text:
+            label.setText(text)
+            self._shown_text[label] = text
+        if style is not None and self._shown_style.get(label) != style:
+            label.setStyleSheet(style)
+            self._shown_style[label] = style
+
+    def show_direction(self, direction):
+        """更新方向显示"""
+        key, style = self.DIRECTION_DISPLAY.get(direction, self.DIRECTION_DISPLAY[0])
+        self.set_label(self.direction_value_label, self.translator.tr(key), style)
+        
+    def start_hook(self):
+        """启动鼠标钩子线程（已经启动时卸载后重新安装，钩子链中始终只有一个钩子）"""
+        if self.supervisor is not None:
+            self.restart_hook()
+            return
+        try:
+            supervisor = HookSupervisor(MouseHook(self.settings, self.translator))
+            supervisor.start()
+            print("钩子线程已启动")
+            self.attach_hook(supervisor)
+            
+        except Exception as e:
+            print(f"启动钩子线程失败: {e}")
+            self.set_label(self.status_value_label, self.translator.tr('hook_failed'))
+
+    def attach_hook(self, supervisor):
+        """显示一个已经启动的钩子的状态（--headless 之外的启动流程先装钩子再建窗口）"""
+        hook = supervisor.hook
+        self.supervisor = supervisor
+        self.hook = hook
+        supervisor.on_restart = self.hook_reinstalled.emit
+        self.event_reader = hook.ring.reader(from_start=True)
+        self.last_event_time = None
+        self._shown_generation = -1
+        self.recent_events_view.clear()
+        hook.on_change = self.hook_changed.emit
+        # 窗口创建前发生的事件可能已经置位 change_pending，清除后补一次刷新
+        hook.change_pending = False
+
+        # 重置状态显示
+        self.set_label(self.total_events_label, "0")
+        self.set_label(self.blocked_events_label, "0")
+        self.show_direction(0)
+        self.set_label(self.status_value_label,
+                       self.translator.tr('hook_started' if hook.install_ok else 'hook_failed'))
+        self.update_status()
+        
+    def restart_hook(self):
+        """重启钩子：投递 WM_QUIT、卸载、等待线程退出后重新安装"""
+        if self.supervisor is None:
+            self.start_hook()
+            return
+        print("重启鼠标钩子...")
+        self.set_label(self.status_value_label, self.translator.tr('hook_restarting'))
+        self.hook.reload_settings()
+        if not self.supervisor.restart():
+            self.set_label(self.status_value_label, self.translator.tr('hook_failed'))
+
+    def on_hook_reinstalled(self, reason):
+        """钩子被重新安装（手动或看门狗）"""
+        ok = self.hook.install_ok
+        self.set_label(self.status_value_label, self.translator.tr('hook_restarted' if ok else 'hook_failed'))
+        
+    def update_settings(self):
+        """更新防抖设置"""
+        self.settings.set_interval(self.interval_spin.value())
+        self.settings.set_direction_change_threshold(self.threshold_spin.value())
+        self.settings.set_enabled(self.enable_checkbox.isChecked())
+        self.settings.save_later()
+        
+        # 应用设置
+        if self.hook:
+            self.hook.reload_settings()
+            
+    def toggle_startup(self, state):
+        """切换开机启动状态"""
+        enabled = state == QtCore.Qt.Checked
+        self.settings.set_startup(enabled)
+        self.settings.save_later()
+        configure_startup(enabled)
+        
+    def toggle_interception(self, state):
+        """切换拦截状态"""
+        enabled = state == QtCore.Qt.Checked
+        self.settings.set_enabled(enabled)
+        self.settings.save_later()
+        if self.hook:
+            self.hook.reload_settings()
+    
+    def toggle_adaptive(self, state):
+        """切换自适应模式"""
+        self.settings.set_adaptive(state == QtCore.Qt.Checked)
+        self.settings.save_later()
+        if self.hook:
+            self.hook.reload_settings()
+        self._shown_generation = -1
+        self.update_status()
+
+    def on_settings_file_changed(self, snapshot):
+        """监视线程：配置文件被外部修改"""
+        hook = self.hook
+        if hook:
+            hook.reload_settings(snapshot)
+        self.settings_reloaded.emit()
+
+    def refresh_settings_widgets(self):
+        """把重新加载的配置同步到设置控件，不触发保存"""
+        snapshot = self.settings.snapshot()
+        widgets = (self.interval_spin, self.threshold_spin, self.enable_checkbox, self.adaptive_checkbox,
+                   self.startup_checkbox)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.interval_spin.setValue(snapshot.filter.block_interval_ns / 1e9)
+        self.threshold_spin.setValue(snapshot.filter.direction_change_threshold)
+        self.enable_checkbox.setChecked(snapshot.filter.enabled)
+        self.adaptive_checkbox.setChecked(snapshot.adaptive is not None)
+        self.startup_checkbox.setChecked(self.settings.get_startup())
+        for widget in widgets:
+            widget.blockSignals(False)
+
+    def schedule_status_update(self):
+        """收到钩子通知 - 合并到下一个显示帧刷新，窗口隐藏时不刷新"""
+        if self.isVisible() and not self.status_timer.isActive():
+            self.status_timer.start(self.refresh_interval_ms)
+
+    def update_status(self):
+        """更新状态显示 - 只在钩子有新事件时执行，且只更新变化的控件"""
+        if not self.hook:
+            return
+
+        # 先重新允许钩子通知再读取，读取期间到达的事件会触发下一次刷新
+        self.hook.change_pending = False
+        generation = self.hook.generation
+        if generation == self._shown_generation:
+            return
+        self._shown_generation = generation
+
+        status = self.hook.get_status()
+        self.set_label(self.total_events_label, str(status["total_events"]))
+        self.set_label(self.blocked_events_label, str(status["blocked_events"]))
+        
+        # 更新方向显示
+        self.show_direction(status["current_direction"])
+            
+        self.set_label(self.status_value_label, self.translator.format_status(
+            status["status"], status["status_arg"], status["threshold"]))
+
+        # 更新回调延迟
+        latency = status["latency"]
+        if latency["count"]:
+            self.set_label(self.latency_value_label, self.translator.tr(
+                'latency_value',
+                p50=format_ns(latency["p50"]),
+                p99=format_ns(latency["p99"]),
+                p999=format_ns(latency["p999"]),
+                max=format_ns(latency["max"])))
+        else:
+            self.set_label(self.latency_value_label, "-")
+        self.set_label(self.over_budget_value_label, self.translator.tr(
+            'over_budget_value',
+            count=latency["over_budget"],
+            budget=format_ns(latency["budget"])))
+
+        # 自适应模式的当前估计
+        adaptive = status["adaptive"]
+        if adaptive is None:
+            self.set_label(self.adaptive_value_label, "-")
+        elif adaptive["interval"] is None:
+            self.set_label(self.adaptive_value_label, self.translator.tr(
+                'adaptive_learning', samples=adaptive["jitter_samples"]))
+        else:
+            self.set_label(self.adaptive_value_label, self.translator.tr(
+                'adaptive_value',
+                interval=f"{adaptive['interval']:.2f}",
+                threshold=adaptive["threshold"],
+                jitter=format_ns(int(adaptive["jitter_gap_p95"] * 1e9))))
+
+        # 追加最近事件
+        if self.event_reader:
+            self.append_recent_events()
+
+    def append_recent_events(self):
+        """从环形缓冲区读取新事件并追加到最近事件列表"""
+        reader = self.event_reader
+        lines = []
+        n = reader.drain()
+        while n:
+            for i in range(n):
+                timestamp = reader.timestamps[i]
+                delta = reader.deltas[i]
+                if self.last_event_time is None:
+                    gap = "       -"
+                else:
+                    gap = f"{(timestamp - self.last_event_time) / 1_000_000:+8.1f}ms"
+                self.last_event_time = timestamp
+                decision = self.translator.tr('event_allowed' if reader.decisions[i] == ALLOW else 'event_blocked')
+                code = reader.reasons[i]
+                if code == STATUS_BLOCKED:
+                    reason = self.translator.tr('reason_blocked')
+                elif code == STATUS_DIRECTION_CHANGED:
+                    reason = self.translator.tr('reason_direction_changed')
+                else:
+                    reason = self.translator.format_status(code)
+                lines.append(f"{gap}  {delta:+5d}  {decision}  {reason}")
+            n = reader.drain()
+        if lines:
+            self.recent_events_view.appendPlainText("\n".join(lines[-200:]))
+
+    def reset_latency(self):
+        """重置回调延迟统计"""
+        if self.hook:
+            self.hook.latency.reset()
+        self.set_label(self.latency_value_label, "-")
+        self.set_label(self.over_budget_value_label, "0")
+        
+    def show_history(self):
+        """显示滚动统计历史"""
+        store = self.hook.history if self.hook else None
+        if store is None:
+            QtWidgets.QMessageBox.information(
+                self, self.translator.tr('history_title'), self.translator.tr('history_unavailable'))
+            return
+        HistoryDialog(store, self.translator, self).exec_()
+
+    def hide_to_tray(self):
+        """隐藏到系统托盘"""
+        self.hide()
+        if self.tray_icon:
+            self.tray_icon.showMessage(
+                self.translator.tr('tray_message_title'), 
+                self.translator.tr('tray_message_content'),
+                QtWidgets.QSystemTrayIcon.Information, 
+                2000
+            )
+        
+    def show_normal(self):
+        """从托盘恢复显示"""
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        
+    def quit_application(self):
+        """退出应用程序"""
+        # 保存尚未写入的设置
+        self.settings_watcher.stop()
+        self.settings.flush()
+
+        # 卸载钩子并等待钩子线程退出
+        if self.supervisor is not None:
+            self.supervisor.stop()
+        
+        # 停止状态更新定时器
+        if self.status_timer and self.status_timer.isActive():
+            self.status_timer.stop()
+        
+        # 退出应用
+        QtWidgets.QApplication.quit()
+        
+    def showEvent(self, event):
+        """窗口显示时补上隐藏期间的状态变化"""
+        super().showEvent(event)
+        self.update_status()
+
+    def hideEvent(self, event):
+        """窗口隐藏时暂停状态刷新"""
+        super().hideEvent(event)
+        self.status_timer.stop()
+
+    def closeEvent(self, event):
+        """处理关闭事件 - 改为最小化到托盘"""
+        event.ignore()  # 忽略关闭事件
+        self.hide_to_tray()
+
+
+# =========
+#  run()
+# =========
+def run(settings, translator, supervisor=None):
+    """创建 Qt 应用、托盘和主窗口并进入事件循环；supervisor 管理已经启动的钩子（可选）"""
+    # 启用高DPI缩放
+    if hasattr(QtCore.Qt, 'AA_EnableHighDpiScaling'):
+        QtWidgets.QApplication.setAttribute(QtCore.Qt.AA_EnableHighDpiScaling, True)
+    if hasattr(QtCore.Qt, 'AA_UseHighDpiPixmaps'):
+        QtWidgets.QApplication.setAttribute(QtCore.Qt.AA_UseHighDpiPixmaps, True)
+    
+    app = QtWidgets.QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)  # 重要：确保关闭窗口不会退出应用
+    
+    # 设置应用程序属性
+    app.setApplicationName("鼠标滚轮防抖工具")
+    app.setApplicationVersion("1.0")
+    
+    # 创建主窗口
+    main_window = ScrollLockApp(settings, translator)
+    
+    # 创建系统托盘图标
+    tray_icon = SystemTrayIcon(main_window)
+    tray_icon.show()
+    
+    # 设置主窗口的托盘图标引用
+    main_window.set_tray_icon(tray_icon)
+    
+    # 显示主窗口
+    main_window.show()
+    
+    # 显示已经启动的钩子，或者现在启动
+    if supervisor is not None:
+        main_window.attach_hook(supervisor)
+    else:
+        main_window.start_hook()
+    
+    # 运行应用程序
+    return app.exec_()
@@ -0,0 +1,475 @@
+# =========================
+# Benchmarks
+# =========================
+# 滚轮过滤器和钩子热路径的性能基准，只依赖标准库，可以在 Linux 上运行。
+#
+# 用法:
+#   python scroll_bench.py                    运行全部用例并与基线比较，超过阈值的退化返回非 0
+#   python scroll_bench.py --save-baseline    运行并把结果保存为新的基线
+#   python scroll_bench.py -k filter          只运行名称包含 filter 的用例
+#
+# 结果以 ns/事件 和 事件/秒 表示，并给出占钩子耗时预算（默认 1ms）的比例，
+# 便于和 LowLevelHooksTimeout 对照。基线是本机的绝对耗时，只保存在本地（bench_baseline.json 不纳入版本库），
+# 在修改前的代码上先 --save-baseline 一次，修改后再运行比较。
+
+import argparse
+import ctypes
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from event_ring import EventRing
+from hook_path import HookState, make_hook_proc as make_hook_proc_for
+from hook_struct import MSLLHOOKSTRUCT, WM_MOUSEWHEEL
+from scroll_adaptive import AdaptiveTuner
+from scroll_clock import EventTickClock
+from scroll_coalesce import FakeInjector, WheelCoalescer
+from scroll_filter import ScrollFilter
+from scroll_pipeline import Pipeline
+from settings import Settings
+from translator import Translator
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MouseScrollStabilizer.py")
+
+WHEEL_DELTA = 120
+
+BENCHMARKS = {}
+
+
+def benchmark(name, events):
+    """注册一个基准用例：被装饰的函数做准备工作，返回处理 events 个事件的无参函数"""
+    def register(setup):
+        BENCHMARKS[name] = (setup, events)
+        return setup
+    return register
+
+
+# =========================
+# Event Streams
+# =========================
+# 每个函数返回 (deltas, ticks)，ticks 为毫秒计数（与 MSLLHOOKSTRUCT.time 相同）
+
+def stream_steady(n, rnd):
+    """匀速同向滚动，每格间隔 20~60ms，偶尔停顿"""
+    deltas, ticks = [], []
+    tick = 0
+    direction = 1
+    for _ in range(n):
+        if rnd.random() < 0.01:
+            tick += rnd.randrange(800, 3000)
+            direction = -direction
+        else:
+            tick += rnd.randrange(20, 60)
+        deltas.append(direction * WHEEL_DELTA)
+        ticks.append(tick)
+    return deltas, ticks
+
+
+def stream_jitter(n, rnd):
+    """同向滚动中夹杂编码器抖动：约 15% 的事件是短间隔的反向单格"""
+    deltas, ticks = [], []
+    tick = 0
+    direction = 1
+    for _ in range(n):
+        if rnd.random() < 0.15:
+            tick += rnd.randrange(2, 15)
+            deltas.append(-direction * WHEEL_DELTA)
+        else:
+            tick += rnd.randrange(20, 60)
+            deltas.append(direction * WHEEL_DELTA)
+        ticks.append(tick)
+        if rnd.random() < 0.005:
+            tick += rnd.randrange(800, 3000)
+            direction = -direction
+    return deltas, ticks
+
+
+def stream_reversals(n, rnd):
+    """频繁的有意换向：每 3~10 格换一次方向，换向后连续滚动"""
+    deltas, ticks = [], []
+    tick = 0
+    direction = 1
+    remaining = rnd.randrange(3, 10)
+    for _ in range(n):
+        remaining -= 1
+        if remaining == 0:
+            direction = -direction
+            remaining = rnd.randrange(3, 10)
+        tick += rnd.randrange(15, 80)
+        deltas.append(direction * WHEEL_DELTA)
+        ticks.append(tick)
+    return deltas, ticks
+
+
+def stream_hires(n, rnd):
+    """高精度滚轮：每个事件只有 1/8~1/4 格，事件率约为普通滚轮的 8 倍，带少量抖动"""
+    deltas, ticks = [], []
+    tick = 0
+    direction = 1
+    for _ in range(n):
+        tick += rnd.randrange(2, 8)
+        step = rnd.randrange(WHEEL_DELTA // 8, WHEEL_DELTA // 4)
+        deltas.append(-direction * step if rnd.random() < 0.05 else direction * step)
+        ticks.append(tick)
+        if rnd.random() < 0.002:
+            tick += rnd.randrange(800, 3000)
+            direction = -direction
+    return deltas, ticks
+
+
+STREAMS = {
+    "steady": stream_steady,
+    "jitter": stream_jitter,
+    "reversals": stream_reversals,
+    "hires": stream_hires,
+}
+
+
+def make_stream(kind, n, seed=12345):
+    deltas, ticks = STREAMS[kind](n, random.Random(seed))
+    timestamps = [tick * 1_000_000 for tick in ticks]
+    return deltas, ticks, timestamps
+
+
+# =========================
+# Cases
+# =========================
+def _filter_case(kind):
+    def setup(n):
+        deltas, _, timestamps = make_stream(kind, n)
+        feed = ScrollFilter(0.5, 3).feed
+
+        def run():
+            for delta, timestamp in zip(deltas, timestamps):
+                feed(delta, timestamp)
+        return run
+    return setup
+
+
+for _kind in STREAMS:
+    benchmark(f"filter_{_kind}", 200_000)(_filter_case(_kind))
+
+
+def _pipeline_case(adaptive):
+    def setup(n):
+        deltas, _, timestamps = make_stream("jitter", n)
+        scroll_filter = ScrollFilter(0.5, 3)
+        stages = (AdaptiveTuner(scroll_filter),) if adaptive else ()
+        process = Pipeline(scroll_filter, EventRing(4096), stages).process
+
+        def run():
+            for delta, timestamp in zip(deltas, timestamps):
+                process(delta, timestamp)
+        return run
+    return setup
+
+
+# 同一事件流分别不带和带 AdaptiveTuner 经过决策阶段（过滤、写环形缓冲区），两者之差即自适应估计的开销
+benchmark("pipeline_jitter", 200_000)(_pipeline_case(False))
+benchmark("filter_adaptive", 200_000)(_pipeline_case(True))
+
+
+def make_hook_structs(deltas, ticks):
+    """把事件流写成 MSLLHOOKSTRUCT 数组，返回 (数组, 每个元素的地址)，地址即钩子收到的 lParam"""
+    structs = (MSLLHOOKSTRUCT * len(deltas))()
+    for ms, delta, tick in zip(structs, deltas, ticks):
+        ms.mouseData = (delta & 0xFFFF) << 16
+        ms.time = tick
+    base = ctypes.addressof(structs)
+    size = ctypes.sizeof(MSLLHOOKSTRUCT)
+    return structs, [base + i * size for i in range(len(deltas))]
+
+
+def call_next_hook(hook_id, nCode, wParam, lParam):
+    """代替 CallNextHookEx"""
+    return 0
+
+
+def make_hook_proc(stages=()):
+    """用 hook_path.make_hook_proc 生成与 MouseHook 相同的回调（CallNextHookEx 换成空函数）"""
+    pipeline = Pipeline(ScrollFilter(0.5, 3), EventRing(4096), stages)
+    hook = HookState(pipeline, EventTickClock())
+    return make_hook_proc_for(hook, call_next_hook)
+
+
+@benchmark("hook_path", 200_000)
+def bench_hook_path(n):
+    """钩子回调中的完整 Python 工作：解码 lParam、时间戳、过滤、写环形缓冲区、记录耗时"""
+    deltas, ticks, _ = make_stream("jitter", n)
+    structs, lparams = make_hook_structs(deltas, ticks)
+    hook_proc = make_hook_proc()
+
+    def run():
+        for lParam in lparams:
+            hook_proc(0, WM_MOUSEWHEEL, lParam)
+    run.structs = structs  # 保持数组存活
+    return run
+
+
+@benchmark("coalesce_take", 200_000)
+def bench_coalesce_take(n):
+    """合并阶段在钩子线程中的工作（WheelCoalescer.take，不启动注入线程）"""
+    deltas, _, _ = make_stream("hires", n)
+    take = WheelCoalescer(FakeInjector(), 4.0).take
+
+    def run():
+        for delta in deltas:
+            take(delta)
+    return run
+
+
+def bench_evdev_path(n):
+    """Linux 后端：一帧（REL_WHEEL_HI_RES + REL_WHEEL + SYN_REPORT）从读缓冲区到写出的全部 Python 工作"""
+    from evdev_backend import (EvdevScrollFilter, FakeEventSink, FakeEventSource, pack_events,
+                               EV_REL, EV_SYN, REL_WHEEL, REL_WHEEL_HI_RES, SYN_REPORT)
+    deltas, _, timestamps = make_stream("jitter", n)
+    events = []
+    for delta, timestamp in zip(deltas, timestamps):
+        events += [(timestamp, EV_REL, REL_WHEEL_HI_RES, delta),
+                   (timestamp, EV_REL, REL_WHEEL, delta // 120),
+                   (timestamp, EV_SYN, SYN_REPORT, 0)]
+    data = pack_events(events)
+    sink = FakeEventSink()
+    sink.write = len
+    backend = EvdevScrollFilter(FakeEventSource(), sink)
+    batch = backend.batch_bytes
+    buffer = backend.in_buffer
+
+    def run():
+        for start in range(0, len(data), batch):
+            chunk = data[start:start + batch]
+            pending = backend.pending
+            buffer[pending:pending + len(chunk)] = chunk
+            backend.process(pending + len(chunk))
+    return run
+
+
+if sys.platform.startswith("linux"):
+    benchmark("evdev_path", 200_000)(bench_evdev_path)
+
+
+@benchmark("status_format", 100_000)
+def bench_status_format(n):
+    """界面线程把状态码格式化为文字"""
+    deltas, _, timestamps = make_stream("jitter", n)
+    scroll_filter = ScrollFilter(0.5, 3)
+    statuses = []
+    for delta, timestamp in zip(deltas, timestamps):
+        scroll_filter.feed(delta, timestamp)
+        statuses.append((scroll_filter.status, scroll_filter.status_arg))
+    translator = Translator()
+    format_status = translator.format_status
+
+    def run():
+        for status, arg in statuses:
+            format_status(status, arg, 3)
+    return run
+
+
+@benchmark("translator_tr", 100_000)
+def bench_translator_tr(n):
+    """Translator.tr，带参数格式化"""
+    translator = Translator()
+    tr = translator.tr
+
+    def run():
+        for i in range(n):
+            tr('status_blocked', current=i & 3, threshold=3)
+    return run
+
+
+@benchmark("settings_reload", 20_000)
+def bench_settings_reload(n):
+    """修改一项配置后重新生成快照（MouseHook.reload_settings 的界面线程部分）"""
+    directory = tempfile.TemporaryDirectory(prefix="scroll_bench_")
+    settings = Settings(os.path.join(directory.name, "Settings.ini"))
+
+    def run():
+        # 运行结束后停止写入线程并删除临时目录
+        with directory:
+            for i in range(n):
+                settings.set_interval(0.25 if i & 1 else 0.5)
+                settings.snapshot()
+            settings.flush()
+    return run
+
+
+# =========================
+# Runner
+# =========================
+def measure(setup, events, repeats):
+    """运行 repeats 次，返回最快一次的 ns/事件"""
+    best = None
+    for _ in range(repeats):
+        run = setup(events)
+        started = time.perf_counter_ns()
+        run()
+        elapsed = time.perf_counter_ns() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / events
+
+
+# 允许的净分配：状态字段中的 int 在小整数缓存内外切换、被替换为位数更多的新对象时，
+# 会多出或少掉几个对象；每个事件都留下对象时远远超过这个数
+ALLOCATION_SLACK_BLOCKS = 16
+ALLOCATION_SLACK = 1024
+# 允许的峰值：一次回调中同时存活的临时对象
+ALLOCATION_PEAK = 4096
+
+
+def check_allocations(events=100_000, warmup=10_000, stages=()):
+    """稳态下钩子回调的内存分配（tracemalloc），返回 (净字节数, 净分配块数, 峰值字节数)
+
+    CPython 中超过小整数缓存的 int、from_address 返回的结构体都会临时分配，但在回调返回前释放，
+    因此净分配只有状态字段里的几个 int，峰值只有几个对象的大小而与事件数无关；
+    有净分配说明回调留下了存活对象（ctypes 对象、缓存项、不断变长的列表等），见 allocations_ok。
+    stages 为附加的决策阶段（见 scroll_pipeline.Pipeline）。
+    """
+    deltas, ticks, _ = make_stream("jitter", warmup + events)
+    structs, lparams = make_hook_structs(deltas, ticks)
+    hook_proc = make_hook_proc(stages)
+    # 前一半检查净分配，后一半检查峰值（读取峰值本身的分配不落在两个快照之间）
+    middle = warmup + events // 2
+    warmup_lparams, first_half, second_half = lparams[:warmup], lparams[warmup:middle], lparams[middle:]
+
+    tracemalloc.start()
+    try:
+        # 预热放在跟踪开始之后：计数器等状态字段中的 int 会被替换为新对象，
+        # 这样前后两个快照里它们都是被跟踪的，替换本身不计为净分配
+        for lParam in warmup_lparams:
+            hook_proc(0, WM_MOUSEWHEEL, lParam)
+        before = tracemalloc.take_snapshot()
+        for lParam in first_half:
+            hook_proc(0, WM_MOUSEWHEEL, lParam)
+        after = tracemalloc.take_snapshot()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for lParam in second_half:
+            hook_proc(0, WM_MOUSEWHEEL, lParam)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # 快照本身不计入
+    stats = [s for s in after.compare_to(before, 'filename')
+             if s.traceback[0].filename != tracemalloc.__file__]
+    del structs
+    return sum(s.size_diff for s in stats), sum(s.count_diff for s in stats), peak - current
+
+
+def allocations_ok(size, count, peak):
+    return count <= ALLOCATION_SLACK_BLOCKS and size <= ALLOCATION_SLACK and peak <= ALLOCATION_PEAK
+
+
+def measure_startup(runs=5):
+    """启动 MouseScrollStabilizer.py --startup-report runs 次，返回各项耗时的中位数（毫秒）
+
+    import_ms / hook_ms 从解释器开始执行脚本算起，process_ms 从创建进程算起（包含解释器启动）。
+    """
+    samples = {"import_ms": [], "hook_ms": [], "process_ms": []}
+    installed = True
+    # 使用临时配置文件，不创建或改写仓库中的 config/Settings.ini
+    with tempfile.TemporaryDirectory(prefix="scroll_bench_") as tmp:
+        config_path = os.path.join(tmp, "Settings.ini")
+        for _ in range(runs):
+            started = time.perf_counter()
+            proc = subprocess.run([sys.executable, MAIN_SCRIPT, "--startup-report", "--config", config_path],
+                                  capture_output=True, text=True, cwd=os.path.dirname(MAIN_SCRIPT))
+            elapsed = (time.perf_counter() - started) * 1000
+            try:
+                report = json.loads(proc.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                raise RuntimeError(f"启动失败: {proc.stderr.strip()}")
+            samples["import_ms"].append(report["import_ms"])
+            samples["hook_ms"].append(report["hook_ms"])
+            samples["process_ms"].append(elapsed)
+            installed = installed and report["hook_installed"]
+    result = {name: statistics.median(values) for name, values in samples.items()}
+    result["hook_installed"] = installed
+    return result
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="滚轮过滤器性能基准")
+    parser.add_argument("-k", dest="pattern", default="", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeats", type=int, default=5, help="每个用例运行次数（取最快一次）")
+    parser.add_argument("--scale", type=float, default=1.0, help="事件数缩放倍数")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允许的退化比例，默认 0.25")
+    parser.add_argument("--budget-us", type=float, default=1000.0, help="钩子耗时预算（微秒）")
+    parser.add_argument("--startup", action="store_true",
+                        help="只测量启动耗时：导入时间和从启动到钩子安装完成的时间")
+    parser.add_argument("--check-allocations", action="store_true",
+                        help="只检查钩子回调在稳态下没有净内存分配，有分配时返回非 0")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        result = measure_startup(args.repeats)
+        print(f"导入耗时:       {result['import_ms']:8.1f} ms")
+        print(f"钩子安装完成:   {result['hook_ms']:8.1f} ms" +
+              ("" if result["hook_installed"] else "（本机无法安装钩子，只包含设置加载）"))
+        print(f"进程总耗时:     {result['process_ms']:8.1f} ms（含解释器启动和退出）")
+        return 0
+
+    if args.check_allocations:
+        size, count, peak = check_allocations()
+        print(f"钩子回调净分配: {size} 字节, {count} 块（峰值 {peak} 字节）")
+        return 0 if allocations_ok(size, count, peak) else 1
+
+    baseline = load_baseline(args.baseline)
+    if not baseline and not args.save_baseline:
+        print(f"没有本机基线（{args.baseline}），只显示结果；先用 --save-baseline 保存一次")
+    budget_ns = args.budget_us * 1000
+    results = {}
+    regressions = []
+
+    print(f"{'benchmark':<20}{'ns/event':>12}{'events/s':>14}{'budget':>10}{'baseline':>12}{'change':>10}")
+    for name, (setup, events) in BENCHMARKS.items():
+        if args.pattern not in name:
+            continue
+        ns = measure(setup, max(1, int(events * args.scale)), args.repeats)
+        results[name] = round(ns, 1)
+
+        line = f"{name:<20}{ns:>12.1f}{1e9 / ns:>14,.0f}{ns / budget_ns:>10.3%}"
+        base = baseline.get(name)
+        if base:
+            change = ns / base - 1
+            line += f"{base:>12.1f}{change:>+10.1%}"
+            if change > args.threshold:
+                regressions.append((name, change))
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"基线已保存: {args.baseline}")
+        return 0
+
+    if regressions:
+        for name, change in regressions:
+            print(f"性能退化: {name} {change:+.1%}（阈值 {args.threshold:.0%}）", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# =========================
+# Event Timestamp Sources
+# =========================
+# ScrollFilter 使用整数纳秒时间戳。这里提供几种可替换的时间源：
+#   EventTickClock   - 使用 MSLLHOOKSTRUCT.time（系统生成事件时的毫秒计数），处理 32 位回绕
+#   PerfCounterClock - 使用 time.perf_counter_ns()，即回调实际执行的时刻
+#   ManualClock      - 手动推进的时钟，用于测试和回放
+# 三者都是单调的，不受 NTP / 夏令时调整影响。
+# 调用方式统一为 clock(tick)，tick 为事件自带的毫秒计数（不需要时可忽略）。
+# clock.now() 返回此刻在同一时间基准下的时间戳，用于把事件时间换算为墙上时间（见 pipeline_sinks.HistorySink）。
+
+import sys
+import time
+
+TICK_WRAP = 1 << 32
+TICK_HALF = 1 << 31
+NS_PER_MS = 1_000_000
+NS_PER_SECOND = 1_000_000_000
+
+
+def seconds_to_ns(seconds):
+    """秒（浮点）-> 纳秒（整数）"""
+    return int(round(seconds * NS_PER_SECOND))
+
+
+if sys.platform == "win32":
+    import ctypes
+    _GetTickCount = ctypes.windll.kernel32.GetTickCount
+    _GetTickCount.restype = ctypes.c_uint32
+
+    def tick_count():
+        """与 MSLLHOOKSTRUCT.time 相同的系统毫秒计数"""
+        return _GetTickCount()
+else:
+    def tick_count():
+        """其他平台没有 GetTickCount，用单调时钟的 32 位毫秒数代替"""
+        return int(time.monotonic() * 1000) & (TICK_WRAP - 1)
+
+
+class EventTickClock:
+    """把 32 位毫秒计数扩展为单调递增的纳秒时间戳
+
+    GetTickCount 约 49.7 天回绕一次；相邻两次事件的差值按 32 位取模计算，
+    差值超过半个周期视为乱序到达的旧事件（时间戳后退），不会被当作回绕。
+    """
+
+    __slots__ = ("last_tick", "now_ns")
+
+    def __init__(self):
+        self.last_tick = None
+        self.now_ns = 0
+
+    def __call__(self, tick):
+        last_tick = self.last_tick
+        if last_tick is None:
+            self.last_tick = tick
+            self.now_ns = tick * NS_PER_MS
+            return self.now_ns
+        diff = (tick - last_tick) & (TICK_WRAP - 1)
+        if diff >= TICK_HALF:
+            diff -= TICK_WRAP
+        self.last_tick = tick
+        self.now_ns += diff * NS_PER_MS
+        return self.now_ns
+
+    def now(self):
+        """此刻的时间戳（按当前系统毫秒计数推算，不改变状态）"""
+        last_tick = self.last_tick
+        tick = tick_count()
+        if last_tick is None:
+            return tick * NS_PER_MS
+        diff = (tick - last_tick) & (TICK_WRAP - 1)
+        if diff >= TICK_HALF:
+            diff -= TICK_WRAP
+        return self.now_ns + diff * NS_PER_MS
+
+
+class PerfCounterClock:
+    """使用高精度性能计数器，忽略事件自带的时间"""
+
+    __slots__ = ()
+
+    def __call__(self, tick=0):
+        return time.perf_counter_ns()
+
+    def now(self):
+        return time.perf_counter_ns()
+
+
+class ManualClock:
+    """手动推进的时钟，用于测试"""
+
+    __slots__ = ("now_ns",)
+
+    def __init__(self, start_ns=0):
+        self.now_ns = start_ns
+
+    def advance(self, ns):
+        self.now_ns += ns
+        return self.now_ns
+
+    def __call__(self, tick=0):
+        return self.now_ns
+
+    def now(self):
+        return self.now_ns
+
+
+# 配置项 timestamp_source 的可选值
+CLOCKS = {
+    "event": EventTickClock,
+    "perf_counter": PerfCounterClock,
+}
+
+
+def make_clock(name):
+    """根据配置名称创建时间源，未知名称回退到事件时间"""
+    return CLOCKS.get(name, EventTickClock)()
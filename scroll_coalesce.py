@@ -0,0 +1,223 @@
+# =========================
+# Wheel Event Coalescing
+# =========================
+# 可选的合并阶段（设置 coalesce_ms，0 为关闭）：快速转动的无级滚轮每秒会产生几百个滚轮事件，
+# 大页面的浏览器、表格软件等逐个处理时明显卡顿。合并后同方向的放行事件在一个短窗口内只送出一次，
+# delta 为窗口内的总和。
+#
+# 前沿放行：窗口外到达的事件直接放行并打开一个窗口，单独的一格不增加任何延迟；
+# 窗口内的放行事件被拦下（钩子返回 1），滚动量累加到待注入列表（同方向合并，换向时另起一项，保持顺序）；
+# 窗口结束时由注入线程一次性注入，注入本身又打开下一个窗口，连续滚动时每个窗口只注入一个事件。
+# 被合并的事件最多延迟一个窗口（几毫秒，time.sleep 在 Windows 上使用高精度定时器，Python 3.11+）。
+#
+# 注入放在 Injector 接口后面：
+#   - SendInputInjector: SendInput(MOUSEEVENTF_WHEEL)，dwExtraInfo 设为 COALESCE_TAG，
+#                        钩子据此识别自己注入的事件并直接放行（不再过滤、计数或合并）
+#   - FakeInjector:      记录注入的 delta，在 Linux 上测试合并逻辑
+# 钩子线程只做加锁的列表操作，SendInput 在注入线程中调用且不持有锁：
+# 注入的事件同样要经过本进程的钩子，钩子线程不能等待注入线程。
+
+import ctypes
+import threading
+import time
+
+# 注入事件的 dwExtraInfo 标记（"MSSC"）
+COALESCE_TAG = 0x4D535343
+# 合并窗口的上限（毫秒），保证合并带来的延迟始终只有几毫秒
+COALESCE_MAX_MS = 10.0
+
+# 一个注入事件的最大 |delta|（WM_MOUSEWHEEL 的 delta 为 16 位有符号数）
+MAX_INJECT_DELTA = 32640
+
+
+class Injector:
+    """滚轮事件注入接口"""
+
+    def inject(self, deltas):
+        """按顺序注入一组滚轮事件，返回实际注入的事件数（超出 16 位范围的 delta 拆成多个事件）"""
+        raise NotImplementedError
+
+    def close(self):
+        """不再注入时调用"""
+
+
+def split_deltas(deltas):
+    """按注入顺序生成每个事件的 delta：超出 16 位范围的总和拆成多个事件"""
+    for delta in deltas:
+        while delta:
+            step = max(-MAX_INJECT_DELTA, min(MAX_INJECT_DELTA, delta))
+            yield step
+            delta -= step
+
+
+class FakeInjector(Injector):
+    """测试替身：记录每次注入的事件 delta 列表（已拆分）及注入时间（perf_counter_ns）"""
+
+    def __init__(self):
+        self.batches = []           # [(time_ns, [delta, ...])]
+        self.injected = threading.Event()
+
+    def inject(self, deltas):
+        events = list(split_deltas(deltas))
+        self.batches.append((time.perf_counter_ns(), events))
+        self.injected.set()
+        return len(events)
+
+    @property
+    def deltas(self):
+        return [delta for _, batch in self.batches for delta in batch]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", ctypes.c_int32),
+        ("dy", ctypes.c_int32),
+        ("mouseData", ctypes.c_uint32),
+        ("dwFlags", ctypes.c_uint32),
+        ("time", ctypes.c_uint32),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class INPUT(ctypes.Structure):
+    # 联合体中 MOUSEINPUT 最大，只声明这一个成员即可得到与 Windows 相同的大小
+    class _Union(ctypes.Union):
+        _fields_ = [("mi", MOUSEINPUT)]
+
+    _anonymous_ = ("u",)
+    _fields_ = [
+        ("type", ctypes.c_uint32),
+        ("u", _Union),
+    ]
+
+
+INPUT_MOUSE = 0
+MOUSEEVENTF_WHEEL = 0x0800
+
+
+class SendInputInjector(Injector):
+    """用 SendInput 注入垂直滚轮事件"""
+
+    def __init__(self, batch=16):
+        user32 = ctypes.WinDLL("user32", use_last_error=True)
+        user32.SendInput.argtypes = [ctypes.c_uint, ctypes.POINTER(INPUT), ctypes.c_int]
+        user32.SendInput.restype = ctypes.c_uint
+        self._send_input = user32.SendInput
+        # 预先填好固定字段，注入时只写 mouseData
+        self._inputs = (INPUT * batch)()
+        for item in self._inputs:
+            item.type = INPUT_MOUSE
+            item.mi.dwFlags = MOUSEEVENTF_WHEEL
+            item.mi.dwExtraInfo = COALESCE_TAG
+
+    def inject(self, deltas):
+        inputs = self._inputs
+        count = 0
+        sent = 0
+        for step in split_deltas(deltas):
+            inputs[count].mi.mouseData = step & 0xFFFFFFFF
+            count += 1
+            if count == len(inputs):
+                sent += self._send(count)
+                count = 0
+        if count:
+            sent += self._send(count)
+        return sent
+
+    def _send(self, count):
+        sent = self._send_input(count, self._inputs, ctypes.sizeof(INPUT))
+        if sent != count:
+            print(f"注入滚轮事件失败，错误代码: {ctypes.get_last_error()}")
+        return sent
+
+
+class WheelCoalescer:
+    """合并窗口内的同方向放行事件，由注入线程按窗口注入
+
+    take(delta) 在钩子线程中对每个放行的滚轮事件调用一次，返回 True 表示事件已被合并（钩子应拦截原事件）。
+    """
+
+    def __init__(self, injector, window_ms=4.0, clock=time.perf_counter_ns):
+        self.injector = injector
+        self.clock = clock
+        self.window_ns = 0
+        self.set_window(window_ms)
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._pending = []          # 待注入的 delta，相邻两项方向相反
+        self._until = 0             # 当前窗口结束时间（clock 纳秒）
+        self._stopping = False
+        self._thread = None
+        # 统计
+        self.coalesced = 0          # 被合并（拦下后重新注入）的事件数
+        self.injected = 0           # 实际注入的事件数（拆分后、SendInput 接受的）
+
+    def set_window(self, window_ms):
+        if not 0 < window_ms <= COALESCE_MAX_MS:
+            raise ValueError(f"coalesce window must be in (0, {COALESCE_MAX_MS}] ms: {window_ms!r}")
+        self.window_ns = int(window_ms * 1_000_000)
+
+    def take(self, delta):
+        now = self.clock()
+        with self._lock:
+            if self._stopping:
+                # 已停止：注入器已关闭，拦下的事件不会再被注入，只能直接放行
+                return False
+            pending = self._pending
+            if not pending:
+                if now >= self._until:
+                    # 窗口外：直接放行并打开窗口
+                    self._until = now + self.window_ns
+                    return False
+                pending.append(delta)
+                self._wake.notify()
+            elif (pending[-1] > 0) == (delta > 0):
+                pending[-1] += delta
+            else:
+                pending.append(delta)
+            self.coalesced += 1
+            return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="WheelCoalescer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """注入剩余事件后停止"""
+        with self._lock:
+            self._stopping = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        self.injector.close()
+
+    def flush(self):
+        """立即注入待注入的事件，返回实际注入的事件数"""
+        with self._lock:
+            batch = self._pending
+            if not batch:
+                return 0
+            self._pending = []
+            # 注入的事件打开下一个窗口：连续滚动时每个窗口注入一次
+            self._until = self.clock() + self.window_ns
+        # 不持有锁：注入的事件会同步经过本进程的钩子
+        injected = self.injector.inject(batch)
+        # 只有注入线程（或停止后的 stop）调用 flush，计数不需要加锁
+        self.injected += injected
+        return injected
+
+    def _run(self):
+        lock = self._lock
+        while True:
+            with lock:
+                while not self._pending and not self._stopping:
+                    self._wake.wait()
+                if self._stopping:
+                    return
+                until = self._until
+            delay = until - self.clock()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            self.flush()
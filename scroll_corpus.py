@@ -0,0 +1,215 @@
+# =========================
+# Trace Corpus Evaluation
+# =========================
+# 用候选参数并行评估整个 trace 库。
+#
+# 每个 trace 文件交给进程池中的一个工作进程，工作进程自己用 mmap 打开文件并逐条送入
+# 与 hook_proc 相同的 ScrollFilter，进程之间只传递文件路径和统计结果，不传递事件数据。
+# 文件按大小从大到小提交，使各进程的负载尽量均衡。
+#
+# 每个 trace 完成后立即把结果追加到日志文件（JSON Lines）；中断后用同样的参数重新运行，
+# 路径、大小、修改时间和参数都相同的 trace 会直接复用日志中的结果。
+#
+# 指标（以 trace 中记录的 decision 作为参照：合成数据为真实标签，录制数据为当时的实际决策）：
+#   block_rate        候选参数的拦截率
+#   false_block_rate  参照为放行、候选参数却拦截的比例
+#   miss_rate         参照为拦截、候选参数却放行的比例
+#   baseline_diffs    与基线参数的决策差异数（指定 --baseline-interval/--baseline-threshold 时）
+#
+# 用法: python scroll_corpus.py traces/ --interval 0.3 --threshold 4 [--workers 8]
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from scroll_filter import ScrollFilter, ALLOW, BLOCK
+from scroll_trace import REPLAY_RECORD, TraceFile, TraceFormatError
+
+DEFAULT_JOURNAL = "corpus_results.jsonl"
+
+
+def find_traces(paths):
+    """展开目录，返回所有 trace 文件路径"""
+    traces = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                traces.extend(os.path.join(root, name) for name in files if name.endswith(".bin"))
+        else:
+            traces.append(path)
+    return sorted(set(traces))
+
+
+def trace_key(path, config):
+    """结果复用的依据：文件身份 + 参数"""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime_ns, "config": config}
+
+
+def evaluate_trace(path, config):
+    """在工作进程中评估一个 trace 文件"""
+    candidate = ScrollFilter(config["interval"], config["threshold"])
+    feed = candidate.feed
+    baseline_feed = None
+    if config.get("baseline_interval") is not None:
+        baseline_feed = ScrollFilter(config["baseline_interval"], config["baseline_threshold"]).feed
+
+    events = reference_allowed = false_blocks = misses = baseline_diffs = 0
+    started = time.perf_counter()
+    with TraceFile(path) as trace:
+        for timestamp, delta, _flags, recorded in REPLAY_RECORD.iter_unpack(trace.records):
+            decision = feed(delta, timestamp)
+            if decision != recorded:
+                if decision == BLOCK:
+                    false_blocks += 1
+                else:
+                    misses += 1
+            if recorded == ALLOW:
+                reference_allowed += 1
+            if baseline_feed is not None and baseline_feed(delta, timestamp) != decision:
+                baseline_diffs += 1
+            events += 1
+
+    return {
+        "events": events,
+        "blocked": candidate.blocked_events,
+        "reference_allowed": reference_allowed,
+        "reference_blocked": events - reference_allowed,
+        "false_blocks": false_blocks,
+        "misses": misses,
+        "baseline_diffs": baseline_diffs,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def rates(result):
+    """根据计数计算比例"""
+    return {
+        "block_rate": result["blocked"] / max(1, result["events"]),
+        "false_block_rate": result["false_blocks"] / max(1, result["reference_allowed"]),
+        "miss_rate": result["misses"] / max(1, result["reference_blocked"]),
+    }
+
+
+def load_journal(path):
+    """读取已完成的结果，忽略中断时写了一半的最后一行"""
+    done = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                done[json.dumps(entry["key"], sort_keys=True)] = entry["result"]
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def run_corpus(traces, config, workers=None, journal=DEFAULT_JOURNAL, progress=None):
+    """并行评估所有 trace，返回 {路径: 结果}"""
+    done = load_journal(journal) if journal else {}
+    results = {}
+    pending = []
+    for path in traces:
+        key = trace_key(path, config)
+        cached = done.get(json.dumps(key, sort_keys=True))
+        if cached is not None:
+            results[path] = cached
+        else:
+            pending.append((os.path.getsize(path), path, key))
+    pending.sort(reverse=True)
+
+    if not pending:
+        return results
+
+    log = open(journal, 'a', encoding='utf-8') if journal else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            futures = {executor.submit(evaluate_trace, path, config): (path, key) for _, path, key in pending}
+            for future in as_completed(futures):
+                path, key = futures[future]
+                try:
+                    result = future.result()
+                except (OSError, TraceFormatError) as e:
+                    print(f"跳过 {path}: {e}", file=sys.stderr)
+                    continue
+                results[path] = result
+                if log:
+                    log.write(json.dumps({"key": key, "result": result}) + "\n")
+                    log.flush()
+                if progress:
+                    progress(path, result)
+    finally:
+        if log:
+            log.close()
+    return results
+
+
+def aggregate(results):
+    """合并所有 trace 的计数"""
+    total = {}
+    for result in results.values():
+        for name, value in result.items():
+            total[name] = total.get(name, 0) + value
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="并行评估 trace 库")
+    parser.add_argument("paths", nargs="+", help="trace 文件或目录")
+    parser.add_argument("--interval", type=float, default=0.5, help="候选时间阈值（秒）")
+    parser.add_argument("--threshold", type=int, default=3, help="候选方向改变阈值")
+    parser.add_argument("--baseline-interval", type=float, default=None, help="基线时间阈值（秒）")
+    parser.add_argument("--baseline-threshold", type=int, default=3, help="基线方向改变阈值")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认等于 CPU 核数")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL, help="结果日志（用于中断后续跑），空字符串表示不记录")
+    args = parser.parse_args(argv)
+    # 与 FilterConfig 的校验一致；无效参数会在工作进程中抛出 ValueError，所以在提交前检查
+    if not args.interval > 0:
+        parser.error(f"--interval 必须为正数: {args.interval}")
+    if args.threshold < 1:
+        parser.error(f"--threshold 不能小于 1: {args.threshold}")
+    if args.baseline_interval is not None and not args.baseline_interval > 0:
+        parser.error(f"--baseline-interval 必须为正数: {args.baseline_interval}")
+    if args.baseline_threshold < 1:
+        parser.error(f"--baseline-threshold 不能小于 1: {args.baseline_threshold}")
+    if args.workers is not None and args.workers < 1:
+        parser.error(f"--workers 不能小于 1: {args.workers}")
+
+    config = {"interval": args.interval, "threshold": args.threshold}
+    if args.baseline_interval is not None:
+        config["baseline_interval"] = args.baseline_interval
+        config["baseline_threshold"] = args.baseline_threshold
+
+    traces = find_traces(args.paths)
+    if not traces:
+        print("没有找到 trace 文件", file=sys.stderr)
+        return 1
+
+    def progress(path, result):
+        r = rates(result)
+        print(f"{path}: {result['events']} 事件, 拦截率 {r['block_rate']:.3%}, "
+              f"误拦截率 {r['false_block_rate']:.3%}, 漏拦截率 {r['miss_rate']:.3%}, "
+              f"基线差异 {result['baseline_diffs']}")
+
+    started = time.perf_counter()
+    results = run_corpus(traces, config, args.workers, args.journal or None, progress)
+    elapsed = time.perf_counter() - started
+
+    total = aggregate(results)
+    if not total:
+        return 1
+    r = rates(total)
+    print(f"合计: {len(results)}/{len(traces)} 个 trace, {total['events']} 事件, 墙钟 {elapsed:.2f} 秒")
+    print(f"  拦截率 {r['block_rate']:.3%}  误拦截率 {r['false_block_rate']:.3%}  "
+          f"漏拦截率 {r['miss_rate']:.3%}  基线差异 {total['baseline_diffs']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
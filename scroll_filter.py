@@ -0,0 +1,219 @@
+# =========================
+# Scroll Filter Engine
+# =========================
+# 滚轮防抖决策逻辑，与 win32 钩子和 Qt 界面完全解耦。
+# 时间统一使用整数纳秒（时间源见 scroll_clock.py），避免浮点误差和系统时间跳变。
+# 本模块只依赖标准库，可以在没有 user32 的 Linux 机器上直接运行、测试和压测，
+# 并且与 MouseHook.hook_proc 中实际使用的是同一份代码。
+#
+# 阈值按滚动量加权（高精度 / 无级滚轮每个事件只有几分之一格，事件率是普通滚轮的 8~10 倍）：
+#   - 次数阈值: 反向累计滚动量达到 direction_change_threshold 格（× WHEEL_DELTA）才切换方向，
+#               "3 次反向" 指三格的滚动量，而不是三个微小事件
+#   - 时间阈值: 反向事件的拦截窗口按当前方向确定以来该方向的累计滚动量缩放，满一格即为完整的 block_interval；
+#               轻轻碰一下滚轮（不足一格）不会把方向锁定整个 block_interval，
+#               而一旦该方向滚过一格，窗口在方向改变之前不会再缩短（中间夹杂的抖动不影响）
+# 普通滚轮每个事件正好一格（120），两种加权都与按事件计数完全相同。
+
+from scroll_clock import seconds_to_ns
+
+# 一格滚轮的滚动量（Windows WHEEL_DELTA，evdev REL_WHEEL_HI_RES 同样以 1/120 格为单位）
+WHEEL_DELTA = 120
+
+# 决策结果
+ALLOW = 0
+BLOCK = 1
+
+# 状态码（界面层负责翻译成文字）
+# STATUS_DIRECTION_CHANGED / STATUS_BLOCKED 附带一个整数参数 status_arg：
+# 当前这段反向的累计滚动量（1/WHEEL_DELTA 格，界面换算成格数）
+STATUS_WAITING = 0
+STATUS_DISABLED = 1
+STATUS_INITIAL_UP = 2
+STATUS_INITIAL_DOWN = 3
+STATUS_SAME_DIRECTION = 4
+STATUS_DIRECTION_CHANGED = 5
+STATUS_BLOCKED = 6
+
+
+class FilterConfig:
+    """过滤器配置，创建后不可修改
+
+    配置变化时创建新对象并整体替换 ScrollFilter.config（一次引用赋值），
+    钩子线程在任何时刻看到的都是一组完整、一致的配置。
+    """
+
+    __slots__ = ("block_interval_ns", "direction_change_threshold", "enabled")
+
+    def __init__(self, block_interval=0.5, direction_change_threshold=3, enabled=True):
+        if block_interval <= 0:
+            raise ValueError(f"block_interval must be positive: {block_interval!r}")
+        if direction_change_threshold < 1:
+            raise ValueError(f"direction_change_threshold must be at least 1: {direction_change_threshold!r}")
+        object.__setattr__(self, "block_interval_ns", seconds_to_ns(block_interval))
+        object.__setattr__(self, "direction_change_threshold", int(direction_change_threshold))
+        object.__setattr__(self, "enabled", bool(enabled))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, FilterConfig):
+            return NotImplemented
+        return (self.block_interval_ns == other.block_interval_ns
+                and self.direction_change_threshold == other.direction_change_threshold
+                and self.enabled == other.enabled)
+
+    def __hash__(self):
+        return hash((self.block_interval_ns, self.direction_change_threshold, self.enabled))
+
+    def __repr__(self):
+        return (f"FilterConfig(block_interval={self.block_interval_ns / 1e9!r}, "
+                f"direction_change_threshold={self.direction_change_threshold}, enabled={self.enabled})")
+
+
+class ScrollFilter:
+    """滚轮防抖状态机
+
+    每个滚轮事件调用一次 feed(delta, timestamp)，返回 ALLOW 或 BLOCK。
+    feed 只做整数/浮点比较和属性赋值，不创建任何对象。
+    """
+
+    __slots__ = (
+        # 配置（FilterConfig）
+        "config",
+        # 状态
+        "last_dir",
+        "last_time",
+        "dir_travel",           # 当前方向确定以来该方向的累计滚动量
+        "opposite_travel",      # 连续反向事件的累计滚动量
+        # 统计
+        "total_events",
+        "blocked_events",
+        "current_direction",
+        "status",
+        "status_arg",
+    )
+
+    def __init__(self, block_interval=0.5, direction_change_threshold=3, enabled=True, config=None):
+        self.config = config or FilterConfig(block_interval, direction_change_threshold, enabled)
+
+        self.last_dir = 0               # 1: up, -1: down, 0: none
+        self.last_time = 0
+        self.dir_travel = 0
+        self.opposite_travel = 0
+
+        self.reset_stats()
+
+    def configure(self, block_interval, direction_change_threshold, enabled):
+        """更新配置，block_interval 单位为秒"""
+        self.apply(FilterConfig(block_interval, direction_change_threshold, enabled))
+
+    def apply(self, config):
+        """替换配置，方向、时间和反向累计滚动量都保留
+
+        正在进行的抖动不会因为修改配置而被放过；新的阈值从下一个事件开始生效
+        （反向滚动量已达到新阈值时，下一个反向事件即切换方向）。
+        """
+        self.config = config
+
+    @property
+    def block_interval_ns(self):
+        return self.config.block_interval_ns
+
+    @property
+    def direction_change_threshold(self):
+        return self.config.direction_change_threshold
+
+    @property
+    def enabled(self):
+        return self.config.enabled
+
+    def reset_stats(self):
+        """清空统计信息"""
+        self.total_events = 0
+        self.blocked_events = 0
+        self.current_direction = 0
+        self.status = STATUS_WAITING
+        self.status_arg = 0
+
+    def feed(self, delta, timestamp):
+        """处理一个滚轮事件，delta 为有符号滚动量（一格为 WHEEL_DELTA），timestamp 为整数纳秒"""
+        config = self.config
+        if not config.enabled:
+            self.total_events += 1
+            self.current_direction = 0
+            self.status = STATUS_DISABLED
+            return ALLOW
+
+        if delta > 0:
+            current_dir = 1
+            travel = delta
+        else:
+            current_dir = -1
+            travel = -delta
+
+        # First event: establish a direction
+        if self.last_dir == 0:
+            self.last_dir = current_dir
+            self.last_time = timestamp
+            self.dir_travel = travel
+            self.opposite_travel = 0
+
+            self.total_events += 1
+            self.current_direction = current_dir
+            self.status = STATUS_INITIAL_UP if current_dir > 0 else STATUS_INITIAL_DOWN
+            return ALLOW
+
+        if current_dir == self.last_dir:
+            # continuing same direction keeps the "burst" alive; after the interval it starts a new one
+            elapsed = timestamp - self.last_time >= config.block_interval_ns
+            self.last_time = timestamp
+            self.dir_travel += travel
+            self.opposite_travel = 0
+
+            self.total_events += 1
+            self.current_direction = current_dir
+            if elapsed:
+                self.status = STATUS_INITIAL_UP if current_dir > 0 else STATUS_INITIAL_DOWN
+            else:
+                self.status = STATUS_SAME_DIRECTION
+            return ALLOW
+
+        # opposite event: the hold window scales with the travel since the direction was set, up to one notch
+        window = config.block_interval_ns
+        dir_travel = self.dir_travel
+        if dir_travel < WHEEL_DELTA:
+            window = window * dir_travel // WHEEL_DELTA
+        if timestamp - self.last_time >= window:
+            # interval elapsed: re-establish the direction
+            self.last_dir = current_dir
+            self.last_time = timestamp
+            self.dir_travel = travel
+            self.opposite_travel = 0
+
+            self.total_events += 1
+            self.current_direction = current_dir
+            self.status = STATUS_INITIAL_UP if current_dir > 0 else STATUS_INITIAL_DOWN
+            return ALLOW
+
+        opposite_travel = self.opposite_travel + travel
+        if opposite_travel >= config.direction_change_threshold * WHEEL_DELTA:
+            # deliberate change — switch direction
+            self.last_dir = current_dir
+            self.last_time = timestamp
+            self.dir_travel = travel
+            self.opposite_travel = 0
+
+            self.total_events += 1
+            self.current_direction = current_dir
+            self.status = STATUS_DIRECTION_CHANGED
+            self.status_arg = opposite_travel
+            return ALLOW
+
+        # suppress the jitter
+        self.opposite_travel = opposite_travel
+        self.blocked_events += 1
+        self.current_direction = current_dir
+        self.status = STATUS_BLOCKED
+        self.status_arg = opposite_travel
+        return BLOCK
@@ -0,0 +1,195 @@
+# =========================
+# Scroll Statistics History
+# =========================
+# 跨会话保存的滚动统计：放行数、拦截数、方向切换数，按分钟、小时、天三种粒度累计。
+#
+# 文件为定长的 mmap 文件，创建后大小不再变化：
+#   文件头 32 字节: magic "MSSHIST\0", 版本号 u16, 保留 u16, 三种粒度的槽位数 u32 × 3, 保留 12 字节
+#   每种粒度依次存放 4 列（本机字节序）: period i64[N], allowed u32[N], blocked u32[N], changes u32[N]
+# period 为本地时间的秒数（Unix 秒加上当时的时区和夏令时偏移）整除粒度秒数，槽位下标为 period % N，
+# 小时和天按本地时间的整点、零点划分，与历史视图中显示的本地时间一致；
+# 写入时槽位中的 period 不同即说明是一圈之前的旧数据，先清零再累加（环形保留）。
+# 每次写入同时累加到三种粒度（降采样在写入时完成），都是 O(1)；
+# 查询只扫描一种粒度的 N 个槽位，一年的数据按天查询只需扫描约 1100 个槽位。
+#
+# 写入由 pipeline_sinks.HistorySink 在 sink 线程中按批进行，查询由界面线程进行；
+# 读到正在写入的槽位时最多差一批计数，不影响历史视图。
+
+import mmap
+import os
+import struct
+import time
+
+HISTORY_MAGIC = b"MSSHIST\0"
+# 版本 2: period 按本地时间计算（版本 1 为 UTC）
+HISTORY_VERSION = 2
+HEADER = struct.Struct('<8sHHIII12x')
+
+# 粒度: (名称, 秒数, 默认槽位数)
+MINUTE = "minute"
+HOUR = "hour"
+DAY = "day"
+RESOLUTIONS = (
+    (MINUTE, 60, 7 * 24 * 60),      # 7 天
+    (HOUR, 3600, 90 * 24),          # 90 天
+    (DAY, 86400, 3 * 366),          # 3 年
+)
+# query() 返回的最多数据点数，超过时换用更粗的粒度
+MAX_POINTS = 500
+
+
+def local_seconds(timestamp):
+    """Unix 秒 -> 本地时间的秒数（加上当时的时区和夏令时偏移）"""
+    timestamp = int(timestamp)
+    return timestamp + time.localtime(timestamp).tm_gmtoff
+
+
+def unix_seconds(local):
+    """local_seconds 的逆变换（夏令时结束时重复的一小时取较早的一次）"""
+    return int(time.mktime(time.gmtime(local)[:8] + (-1,)))
+
+
+class _Ring:
+    """一种粒度的环形槽位，列直接映射到文件"""
+
+    __slots__ = ("name", "seconds", "slots", "periods", "allowed", "blocked", "changes")
+
+    def __init__(self, name, seconds, slots, view, offset):
+        self.name = name
+        self.seconds = seconds
+        self.slots = slots
+        self.periods = view[offset:offset + 8 * slots].cast('q')
+        offset += 8 * slots
+        self.allowed = view[offset:offset + 4 * slots].cast('I')
+        offset += 4 * slots
+        self.blocked = view[offset:offset + 4 * slots].cast('I')
+        offset += 4 * slots
+        self.changes = view[offset:offset + 4 * slots].cast('I')
+
+    @staticmethod
+    def size(slots):
+        return 20 * slots
+
+    def add(self, local, allowed, blocked, changes):
+        """local 为本地时间的秒数（local_seconds）"""
+        period = local // self.seconds
+        slot = period % self.slots
+        if self.periods[slot] != period:
+            self.periods[slot] = period
+            self.allowed[slot] = 0
+            self.blocked[slot] = 0
+            self.changes[slot] = 0
+        self.allowed[slot] += allowed
+        self.blocked[slot] += blocked
+        self.changes[slot] += changes
+
+    def rows(self, start, end):
+        """[start, end) 内有数据的槽位，按时间排序: [(起始 Unix 秒, allowed, blocked, changes)]"""
+        first = local_seconds(start) // self.seconds
+        last = local_seconds(int(end) - 1) // self.seconds
+        periods = self.periods
+        rows = []
+        for slot in range(self.slots):
+            period = periods[slot]
+            if first <= period <= last and period:
+                rows.append((unix_seconds(period * self.seconds),
+                             self.allowed[slot], self.blocked[slot], self.changes[slot]))
+        rows.sort()
+        return rows
+
+    def release(self):
+        for column in (self.periods, self.allowed, self.blocked, self.changes):
+            column.release()
+
+
+class HistoryStore:
+    """滚动统计的时间序列文件
+
+    slots 只在创建文件时使用，打开已有文件时沿用文件中的槽位数；
+    文件损坏或版本不同时改名为 .bak 后重新创建。
+    """
+
+    def __init__(self, path, slots=None):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        slots = tuple(slots or (count for _, _, count in RESOLUTIONS))
+
+        existing = self._read_header(path)
+        if existing is None:
+            if os.path.exists(path):
+                os.replace(path, path + ".bak")
+            self._create(path, slots)
+        else:
+            slots = existing
+
+        self._file = open(path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._view = memoryview(self._mmap)
+        self.rings = {}
+        offset = HEADER.size
+        for (name, seconds, _), count in zip(RESOLUTIONS, slots):
+            self.rings[name] = _Ring(name, seconds, count, self._view, offset)
+            offset += _Ring.size(count)
+
+    @staticmethod
+    def _read_header(path):
+        """有效文件的槽位数，文件不存在或无效时返回 None"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(HEADER.size)
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        magic, version, _, *slots = HEADER.unpack(data)
+        if magic != HISTORY_MAGIC or version != HISTORY_VERSION:
+            return None
+        if size != HEADER.size + sum(_Ring.size(count) for count in slots) or not all(slots):
+            return None
+        return tuple(slots)
+
+    @staticmethod
+    def _create(path, slots):
+        size = HEADER.size + sum(_Ring.size(count) for count in slots)
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION, 0, *slots))
+            f.truncate(size)
+
+    def add(self, timestamp, allowed=0, blocked=0, changes=0):
+        """把一批计数累加到 timestamp（Unix 秒）所在的本地时间的分钟、小时和天"""
+        local = local_seconds(timestamp)
+        for ring in self.rings.values():
+            ring.add(local, allowed, blocked, changes)
+
+    def series(self, resolution, start, end):
+        """指定粒度下 [start, end) 的数据"""
+        return self.rings[resolution].rows(start, end)
+
+    def query(self, start, end):
+        """选择能覆盖 [start, end)、且数据点不超过 MAX_POINTS 的最细粒度，返回 (粒度, 数据)"""
+        span = end - start
+        for name, ring in self.rings.items():
+            if span <= ring.seconds * ring.slots and span <= ring.seconds * MAX_POINTS:
+                return name, ring.rows(start, end)
+        return DAY, self.rings[DAY].rows(start, end)
+
+    def totals(self, start, end):
+        """[start, end) 内的 (allowed, blocked, changes) 合计"""
+        _, rows = self.query(start, end)
+        return (sum(row[1] for row in rows), sum(row[2] for row in rows), sum(row[3] for row in rows))
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        if self._mmap.closed:
+            return
+        self._mmap.flush()
+        for ring in self.rings.values():
+            ring.release()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
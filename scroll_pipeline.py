@@ -0,0 +1,111 @@
+# =========================
+# Wheel Event Pipeline
+# =========================
+# 事件源 -> 决策阶段（同步）-> EventRing -> sink（异步，批量）
+#
+# 决策阶段 Pipeline.process 在事件源的线程中同步执行（钩子回调中就是它），
+# 只做 ScrollFilter 决策、可选的附加阶段和一次 EventRing 写入；
+# 记录、统计、指标、界面等 sink 各自持有 EventRing 的读取游标，
+# 在 asyncio 事件循环中批量读取（见 pipeline_sinks.py），不占用事件源线程。
+#
+# 事件源分两类：
+#   - 实时事件源自己调用 pipeline.process：MouseHook（Windows 钩子）、EvdevScrollFilter（Linux）
+#   - 离线事件源实现 events()，由 pipeline_sinks.run_source 驱动：
+#     ListSource（测试替身）、TraceSource（trace 文件回放）、SyntheticSource（scroll_synth 生成）
+#
+# 本模块只依赖标准库中启动很快的部分，钩子安装前导入不会拖慢启动；asyncio 只在 pipeline_sinks 中使用。
+
+from event_ring import EventRing
+from scroll_filter import ScrollFilter
+
+
+class Pipeline:
+    """同步决策阶段
+
+    stages 为附加阶段，按顺序在 ScrollFilter 之后调用：stage(delta, timestamp, decision) -> decision，
+    可以改写决策（例如按条件全部放行）。process 按当前的阶段生成，
+    没有附加阶段时不产生额外的循环开销。
+    """
+
+    def __init__(self, scroll_filter=None, ring=None, stages=()):
+        self.filter = scroll_filter or ScrollFilter()
+        self.ring = ring or EventRing(4096)
+        self.set_stages(stages)
+
+    def set_stages(self, stages):
+        """替换附加阶段：重新生成 process 后一次引用赋值，通过 pipeline.process 调用的事件源下一个事件即生效"""
+        self.stages = tuple(stages)
+        self.process = self._compile()
+
+    def _compile(self):
+        scroll_filter = self.filter
+        feed = scroll_filter.feed
+        push = self.ring.push
+        stages = self.stages
+
+        if not stages:
+            def process(delta, timestamp, flags=0):
+                """决定一个滚轮事件并写入 EventRing，返回 ALLOW/BLOCK"""
+                decision = feed(delta, timestamp)
+                push(timestamp, delta, flags, decision, scroll_filter.status)
+                return decision
+        else:
+            def process(delta, timestamp, flags=0):
+                """决定一个滚轮事件并写入 EventRing，返回 ALLOW/BLOCK"""
+                decision = feed(delta, timestamp)
+                for stage in stages:
+                    decision = stage(delta, timestamp, decision)
+                push(timestamp, delta, flags, decision, scroll_filter.status)
+                return decision
+        return process
+
+
+# =========================
+# Offline Sources
+# =========================
+class EventSource:
+    """离线事件源接口"""
+
+    def events(self):
+        """逐个返回 (timestamp 纳秒, delta, flags)"""
+        raise NotImplementedError
+
+
+class ListSource(EventSource):
+    """测试替身：直接给出事件序列，元素为 (timestamp, delta) 或 (timestamp, delta, flags)"""
+
+    def __init__(self, events):
+        self._events = [event if len(event) == 3 else (event[0], event[1], 0) for event in events]
+
+    def events(self):
+        return iter(self._events)
+
+
+class TraceSource(EventSource):
+    """回放 trace 文件（scroll_trace.py 格式）"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def events(self):
+        from scroll_trace import REPLAY_RECORD, TraceFile
+        with TraceFile(self.path) as trace:
+            for timestamp, delta, flags, _decision in REPLAY_RECORD.iter_unpack(trace.records):
+                yield timestamp, delta, flags
+
+
+class SyntheticSource(EventSource):
+    """scroll_synth 生成的事件流（需要 NumPy）"""
+
+    def __init__(self, n, model=None, seed=0, chunk_size=1_000_000):
+        self.n = n
+        self.model = model
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    def events(self):
+        import scroll_synth
+        model = self.model or scroll_synth.JitterModel()
+        for stream in scroll_synth.generate_chunks(model, self.n, self.chunk_size, self.seed):
+            for timestamp, delta in zip(stream.timestamps.tolist(), stream.deltas.tolist()):
+                yield timestamp, delta, 0
@@ -0,0 +1,259 @@
+# =========================
+# Synthetic Wheel Workloads
+# =========================
+# 按参数模型批量生成带真实标签的滚轮事件流，用于压测和调参。
+# 全部使用 NumPy 向量化运算，给定种子结果可复现；大规模数据按块生成，内存占用与块大小成正比。
+#
+# 模型：
+#   - 用户的一次滚动手势包含若干"格"（几何分布），格与格的间隔围绕 1/notch_rate 做对数正态抖动
+#   - 手势之间有空闲间隔（指数分布）；新手势以 reversal_probability 的概率反向，
+#     其中 quick_reversal_probability 比例是紧接着的快速换向（间隔 quick_reversal_gap）
+#   - 每个真实事件以 bounce_probability 的概率引发编码器抖动：1 个或多个短间隔的反向事件
+#   - 高精度滚轮（hires_divisor > 1）把每一格拆成若干个小 delta 事件
+#
+# 输出 WheelStream：timestamps（int64 纳秒）、deltas（int32）、is_jitter（bool，真实标签）。
+# 也可以写成 scroll_trace 格式的文件，此时 decision 字段写入"理想决策"（抖动为 BLOCK），
+# 用 scroll_trace.py replay 回放时的决策差异即为相对真实标签的错误数。
+#
+# 用法: python scroll_synth.py out.bin -n 1000000 --preset worn --seed 1
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from scroll_filter import ALLOW, BLOCK
+from scroll_trace import HEADER, RECORD, TRACE_MAGIC, TRACE_VERSION
+
+WHEEL_DELTA = 120
+NS_PER_SECOND = 1_000_000_000
+
+# 与 scroll_trace.RECORD 相同布局的结构化类型
+TRACE_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('wheel_data', '<u4'),
+    ('flags', '<u4'),
+    ('decision', 'u1'),
+    ('pad', 'V3'),
+])
+assert TRACE_DTYPE.itemsize == RECORD.size
+
+
+class JitterModel:
+    """滚轮事件流的参数模型，时间单位为秒"""
+
+    def __init__(self, notch_rate=25.0, rate_sigma=0.35, gesture_notches=12.0,
+                 idle_gap=1.5, reversal_probability=0.3, quick_reversal_probability=0.3,
+                 quick_reversal_gap=0.15, bounce_probability=0.05, bounce_repeat=0.3,
+                 bounce_delay=0.008, hires_divisor=1):
+        self.notch_rate = notch_rate                                  # 滚动时每秒格数
+        self.rate_sigma = rate_sigma                                  # 格间隔的对数正态 sigma
+        self.gesture_notches = gesture_notches                        # 每个手势的平均格数
+        self.idle_gap = idle_gap                                      # 手势间平均空闲时间
+        self.reversal_probability = reversal_probability              # 新手势反向的概率
+        self.quick_reversal_probability = quick_reversal_probability  # 反向中快速换向的比例
+        self.quick_reversal_gap = quick_reversal_gap                  # 快速换向的平均间隔
+        self.bounce_probability = bounce_probability                  # 每个真实事件引发抖动的概率
+        self.bounce_repeat = bounce_repeat                            # 抖动再多一次的概率（几何分布）
+        self.bounce_delay = bounce_delay                              # 抖动事件之间的平均间隔
+        self.hires_divisor = hires_divisor                            # 每格拆分的事件数
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in vars(self).items())
+        return f"JitterModel({fields})"
+
+
+PRESETS = {
+    "clean": JitterModel(bounce_probability=0.0),
+    "typical": JitterModel(),
+    "worn": JitterModel(bounce_probability=0.2, bounce_repeat=0.5, bounce_delay=0.012),
+    "hires": JitterModel(notch_rate=30.0, hires_divisor=8, bounce_probability=0.03),
+    "fast": JitterModel(notch_rate=60.0, gesture_notches=30.0, idle_gap=0.6, bounce_probability=0.08),
+}
+
+
+class WheelStream:
+    """一段滚轮事件流及其真实标签"""
+
+    __slots__ = ("timestamps", "deltas", "is_jitter")
+
+    def __init__(self, timestamps, deltas, is_jitter):
+        self.timestamps = timestamps
+        self.deltas = deltas
+        self.is_jitter = is_jitter
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @classmethod
+    def concatenate(cls, streams):
+        streams = list(streams)
+        return cls(np.concatenate([s.timestamps for s in streams]),
+                   np.concatenate([s.deltas for s in streams]),
+                   np.concatenate([s.is_jitter for s in streams]))
+
+
+def _generate_notches(model, rng, notches, start_ns, start_direction):
+    """生成 notches 个真实滚动格，返回 (时间戳, 方向, 结束方向)"""
+    # 手势划分：每格以 1/gesture_notches 的概率开始新手势（第一格总是开始手势）
+    starts = rng.random(notches) < 1.0 / model.gesture_notches
+    starts[0] = True
+    gesture_id = np.cumsum(starts) - 1
+    gestures = int(gesture_id[-1]) + 1
+
+    # 每个手势的方向：按概率翻转后累积
+    flips = rng.random(gestures) < model.reversal_probability
+    flips[0] = False
+    parity = np.cumsum(flips) & 1
+    gesture_dir = np.where(parity == 0, start_direction, -start_direction).astype(np.int8)
+    direction = gesture_dir[gesture_id]
+
+    # 格间隔：手势内部为对数正态，手势开头为空闲间隔或快速换向间隔
+    mean_gap = 1.0 / model.notch_rate
+    gaps = mean_gap * rng.lognormal(-0.5 * model.rate_sigma ** 2, model.rate_sigma, notches)
+    idle = rng.exponential(model.idle_gap, gestures)
+    quick = flips & (rng.random(gestures) < model.quick_reversal_probability)
+    idle = np.where(quick, rng.exponential(model.quick_reversal_gap, gestures), idle)
+    gaps[starts] = idle
+    times = start_ns + np.cumsum((gaps * NS_PER_SECOND).astype(np.int64))
+
+    return times, direction, int(gesture_dir[-1])
+
+
+def generate(model, n, seed=0, start_ns=0, start_direction=1):
+    """生成恰好 n 个事件"""
+    rng = np.random.default_rng(seed)
+    divisor = max(1, int(model.hires_divisor))
+    # 按期望的抖动比例估算需要的真实格数，多生成一些再截断
+    bounce_mean = model.bounce_probability / max(1e-9, 1.0 - model.bounce_repeat)
+    notches = max(1, int(n / divisor / (1.0 + bounce_mean) * 1.05) + 64)
+
+    times, direction, _ = _generate_notches(model, rng, notches, start_ns, start_direction)
+
+    # 高精度滚轮：每格拆成 divisor 个事件，均匀分布在该格之前的时间里
+    if divisor > 1:
+        spacing = np.diff(times, prepend=times[0] - int(NS_PER_SECOND / model.notch_rate))
+        spacing = np.minimum(spacing, int(NS_PER_SECOND / model.notch_rate))
+        sub = np.arange(divisor, dtype=np.int64)
+        times = (np.repeat(times, divisor)
+                 - np.repeat(spacing, divisor) * (divisor - 1 - np.tile(sub, notches)) // divisor)
+        direction = np.repeat(direction, divisor)
+        step = WHEEL_DELTA // divisor
+    else:
+        step = WHEEL_DELTA
+    deltas = direction.astype(np.int32) * step
+
+    # 编码器抖动：每个真实事件之后可能出现若干反向事件
+    bounce = rng.random(len(times)) < model.bounce_probability
+    sources = np.flatnonzero(bounce)
+    if len(sources):
+        counts = rng.geometric(1.0 - model.bounce_repeat, len(sources))
+        owner = np.repeat(sources, counts)
+        delays = (rng.exponential(model.bounce_delay, len(owner)) * NS_PER_SECOND).astype(np.int64) + 1
+        # 同一源事件的多个抖动依次累积延迟
+        group_start = np.repeat(np.cumsum(counts) - counts, counts)
+        cumulative = np.cumsum(delays)
+        delays = cumulative - np.concatenate(([0], cumulative))[group_start]
+        bounce_times = times[owner] + delays
+        bounce_deltas = -deltas[owner]
+
+        is_jitter = np.concatenate((np.zeros(len(times), bool), np.ones(len(owner), bool)))
+        times = np.concatenate((times, bounce_times))
+        deltas = np.concatenate((deltas, bounce_deltas))
+        order = np.argsort(times, kind='stable')
+        times, deltas, is_jitter = times[order], deltas[order], is_jitter[order]
+    else:
+        is_jitter = np.zeros(len(times), bool)
+
+    stream = WheelStream(times[:n], deltas[:n], is_jitter[:n])
+    if len(stream) < n:
+        # 随机波动导致数量不足时，接着生成剩余部分
+        real = stream.deltas[~stream.is_jitter]
+        rest = generate(model, n - len(stream), rng.integers(1 << 63),
+                        int(stream.timestamps[-1]) + int(model.idle_gap * NS_PER_SECOND),
+                        1 if len(real) == 0 or real[-1] > 0 else -1)
+        stream = WheelStream.concatenate((stream, rest))
+    return stream
+
+
+def generate_chunks(model, n, chunk_size=10_000_000, seed=0):
+    """按块生成 n 个事件，块之间时间和方向连续；每块使用独立派生的随机种子"""
+    seeds = np.random.SeedSequence(seed).spawn((n + chunk_size - 1) // chunk_size)
+    start_ns = 0
+    start_direction = 1
+    remaining = n
+    for chunk_seed in seeds:
+        size = min(chunk_size, remaining)
+        stream = generate(model, size, chunk_seed, start_ns, start_direction)
+        yield stream
+        remaining -= size
+        real = stream.deltas[~stream.is_jitter]
+        if len(real):
+            start_direction = 1 if real[-1] > 0 else -1
+        start_ns = int(stream.timestamps[-1]) + int(model.idle_gap * NS_PER_SECOND)
+
+
+# =========================
+# Trace Files
+# =========================
+def to_records(stream):
+    """WheelStream -> 与 trace 文件相同布局的结构化数组，decision 为理想决策"""
+    records = np.zeros(len(stream), TRACE_DTYPE)
+    records['timestamp'] = stream.timestamps
+    records['wheel_data'] = (stream.deltas.astype(np.int64) & 0xFFFF) << 16
+    records['decision'] = np.where(stream.is_jitter, BLOCK, ALLOW)
+    return records
+
+
+def write_trace(path, streams):
+    """把一个或多个 WheelStream 写成 trace 文件，返回事件总数"""
+    if isinstance(streams, WheelStream):
+        streams = [streams]
+    total = 0
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size, 0))
+        for stream in streams:
+            to_records(stream).tofile(f)
+            total += len(stream)
+    return total
+
+
+def load_trace(path):
+    """以 memmap 方式读取 trace 文件，返回 (timestamps, deltas, decisions) 数组视图"""
+    from scroll_trace import read_header
+    count = read_header(path)
+    records = np.memmap(path, TRACE_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+    deltas = (records['wheel_data'] >> 16).astype(np.uint16).view(np.int16).astype(np.int32)
+    return records['timestamp'], deltas, records['decision']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成合成滚轮事件 trace")
+    parser.add_argument("output", help="输出 trace 文件")
+    parser.add_argument("-n", "--events", type=int, default=1_000_000, help="事件数")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="typical", help="参数模型")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--chunk", type=int, default=10_000_000, help="每块事件数")
+    args = parser.parse_args(argv)
+
+    model = PRESETS[args.preset]
+    started = time.perf_counter()
+    jitter = 0
+
+    def counted(chunks):
+        nonlocal jitter
+        for stream in chunks:
+            jitter += int(stream.is_jitter.sum())
+            yield stream
+
+    total = write_trace(args.output, counted(generate_chunks(model, args.events, args.chunk, args.seed)))
+    elapsed = time.perf_counter() - started
+    print(f"模型: {model!r}")
+    print(f"事件数: {total}，其中抖动: {jitter} ({jitter / max(1, total):.2%})")
+    print(f"耗时: {elapsed:.2f} 秒 ({total / elapsed / 1e6:.1f} M 事件/秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# =========================
+# Wheel Event Traces
+# =========================
+# 滚轮事件的二进制记录与回放。
+#
+# 文件格式（小端）：
+#   文件头 16 字节: magic "MSSTRACE", 版本号 u16, 单条记录长度 u16, 保留 u32
+#   记录 20 字节:   timestamp_ns i64, wheel_data u32, flags u32, decision u8, 填充 3 字节
+#   wheel_data 的高 16 位为有符号滚动量（与 mouseData 的 HIWORD 相同），低 16 位为 0：
+#   EventRing 只保存滚动量，记录的不是原始 mouseData（WM_MOUSEWHEEL 的低 16 位本就是保留字段）。
+#
+# 记录：MouseHook 把事件写入 EventRing，pipeline_sinks.TraceSink 在 sink 线程中批量读取并缓冲写入文件，
+#       钩子线程不做任何文件操作。
+# 回放：python scroll_trace.py replay trace.bin [--interval 0.5] [--threshold 3]
+#       用 mmap 读取文件，逐条送入与 hook_proc 相同的 ScrollFilter，统计放行/拦截数和决策差异。
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+
+from scroll_filter import ScrollFilter, ALLOW
+
+TRACE_MAGIC = b"MSSTRACE"
+TRACE_VERSION = 1
+HEADER = struct.Struct('<8sHHI')
+RECORD = struct.Struct('<qIIB3x')
+# 与 RECORD 相同的布局，但直接把 wheel_data 的高 16 位解成有符号滚动量，回放时省去逐条转换
+REPLAY_RECORD = struct.Struct('<q2xhIB3x')
+
+
+class TraceFormatError(ValueError):
+    """trace 文件格式不正确"""
+
+
+def delta_to_wheel_data(delta):
+    """有符号滚动量 -> wheel_data（高 16 位为滚动量）"""
+    return (delta & 0xFFFF) << 16
+
+
+def wheel_data_to_delta(wheel_data):
+    """wheel_data -> 有符号滚动量"""
+    delta = (wheel_data >> 16) & 0xFFFF
+    return delta - 0x10000 if delta & 0x8000 else delta
+
+
+# =========================
+# Recording
+# =========================
+class TraceWriter:
+    """把事件缓冲后追加写入 trace 文件"""
+
+    def __init__(self, path, buffer_records=4096):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            read_header(path)
+            # 上次异常退出时可能留下半条记录，截掉后再追加，否则之后的记录全部错位
+            size = os.path.getsize(path)
+            partial = (size - HEADER.size) % RECORD.size
+            if partial:
+                os.truncate(path, size - partial)
+                print(f"trace 文件末尾有不完整的记录，已截掉 {partial} 字节: {path}")
+        self.file = open(path, 'ab')
+        if new_file:
+            self.file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size, 0))
+        self.buffer = bytearray(RECORD.size * buffer_records)
+        self.buffer_records = buffer_records
+        self.pending = 0
+        self.records_written = 0
+
+    def write(self, timestamp, wheel_data, flags, decision):
+        """追加一条记录"""
+        RECORD.pack_into(self.buffer, self.pending * RECORD.size, timestamp, wheel_data, flags, decision)
+        self.pending += 1
+        if self.pending == self.buffer_records:
+            self.flush()
+
+    def write_from_reader(self, reader, n):
+        """追加 EventRingReader 本批读取到的 n 个事件"""
+        timestamps, deltas, flags, decisions = reader.timestamps, reader.deltas, reader.flags, reader.decisions
+        for i in range(n):
+            self.write(timestamps[i], delta_to_wheel_data(deltas[i]), flags[i], decisions[i])
+
+    def flush(self):
+        if self.pending:
+            self.file.write(memoryview(self.buffer)[:self.pending * RECORD.size])
+            self.records_written += self.pending
+            self.pending = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+# =========================
+# Reading / Replay
+# =========================
+def read_header(path):
+    """校验文件头，返回记录条数"""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise TraceFormatError(f"{path}: 文件过短")
+    magic, version, record_size, _ = HEADER.unpack(header)
+    if magic != TRACE_MAGIC:
+        raise TraceFormatError(f"{path}: 不是滚轮 trace 文件")
+    if version != TRACE_VERSION or record_size != RECORD.size:
+        raise TraceFormatError(f"{path}: 不支持的版本 {version}（记录长度 {record_size}）")
+    return (os.path.getsize(path) - HEADER.size) // RECORD.size
+
+
+class TraceFile:
+    """以 mmap 方式只读打开 trace 文件，records 为所有完整记录的 memoryview"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = read_header(path)
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        end = HEADER.size + self.count * RECORD.size
+        self.records = memoryview(self._mmap)[HEADER.size:end]
+
+    def __iter__(self):
+        """逐条返回 (timestamp, wheel_data, flags, decision)"""
+        return RECORD.iter_unpack(self.records)
+
+    def close(self):
+        self.records.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(path, block_interval=0.5, direction_change_threshold=3, enabled=True, max_diffs=20):
+    """把 trace 文件送入 ScrollFilter，返回统计结果和决策差异"""
+    scroll_filter = ScrollFilter(block_interval, direction_change_threshold, enabled)
+    feed = scroll_filter.feed
+    diffs = 0
+    examples = []
+
+    started = time.perf_counter()
+    with TraceFile(path) as trace:
+        index = 0
+        for timestamp, delta, _flags, recorded in REPLAY_RECORD.iter_unpack(trace.records):
+            decision = feed(delta, timestamp)
+            if decision != recorded:
+                diffs += 1
+                if len(examples) < max_diffs:
+                    examples.append((index, timestamp, delta, recorded, decision))
+            index += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        "events": index,
+        "allowed": scroll_filter.total_events,
+        "blocked": scroll_filter.blocked_events,
+        "diffs": diffs,
+        "examples": examples,
+        "elapsed": elapsed,
+    }
+
+
+def _decision_name(decision):
+    return "allow" if decision == ALLOW else "block"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="滚轮事件 trace 工具")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    info_parser = commands.add_parser("info", help="显示 trace 文件概况")
+    info_parser.add_argument("trace")
+
+    replay_parser = commands.add_parser("replay", help="用指定参数回放 trace 文件")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--interval", type=float, default=0.5, help="时间阈值（秒）")
+    replay_parser.add_argument("--threshold", type=int, default=3, help="方向改变阈值")
+    replay_parser.add_argument("--disabled", action="store_true", help="模拟关闭拦截")
+    replay_parser.add_argument("--max-diffs", type=int, default=20, help="最多列出的差异条数")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "info":
+            with TraceFile(args.trace) as trace:
+                print(f"事件数: {trace.count}")
+                if trace.count:
+                    first = RECORD.unpack_from(trace.records, 0)[0]
+                    last = RECORD.unpack_from(trace.records, (trace.count - 1) * RECORD.size)[0]
+                    print(f"时长: {(last - first) / 1e9:.3f} 秒")
+            return 0
+
+        result = replay(args.trace, args.interval, args.threshold, not args.disabled, args.max_diffs)
+    except (OSError, TraceFormatError) as e:
+        print(f"读取 trace 失败: {e}", file=sys.stderr)
+        return 1
+
+    events = result["events"]
+    elapsed = result["elapsed"]
+    print(f"事件数: {events}")
+    print(f"放行: {result['allowed']}")
+    print(f"拦截: {result['blocked']}")
+    print(f"决策差异: {result['diffs']}")
+    for index, timestamp, delta, recorded, decision in result["examples"]:
+        print(f"  #{index} t={timestamp} delta={delta:+d} 记录={_decision_name(recorded)} 回放={_decision_name(decision)}")
+    if elapsed > 0:
+        print(f"耗时: {elapsed:.3f} 秒 ({events / elapsed / 1e6:.2f} M 事件/秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
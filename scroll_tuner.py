@@ -0,0 +1,301 @@
+# =========================
+# Offline Parameter Tuner
+# =========================
+# 用带标签的 trace 对 block_interval × direction_change_threshold 整个参数网格打分，
+# 输出误拦截率 / 漏过抖动率、帕累托前沿和推荐参数，并可直接写入 Settings.ini。
+#
+# 向量化思路：把事件流按方向切成"同向段"。对 ScrollFilter 而言：
+#   - 与当前方向相同的段总是全部放行；
+#   - 与当前方向相反的段 i（前一段最后一个事件时间为 L_i，段长 m_i），
+#     拦截窗口 w_i = interval × min(h_i, WHEEL_DELTA) / WHEEL_DELTA，h_i 为当前方向确定以来该方向的累计滚动量，
+#     设 c_i 为段内满足 t - L_i < w_i 的前缀事件数，k_i 为段内累计滚动量首次达到 threshold 格的事件序号，
+#     则该段前 b_i = min(c_i, k_i-1) 个事件被拦截，当 k_i <= m_i 或 c_i < m_i 时方向切换（sw_i）；
+#   - 段 i 是否为反向段只取决于上一段是否被"接受"：acc_i = sw_i or not acc_{i-1}，
+#     即从最近一次切换开始交替，可以用 maximum.accumulate 一次算出；
+#   - h_i 等于最近一次切换的段 s 中切换事件之后的滚动量，加上 s 与 i 之间所有被接受段的滚动量
+#     （被接受段与 s 同奇偶，用按奇偶分开的前缀和相减即可）。
+# 因此每个 interval 只需一次 searchsorted，所有 threshold 在同一个二维数组里同时计算
+# （k_i 与 interval 无关，每块只算一次），结果与逐事件运行 ScrollFilter 完全一致。
+# 普通滚轮每个事件至少一格，h_i 总是不小于 WHEEL_DELTA，w_i = interval，一遍即可；
+# 有不足一格的事件时 h_i 又取决于切换位置，从 w_i = interval 开始迭代到 h_i 不再变化
+# （h_i 只依赖前面的段，每一遍至少多确定一段，实际两三遍就收敛），只对窗口被缩短的段重新 searchsorted。
+#
+# 用法:
+#   python scroll_tuner.py trace1.bin [trace2.bin ...] [--labels decision|heuristic]
+#                          [--false-block-weight 3] [--max-false-block 0.005] [--write [Settings.ini]]
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from scroll_filter import WHEEL_DELTA
+from scroll_synth import load_trace
+from scroll_trace import TraceFormatError
+from settings import Settings
+
+NS_PER_SECOND = 1_000_000_000
+
+# 与设置界面中两个输入框的范围一致
+DEFAULT_INTERVALS = np.round(np.arange(0.05, 2.0 + 1e-9, 0.05), 2)
+DEFAULT_THRESHOLDS = np.arange(1, 11)
+
+
+class GridResult:
+    """参数网格的评估结果，计数数组形状均为 (len(intervals), len(thresholds))"""
+
+    def __init__(self, intervals, thresholds):
+        self.intervals = np.asarray(intervals, dtype=float)
+        self.thresholds = np.asarray(thresholds, dtype=np.int64)
+        shape = (len(self.intervals), len(self.thresholds))
+        self.blocked = np.zeros(shape, np.int64)
+        self.false_blocks = np.zeros(shape, np.int64)
+        self.leaked = np.zeros(shape, np.int64)
+        self.events = 0
+        self.jitter = 0
+
+    def add(self, other):
+        self.blocked += other.blocked
+        self.false_blocks += other.false_blocks
+        self.leaked += other.leaked
+        self.events += other.events
+        self.jitter += other.jitter
+
+    @property
+    def false_block_rate(self):
+        """误拦截的正常事件 / 正常事件"""
+        return self.false_blocks / max(1, self.events - self.jitter)
+
+    @property
+    def leak_rate(self):
+        """漏过的抖动事件 / 抖动事件"""
+        return self.leaked / max(1, self.jitter)
+
+    def pareto_front(self):
+        """返回帕累托前沿上的 (interval, threshold, 误拦截率, 漏过率)，按误拦截率排序"""
+        fb = self.false_block_rate.ravel()
+        lk = self.leak_rate.ravel()
+        order = np.lexsort((lk, fb))
+        front = []
+        best_leak = np.inf
+        for flat in order:
+            if lk[flat] < best_leak:
+                best_leak = lk[flat]
+                i, j = np.unravel_index(flat, self.blocked.shape)
+                front.append((float(self.intervals[i]), int(self.thresholds[j]), float(fb[flat]), float(lk[flat])))
+        return front
+
+    def recommend(self, false_block_weight=3.0, max_false_block=None):
+        """代价 漏过率 + false_block_weight × 误拦截率 最小的参数
+
+        误拦截（吞掉正常滚动）比漏过抖动更影响使用，因此默认权重更高；
+        max_false_block 可以再加一个误拦截率的硬上限。相同代价时取更短的时间阈值和更小的次数阈值。
+        """
+        cost = self.leak_rate + false_block_weight * self.false_block_rate
+        if max_false_block is not None:
+            cost = np.where(self.false_block_rate <= max_false_block, cost, np.inf)
+            if not np.isfinite(cost).any():
+                cost = self.false_block_rate
+        # argmin 返回第一个最小值，即按 (interval, threshold) 从小到大的第一个
+        i, j = np.unravel_index(int(np.argmin(cost)), cost.shape)
+        return float(self.intervals[i]), int(self.thresholds[j])
+
+
+def run_table(timestamps, deltas):
+    """把事件流切成同向段，返回 (段起点, 段长, 上一段最后事件的时间)"""
+    direction = deltas > 0
+    n = len(direction)
+    starts = np.concatenate(([0], np.flatnonzero(direction[1:] != direction[:-1]) + 1))
+    lengths = np.diff(np.append(starts, n))
+    previous_end = np.empty(len(starts), np.int64)
+    previous_end[0] = timestamps[0]
+    previous_end[1:] = timestamps[starts[1:] - 1]
+    return starts, lengths, previous_end
+
+
+def evaluate(timestamps, deltas, is_jitter, intervals=DEFAULT_INTERVALS,
+             thresholds=DEFAULT_THRESHOLDS, chunk_runs=1_000_000):
+    """对一段事件流评估整个参数网格"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    deltas = np.asarray(deltas)
+    is_jitter = np.asarray(is_jitter, dtype=bool)
+    result = GridResult(intervals, thresholds)
+    result.events = len(timestamps)
+    result.jitter = int(is_jitter.sum())
+    if result.events == 0:
+        return result
+
+    starts, lengths, previous_end = run_table(timestamps, deltas)
+    cumulative_jitter = np.concatenate(([0], np.cumsum(is_jitter, dtype=np.int64)))
+    travel = np.abs(deltas.astype(np.int64))
+    cumulative_travel = np.concatenate(([0], np.cumsum(travel)))
+    run_travel = cumulative_travel[starts + lengths] - cumulative_travel[starts]
+    # 全部是整格事件时拦截窗口恒为 interval，不需要迭代
+    sub_notch = bool((travel < WHEEL_DELTA).any())
+    interval_ns = np.round(result.intervals * NS_PER_SECOND).astype(np.int64)
+    threshold_col = result.thresholds[:, None]
+    jitter_blocked = np.zeros_like(result.blocked)
+    # 每个 interval、每个 threshold 在上一块结束时的状态：最后一段是否被接受、当前方向的累计滚动量
+    previous_accepted = np.zeros(result.blocked.shape, bool)
+    previous_travel = np.zeros(result.blocked.shape, np.int64)
+    rows = np.arange(len(threshold_col))[:, None]
+
+    for lo in range(0, len(starts), chunk_runs):
+        hi = min(lo + chunk_runs, len(starts))
+        run_start = starts[lo:hi]
+        run_length = lengths[lo:hi]
+        run_end = previous_end[lo:hi]
+        positions = np.arange(hi - lo)
+
+        # 段内累计滚动量达到 threshold 格的事件序号（从 1 开始，达不到时大于段长）
+        target = cumulative_travel[run_start] + threshold_col * WHEEL_DELTA
+        reach = np.searchsorted(cumulative_travel, target, side='left') - run_start
+        # 块内按奇偶分开的段滚动量前缀和（含本段）
+        parity_sum = run_travel[lo:hi].copy()
+        parity_sum[2:] = 0
+        for parity in (0, 1):
+            parity_sum[parity::2] = np.cumsum(run_travel[lo + parity:hi:2])
+
+        for a, interval in enumerate(interval_ns):
+            # 段内在完整拦截窗口内的前缀事件数（与 threshold 无关）
+            full_inside = np.searchsorted(timestamps, run_end + interval, side='left') - run_start
+            full_inside = np.clip(full_inside, 0, run_length)
+            inside = full_inside
+            hold = None
+            while True:
+                switched = (reach <= run_length) | (inside < run_length)
+                # 用虚拟的最近切换位置表示上一块结束时的状态
+                if lo == 0:
+                    switched[:, 0] = True
+                    virtual = np.full((len(threshold_col), 1), -1)
+                else:
+                    virtual = np.where(previous_accepted[a], -1, -2)[:, None]
+                last_switch = np.maximum.accumulate(np.where(switched, positions, virtual), axis=1)
+                accepted = ((positions - last_switch) & 1) == 0
+
+                opposite = np.empty_like(accepted)
+                opposite[:, 1:] = accepted[:, :-1]
+                opposite[:, 0] = False if lo == 0 else previous_accepted[a]
+                prefix = np.minimum(inside, reach - 1)
+                if lo == 0:
+                    prefix[:, 0] = 0
+                if not sub_notch:
+                    break
+
+                # 方向确定以来的滚动量：只有反向段的切换才重新确定方向
+                is_set = switched & (opposite | (positions == 0) & (lo == 0))
+                last_set = np.maximum.accumulate(np.where(is_set, positions, -1), axis=1)
+                after_set = cumulative_travel[run_start + run_length] - cumulative_travel[run_start + prefix]
+                set_at = np.maximum(last_set, 0)
+                direction_travel = np.where(
+                    last_set >= 0,
+                    parity_sum - parity_sum[set_at] + after_set[rows, set_at],
+                    previous_travel[a][:, None] + parity_sum)
+                self_travel = np.minimum(direction_travel, WHEEL_DELTA)
+
+                new_hold = np.full(reach.shape, WHEEL_DELTA, np.int64)
+                new_hold[:, 1:] = self_travel[:, :-1]
+                if lo > 0:
+                    new_hold[:, 0] = np.minimum(previous_travel[a], WHEEL_DELTA)
+                new_hold = np.where(opposite, new_hold, WHEEL_DELTA)
+                if hold is None:
+                    if (new_hold == WHEEL_DELTA).all():
+                        break
+                elif np.array_equal(new_hold, hold):
+                    break
+                hold = new_hold
+                # 只有窗口被缩短的段需要重新查找
+                shrunk = np.nonzero(hold < WHEEL_DELTA)
+                inside = np.broadcast_to(full_inside, hold.shape).copy()
+                window = interval * hold[shrunk] // WHEEL_DELTA
+                column = shrunk[1]
+                inside[shrunk] = np.clip(
+                    np.searchsorted(timestamps, run_end[column] + window, side='left') - run_start[column],
+                    0, run_length[column])
+
+            if sub_notch:
+                # 块内最后一个被接受段的方向滚动量，带到下一块
+                last = np.where(accepted[:, -1], len(positions) - 1, len(positions) - 2)
+                carried = self_travel[rows[:, 0], np.maximum(last, 0)]
+                previous_travel[a] = np.where(last >= 0, carried, previous_travel[a])
+            previous_accepted[a] = accepted[:, -1]
+
+            blocked = np.where(opposite, prefix, 0)
+            result.blocked[a] += blocked.sum(axis=1)
+            jitter_blocked[a] += (cumulative_jitter[run_start + blocked] - cumulative_jitter[run_start]).sum(axis=1)
+
+    result.false_blocks = result.blocked - jitter_blocked
+    result.leaked = result.jitter - jitter_blocked
+    return result
+
+
+def heuristic_labels(timestamps, deltas, max_run=2, max_gap=0.04):
+    """没有真实标签的录制数据：把夹在两段同向滚动之间、前后间隔都很短的短反向段视为抖动"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    starts, lengths, previous_end = run_table(timestamps, deltas)
+    max_gap_ns = int(max_gap * NS_PER_SECOND)
+    ends = starts + lengths - 1
+    next_start = np.empty(len(starts), np.int64)
+    next_start[:-1] = timestamps[starts[1:]]
+    next_start[-1] = np.iinfo(np.int64).max
+    jitter_run = ((lengths <= max_run)
+                  & (timestamps[starts] - previous_end < max_gap_ns)
+                  & (next_start - timestamps[ends] < max_gap_ns))
+    jitter_run[0] = False
+    return np.repeat(jitter_run, lengths)
+
+
+def write_settings(interval, threshold, path=None):
+    """把推荐参数写入 Settings.ini"""
+    settings = Settings(path)
+    settings.set_interval(interval)
+    settings.set_direction_change_threshold(threshold)
+    settings.sync()
+    return settings.file_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="根据 trace 推荐时间阈值和方向改变阈值")
+    parser.add_argument("traces", nargs="+", help="trace 文件")
+    parser.add_argument("--labels", choices=("decision", "heuristic"), default="decision",
+                        help="decision: 使用文件中的 decision 字段作为真实标签（合成数据）；"
+                             "heuristic: 按短反向段推断标签（录制数据）")
+    parser.add_argument("--false-block-weight", type=float, default=3.0, help="误拦截相对漏过抖动的权重")
+    parser.add_argument("--max-false-block", type=float, default=None, help="允许的最大误拦截率（可选）")
+    parser.add_argument("--write", nargs="?", const="", default=None, metavar="INI",
+                        help="把推荐参数写入配置文件（省略路径时写入默认的 config/Settings.ini）")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    total = GridResult(DEFAULT_INTERVALS, DEFAULT_THRESHOLDS)
+    for path in args.traces:
+        try:
+            timestamps, deltas, decisions = load_trace(path)
+        except (OSError, TraceFormatError) as e:
+            print(f"读取 trace 失败: {e}", file=sys.stderr)
+            return 1
+        labels = decisions.astype(bool) if args.labels == "decision" else heuristic_labels(timestamps, deltas)
+        total.add(evaluate(timestamps, deltas, labels))
+    elapsed = time.perf_counter() - started
+
+    print(f"事件数: {total.events}，抖动: {total.jitter}，"
+          f"网格: {len(total.intervals)}×{len(total.thresholds)}，耗时 {elapsed:.2f} 秒")
+    print("帕累托前沿 (时间阈值, 次数阈值, 误拦截率, 漏过率):")
+    for interval, threshold, fb, lk in total.pareto_front():
+        print(f"  {interval:5.2f}s  {threshold:2d}  {fb:8.4%}  {lk:8.4%}")
+
+    interval, threshold = total.recommend(args.false_block_weight, args.max_false_block)
+    i = int(np.argmin(np.abs(total.intervals - interval)))
+    j = int(np.flatnonzero(total.thresholds == threshold)[0])
+    print(f"推荐: block_interval={interval:.2f}  direction_change_threshold={threshold}  "
+          f"(误拦截率 {total.false_block_rate[i, j]:.4%}，漏过率 {total.leak_rate[i, j]:.4%})")
+
+    if args.write is not None:
+        path = write_settings(interval, threshold, args.write or None)
+        print(f"已写入: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
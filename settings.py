@@ -0,0 +1,473 @@
+import configparser
+import io
+import os
+import sys
+import threading
+import time
+from types import MappingProxyType
+
+from scroll_clock import CLOCKS
+from scroll_adaptive import AdaptiveBounds
+from scroll_coalesce import COALESCE_MAX_MS
+from scroll_filter import FilterConfig
+
+# 按前台进程选择的配置档案：[profile:<exe>] 节，未写的项沿用 [General]
+PROFILE_PREFIX = "profile:"
+
+# =========================
+# Custom INI Settings Class
+# =========================
+class IniSettings:
+    def __init__(self, org_name, app_name, file_path=None, save_delay=0.3):
+        # 修复打包后的路径问题
+        if getattr(sys, 'frozen', False):
+            # 打包后的情况
+            base_path = os.path.dirname(sys.executable)
+        else:
+            # 开发时的情况
+            base_path = os.path.dirname(os.path.abspath(__file__))
+            
+        # file_path 可以指定其他配置文件（测试、压测时使用）
+        self.file_path = file_path or os.path.join(base_path, "config", f"{app_name}.ini")
+        self.config = configparser.ConfigParser()
+        # config 可能同时被界面线程、钩子线程和后台写入线程访问
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._written = None  # 最近一次写入（或读取）的文件内容，用于跳过无变化的写入
+        self.save_delay = save_delay
+        self._writer = None
+        # 每次修改配置值加一，用于判断快照是否过期
+        self.version = 0
+        self._load_settings()
+
+    def _load_settings(self):
+        # 确保目录存在
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        
+        if os.path.exists(self.file_path):
+            with open(self.file_path, encoding='utf-8') as f:
+                text = f.read()
+            self.config.read_string(text, source=self.file_path)
+            self._written = text
+        else:
+            # 如果文件不存在，创建默认配置
+            self._create_default_config()
+
+    def _create_default_config(self):
+        """创建默认配置文件"""
+        # 添加默认配置节
+        if not self.config.has_section('General'):
+            self.config.add_section('General')
+        
+        # 设置默认值
+        self.config.set('General', 'block_interval', '0.5')
+        self.config.set('General', 'direction_change_threshold', '3')
+        self.config.set('General', 'enabled', 'True')
+        self.config.set('General', 'start_on_boot', 'False')
+        self.config.set('General', 'language', 'zh_CN')
+        self.config.set('General', 'latency_budget_us', '1000')
+        self.config.set('General', 'timestamp_source', 'event')
+        self.config.set('General', 'trace_path', '')
+        self.config.set('General', 'metrics_port', '0')
+        self.config.set('General', 'history_path', 'history.bin')
+        self.config.set('General', 'adaptive', 'False')
+        self.config.set('General', 'adaptive_min_interval', '0.05')
+        self.config.set('General', 'adaptive_max_interval', '1.0')
+        self.config.set('General', 'adaptive_min_threshold', '2')
+        self.config.set('General', 'adaptive_max_threshold', '6')
+        self.config.set('General', 'coalesce_ms', '0')
+        
+        # 保存配置
+        self.sync()
+
+    def value(self, key, default=None, type=None):
+        with self._lock:
+            return self._value(key, default, type)
+
+    def _value(self, key, default, type):
+        section, option = self._parse_key(key)
+        
+        # 如果节不存在，创建它
+        if not self.config.has_section(section):
+            self.config.add_section(section)
+            
+        if self.config.has_option(section, option):
+            val = self.config.get(section, option)
+            if type == int:
+                return int(val)
+            elif type == float:
+                return float(val)
+            elif type == bool:
+                return val.lower() == 'true'
+            return val
+        
+        # 如果选项不存在，设置默认值
+        if default is not None:
+            self.setValue(key, default)
+            return default
+            
+        return default
+
+    def setValue(self, key, value):
+        section, option = self._parse_key(key)
+        value = str(value)
+        with self._lock:
+            if not self.config.has_section(section):
+                self.config.add_section(section)
+            elif self.config.get(section, option, fallback=None) == value:
+                return
+            self.config.set(section, option, value)
+            self.version += 1
+
+    def _parse_key(self, key):
+        if '/' in key:
+            parts = key.split('/')
+            return parts[0], parts[1]
+        return 'General', key
+
+    def sync(self):
+        """立即在当前线程写入，内容未变化时跳过；返回是否写入了文件"""
+        with self._lock:
+            buffer = io.StringIO()
+            self.config.write(buffer)
+        return self._write(buffer.getvalue())
+
+    def _write(self, text):
+        """先写临时文件再替换，写入中途崩溃不会留下截断的配置文件"""
+        with self._write_lock:
+            if text == self._written:
+                return False
+            # 确保目录存在
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            temp_path = self.file_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as configfile:
+                configfile.write(text)
+                configfile.flush()
+                os.fsync(configfile.fileno())
+            os.replace(temp_path, self.file_path)
+            self._written = text
+            return True
+
+    def reload(self):
+        """重新读取配置文件（外部修改），返回配置是否发生了变化
+
+        文件内容与本程序最近一次读写的内容相同时不做任何事；
+        解析失败时保留当前配置。
+        """
+        try:
+            with open(self.file_path, encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return False
+        with self._write_lock:
+            if text == self._written:
+                return False
+            config = configparser.ConfigParser()
+            try:
+                config.read_string(text, source=self.file_path)
+            except configparser.Error as e:
+                print(f"配置文件解析失败，保留当前配置: {e}")
+                return False
+            self._written = text
+        with self._lock:
+            self.config = config
+            self.version += 1
+        return True
+
+    def save_later(self):
+        """在后台线程保存：save_delay 秒内的多次修改合并为一次写入"""
+        with self._lock:
+            if self._writer is None:
+                self._writer = SettingsWriter(self, self.save_delay)
+                self._writer.start()
+            self._writer.schedule()
+
+    def flush(self):
+        """停止后台写入线程，并立即写入尚未保存的修改（退出前调用）"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.stop()
+        return self.sync()
+
+
+class SettingsWriter(threading.Thread):
+    """后台写入线程：第一次修改后等待 delay 秒，把这段时间内的修改一次写入"""
+
+    def __init__(self, settings, delay):
+        super().__init__(name="SettingsWriter", daemon=True)
+        self.settings = settings
+        self.delay = delay
+        self._condition = threading.Condition()
+        self._due = None  # 计划写入的时间（time.monotonic），None 表示没有待写入的修改
+        self._stopping = False
+
+    def schedule(self):
+        with self._condition:
+            if self._due is None:
+                self._due = time.monotonic() + self.delay
+                self._condition.notify()
+
+    def stop(self, timeout=None):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self.join(timeout)
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    if self._due is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._due - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stopping:
+                    return
+                self._due = None
+            try:
+                self.settings.sync()
+            except OSError as e:
+                print(f"保存配置失败: {e}")
+
+# ===============
+# Settings Snapshot
+# ===============
+class SettingsSnapshot:
+    """钩子使用的配置快照：创建时完成解析和校验，之后不可修改
+
+    version 为创建时 Settings.version 的值。配置变化时由界面线程创建新快照，
+    钩子只需替换一次引用，回调中不再解析字符串。
+    profiles 为 {可执行文件名（小写）: FilterConfig} 的只读映射。
+    adaptive 为自适应模式的参数范围（AdaptiveBounds），未开启时为 None。
+    coalesce_ms 为放行事件的合并窗口（毫秒，见 scroll_coalesce.py），0 为关闭。
+    """
+
+    __slots__ = ("version", "filter", "profiles", "timestamp_source", "latency_budget_us", "trace_path", "adaptive",
+                 "coalesce_ms")
+
+    def __init__(self, version, filter, timestamp_source, latency_budget_us, trace_path, profiles=None,
+                 adaptive=None, coalesce_ms=0.0):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "filter", filter)
+        object.__setattr__(self, "profiles", MappingProxyType(dict(profiles or {})))
+        object.__setattr__(self, "timestamp_source", timestamp_source)
+        object.__setattr__(self, "latency_budget_us", latency_budget_us)
+        object.__setattr__(self, "trace_path", trace_path)
+        object.__setattr__(self, "adaptive", adaptive)
+        object.__setattr__(self, "coalesce_ms", coalesce_ms)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def filter_for(self, exe):
+        """前台进程对应的过滤器配置，没有配置档案时使用 [General]"""
+        return self.profiles.get(exe, self.filter) if exe else self.filter
+
+    def compatible_with(self, other):
+        """时间源相同时，过滤器的方向和连续反向计数可以沿用"""
+        return other is not None and self.timestamp_source == other.timestamp_source
+
+    def __repr__(self):
+        return (f"SettingsSnapshot(version={self.version}, filter={self.filter!r}, profiles={dict(self.profiles)!r}, "
+                f"timestamp_source={self.timestamp_source!r}, latency_budget_us={self.latency_budget_us}, "
+                f"trace_path={self.trace_path!r}, adaptive={self.adaptive!r}, coalesce_ms={self.coalesce_ms!r})")
+
+
+# ===============
+# App Settings
+# ===============
+class Settings(IniSettings):
+    def __init__(self, file_path=None):
+        self._snapshot = None
+        super().__init__("ScrollLockApp", "Settings", file_path)
+
+    def snapshot(self) -> SettingsSnapshot:
+        """返回当前配置的快照，配置未变化时返回同一个对象
+
+        无法解析或超出范围的值使用默认值（与设置界面的输入范围一致）。
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == self.version:
+                return snapshot
+
+            interval = self._checked(self.get_interval, 0.50, lambda v: 0.0 < v <= 60.0)
+            threshold = self._checked(self.get_direction_change_threshold, 3, lambda v: 1 <= v <= 100)
+            enabled = self._checked(self.get_enabled, True)
+            clock = self._checked(self.get_timestamp_source, "event", lambda v: v in CLOCKS)
+            budget = self._checked(self.get_latency_budget_us, 1000, lambda v: v > 0)
+            trace_path = self.get_trace_path()
+            coalesce_ms = self._checked(self.get_coalesce_ms, 0.0, lambda v: 0.0 <= v <= COALESCE_MAX_MS)
+
+            profiles = {}
+            for section in self.config.sections():
+                if not section.startswith(PROFILE_PREFIX):
+                    continue
+                profiles[section[len(PROFILE_PREFIX):].strip().lower()] = FilterConfig(
+                    self._checked(lambda: self._profile_value(section, "block_interval", interval, float),
+                                  interval, lambda v: 0.0 < v <= 60.0),
+                    self._checked(lambda: self._profile_value(section, "direction_change_threshold", threshold, int),
+                                  threshold, lambda v: 1 <= v <= 100),
+                    self._checked(lambda: self._profile_value(section, "enabled", enabled, bool), enabled),
+                )
+
+            adaptive = self._adaptive_bounds()
+
+            # 读取默认值时可能写回配置，version 在所有读取之后取
+            snapshot = SettingsSnapshot(
+                self.version,
+                FilterConfig(interval, threshold, enabled),
+                clock,
+                budget,
+                trace_path,
+                profiles,
+                adaptive,
+                coalesce_ms,
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+    def _adaptive_bounds(self):
+        """自适应模式的参数范围，未开启或范围无效时返回 None"""
+        if not self._checked(self.get_adaptive, False):
+            return None
+        try:
+            return AdaptiveBounds(self.value("adaptive_min_interval", 0.05, type=float),
+                                  self.value("adaptive_max_interval", 1.0, type=float),
+                                  self.value("adaptive_min_threshold", 2, type=int),
+                                  self.value("adaptive_max_threshold", 6, type=int))
+        except ValueError as e:
+            print(f"自适应参数范围无效，使用默认范围: {e}")
+            return AdaptiveBounds()
+
+    @staticmethod
+    def _checked(getter, default, valid=None):
+        try:
+            value = getter()
+        except ValueError as e:
+            print(f"配置值无效，使用默认值 {default!r}: {e}")
+            return default
+        if valid is not None and not valid(value):
+            print(f"配置值超出范围，使用默认值 {default!r}: {value!r}")
+            return default
+        return value
+
+    # Blocking logic
+    def get_interval(self) -> float:
+        return self.value("block_interval", 0.50, type=float)
+
+    def set_interval(self, v: float):
+        self.setValue("block_interval", v)
+
+    def get_direction_change_threshold(self) -> int:
+        return self.value("direction_change_threshold", 3, type=int)
+
+    def set_direction_change_threshold(self, v: int):
+        self.setValue("direction_change_threshold", v)
+
+    # App control
+    def get_enabled(self) -> bool:
+        return self.value("enabled", True, type=bool)
+
+    def set_enabled(self, v: bool):
+        self.setValue("enabled", v)
+        
+    # Startup
+    def get_startup(self) -> bool:
+        return self.value("start_on_boot", False, type=bool)
+
+    def set_startup(self, v: bool):
+        self.setValue("start_on_boot", v)
+        
+    # Language
+    def get_language(self) -> str:
+        return self.value("language", "zh_CN", type=str)
+
+    def set_language(self, v: str):
+        self.setValue("language", v)
+
+    # Hook latency budget (microseconds)
+    def get_latency_budget_us(self) -> int:
+        return self.value("latency_budget_us", 1000, type=int)
+
+    def set_latency_budget_us(self, v: int):
+        self.setValue("latency_budget_us", v)
+
+    # Timestamp source: "event" (MSLLHOOKSTRUCT.time) or "perf_counter"
+    def get_timestamp_source(self) -> str:
+        return self.value("timestamp_source", "event", type=str)
+
+    def set_timestamp_source(self, v: str):
+        self.setValue("timestamp_source", v)
+
+    # Wheel event trace recording (empty = disabled)
+    def get_trace_path(self) -> str:
+        return self.value("trace_path", "", type=str)
+
+    def set_trace_path(self, v: str):
+        self.setValue("trace_path", v)
+
+    # Adaptive mode: learn block_interval / threshold within the adaptive_* bounds
+    def get_adaptive(self) -> bool:
+        return self.value("adaptive", False, type=bool)
+
+    def set_adaptive(self, v: bool):
+        self.setValue("adaptive", v)
+
+    # Coalescing window for allowed wheel events, in milliseconds (0 = disabled, see scroll_coalesce.py)
+    def get_coalesce_ms(self) -> float:
+        return self.value("coalesce_ms", 0.0, type=float)
+
+    def set_coalesce_ms(self, v: float):
+        self.setValue("coalesce_ms", v)
+
+    # Local metrics endpoint port (0 = disabled, see metrics_server.py)
+    def get_metrics_port(self) -> int:
+        return self.value("metrics_port", 0, type=int)
+
+    def set_metrics_port(self, v: int):
+        self.setValue("metrics_port", v)
+
+    # Scroll statistics history (relative to the config directory, empty = disabled)
+    def get_history_path(self) -> str:
+        return self.value("history_path", "history.bin", type=str)
+
+    def set_history_path(self, v: str):
+        self.setValue("history_path", v)
+
+    # Per-application profiles: [profile:<exe>] sections
+    def get_profiles(self) -> list:
+        with self._lock:
+            return [section[len(PROFILE_PREFIX):]
+                    for section in self.config.sections() if section.startswith(PROFILE_PREFIX)]
+
+    def set_profile(self, exe: str, block_interval=None, direction_change_threshold=None, enabled=None):
+        """创建或修改一个配置档案，None 表示沿用 [General] 的值"""
+        section = PROFILE_PREFIX + exe
+        with self._lock:
+            if not self.config.has_section(section):
+                self.config.add_section(section)
+                self.version += 1
+            for option, v in (("block_interval", block_interval),
+                              ("direction_change_threshold", direction_change_threshold),
+                              ("enabled", enabled)):
+                if v is not None:
+                    self.setValue(f"{section}/{option}", v)
+
+    def remove_profile(self, exe: str):
+        with self._lock:
+            if self.config.remove_section(PROFILE_PREFIX + exe):
+                self.version += 1
+
+    def _profile_value(self, section, option, default, type):
+        """读取配置档案中的一项，没有时返回 default（不写回配置）"""
+        if not self.config.has_option(section, option):
+            return default
+        val = self.config.get(section, option)
+        if type == bool:
+            return val.lower() == 'true'
+        return type(val)
@@ -0,0 +1,339 @@
+# =========================
+# Settings File Watcher
+# =========================
+# 监视 config/Settings.ini 的外部修改（集中下发配置、手工编辑），不重启钩子即可生效。
+#
+# 变化检测由系统通知驱动，空闲时后台线程一直阻塞，没有周期性唤醒：
+#   - Linux:   inotify（监视所在目录的 IN_CLOSE_WRITE / IN_MOVED_TO，原子替换也能收到）
+#   - Windows: ReadDirectoryChangesW（重叠 I/O）+ WaitForMultipleObjects，按文件名过滤
+#   - 其他情况（或上面两者初始化失败）退回到按 os.stat 轮询
+# 两者都监视所在目录并只认配置文件本身：同一目录中的 history.bin 等文件频繁写入时不会唤醒监视线程。
+# 一次保存往往产生多个通知，收到通知后等待 settle 秒内不再有新通知才处理。
+#
+# 文件的读取、解析和校验都在监视线程中完成，钩子线程只会看到替换后的新配置快照。
+
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+
+# _wait 的返回值
+CHANGED = 0
+TIMEOUT = 1
+STOPPED = 2
+
+
+class FileWatcher:
+    """在后台线程等待文件变化，变化时调用 callback()"""
+
+    settle = 0.05
+
+    def __init__(self, path, callback):
+        self.path = os.path.abspath(path)
+        self.directory, self.name = os.path.split(self.path)
+        self.callback = callback
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._open()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        if self._thread is None:
+            return
+        self._wake()
+        self._thread.join(timeout)
+        self._thread = None
+        self._close()
+
+    def _run(self):
+        while True:
+            result = self._wait(None)
+            # 合并同一次保存产生的多个通知
+            while result == CHANGED:
+                result = self._wait(self.settle)
+            if result == STOPPED:
+                return
+            try:
+                self.callback()
+            except Exception as e:
+                print(f"处理配置文件变化失败: {e}")
+
+    # 由各平台实现
+    def _open(self):
+        pass
+
+    def _close(self):
+        pass
+
+    def _wait(self, timeout):
+        """阻塞直到文件变化（CHANGED）、超时（TIMEOUT）或 stop（STOPPED），timeout 为 None 时不超时"""
+        raise NotImplementedError
+
+    def _wake(self):
+        raise NotImplementedError
+
+
+class InotifyWatcher(FileWatcher):
+    """Linux inotify，监视所在目录，按文件名过滤"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct("iIII")
+
+    def _open(self):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(self.directory), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, "inotify_add_watch failed", self.directory)
+        self._stop_r, self._stop_w = os.pipe()
+        self._name = os.fsencode(self.name)
+
+    def _close(self):
+        for fd in (self._fd, self._stop_r, self._stop_w):
+            os.close(fd)
+
+    def _wake(self):
+        os.write(self._stop_w, b"x")
+
+    def _wait(self, timeout):
+        while True:
+            readable, _, _ = select.select([self._fd, self._stop_r], [], [], timeout)
+            if self._stop_r in readable:
+                return STOPPED
+            if not readable:
+                return TIMEOUT
+            if self._matches(os.read(self._fd, 4096)):
+                return CHANGED
+
+    def _matches(self, data):
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name == self._name:
+                return True
+        return False
+
+
+# FILE_NOTIFY_INFORMATION: NextEntryOffset, Action, FileNameLength（字节），后接 UTF-16 文件名
+FILE_NOTIFY_INFORMATION = struct.Struct("<III")
+
+
+def notify_names(data):
+    """解析 ReadDirectoryChangesW 返回的 FILE_NOTIFY_INFORMATION 链表，返回文件名列表"""
+    names = []
+    offset = 0
+    while offset + FILE_NOTIFY_INFORMATION.size <= len(data):
+        next_offset, _, length = FILE_NOTIFY_INFORMATION.unpack_from(data, offset)
+        start = offset + FILE_NOTIFY_INFORMATION.size
+        names.append(bytes(data[start:start + length]).decode("utf-16-le", errors="replace"))
+        if not next_offset:
+            break
+        offset += next_offset
+    return names
+
+
+class Win32ChangeWatcher(FileWatcher):
+    """Windows 目录变化通知（ReadDirectoryChangesW），按文件名过滤"""
+
+    FILE_LIST_DIRECTORY = 0x0001
+    FILE_SHARE_ALL = 0x00000007
+    OPEN_EXISTING = 3
+    FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+    FILE_FLAG_OVERLAPPED = 0x40000000
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    INFINITE = 0xFFFFFFFF
+    WAIT_OBJECT_0 = 0
+    WAIT_TIMEOUT = 0x102
+
+    def _open(self):
+        from ctypes import wintypes
+
+        class OVERLAPPED(ctypes.Structure):
+            _fields_ = [
+                ("Internal", ctypes.c_size_t),
+                ("InternalHigh", ctypes.c_size_t),
+                ("Offset", wintypes.DWORD),
+                ("OffsetHigh", wintypes.DWORD),
+                ("hEvent", wintypes.HANDLE),
+            ]
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateFileW.argtypes = [
+            wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, ctypes.c_void_p,
+            wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE]
+        kernel32.CreateFileW.restype = wintypes.HANDLE
+        kernel32.ReadDirectoryChangesW.argtypes = [
+            wintypes.HANDLE, ctypes.c_void_p, wintypes.DWORD, wintypes.BOOL, wintypes.DWORD,
+            ctypes.POINTER(wintypes.DWORD), ctypes.POINTER(OVERLAPPED), ctypes.c_void_p]
+        kernel32.ReadDirectoryChangesW.restype = wintypes.BOOL
+        kernel32.GetOverlappedResult.argtypes = [
+            wintypes.HANDLE, ctypes.POINTER(OVERLAPPED), ctypes.POINTER(wintypes.DWORD), wintypes.BOOL]
+        kernel32.GetOverlappedResult.restype = wintypes.BOOL
+        kernel32.CancelIoEx.argtypes = [wintypes.HANDLE, ctypes.POINTER(OVERLAPPED)]
+        kernel32.CreateEventW.argtypes = [ctypes.c_void_p, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.SetEvent.argtypes = [wintypes.HANDLE]
+        kernel32.ResetEvent.argtypes = [wintypes.HANDLE]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        kernel32.WaitForMultipleObjects.argtypes = [
+            wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD]
+        kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+        self._kernel32 = kernel32
+
+        directory = kernel32.CreateFileW(
+            self.directory, self.FILE_LIST_DIRECTORY, self.FILE_SHARE_ALL, None, self.OPEN_EXISTING,
+            self.FILE_FLAG_BACKUP_SEMANTICS | self.FILE_FLAG_OVERLAPPED, None)
+        if directory is None or directory == wintypes.HANDLE(-1).value:
+            raise ctypes.WinError(ctypes.get_last_error())
+        handles = []
+        for _ in range(2):
+            event = kernel32.CreateEventW(None, True, False, None)
+            if not event:
+                error = ctypes.get_last_error()
+                for handle in handles + [directory]:
+                    kernel32.CloseHandle(handle)
+                raise ctypes.WinError(error)
+            handles.append(event)
+        self._directory = directory
+        # 第一个事件由重叠 I/O 完成时置位，第二个用于 stop
+        self._handles = (wintypes.HANDLE * 2)(*handles)
+        self._overlapped = OVERLAPPED(hEvent=handles[0])
+        self._buffer = ctypes.create_string_buffer(16384)
+        self._transferred = wintypes.DWORD()
+        self._name_lower = self.name.lower()
+        try:
+            self._read()
+        except OSError:
+            self._close()
+            raise
+
+    def _read(self):
+        """发起下一次异步读取"""
+        self._kernel32.ResetEvent(self._handles[0])
+        if not self._kernel32.ReadDirectoryChangesW(
+                self._directory, self._buffer, len(self._buffer), False,
+                self.FILE_NOTIFY_CHANGE_LAST_WRITE | self.FILE_NOTIFY_CHANGE_FILE_NAME,
+                None, ctypes.byref(self._overlapped), None):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def _close(self):
+        kernel32 = self._kernel32
+        # 取消未完成的读取并等它结束，之后系统不会再写入缓冲区
+        if kernel32.CancelIoEx(self._directory, ctypes.byref(self._overlapped)):
+            kernel32.GetOverlappedResult(self._directory, ctypes.byref(self._overlapped),
+                                         ctypes.byref(self._transferred), True)
+        kernel32.CloseHandle(self._directory)
+        for handle in self._handles:
+            kernel32.CloseHandle(handle)
+
+    def _wake(self):
+        self._kernel32.SetEvent(self._handles[1])
+
+    def _wait(self, timeout):
+        milliseconds = self.INFINITE if timeout is None else int(timeout * 1000)
+        while True:
+            result = self._kernel32.WaitForMultipleObjects(2, self._handles, False, milliseconds)
+            if result == self.WAIT_TIMEOUT:
+                return TIMEOUT
+            if result != self.WAIT_OBJECT_0:
+                return STOPPED
+            if not self._kernel32.GetOverlappedResult(
+                    self._directory, ctypes.byref(self._overlapped), ctypes.byref(self._transferred), False):
+                return STOPPED
+            transferred = self._transferred.value
+            # 长度为 0 表示通知太多、缓冲区放不下，无法知道是哪些文件，按有变化处理
+            changed = not transferred or any(
+                name.lower() == self._name_lower for name in notify_names(self._buffer.raw[:transferred]))
+            try:
+                self._read()
+            except OSError as e:
+                print(f"无法继续监视配置文件: {e}")
+                return STOPPED
+            if changed:
+                return CHANGED
+
+
+class PollingWatcher(FileWatcher):
+    """没有系统通知可用时的退路：每 interval 秒比较一次文件的修改时间和大小"""
+
+    def __init__(self, path, callback, interval=2.0):
+        super().__init__(path, callback)
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def _open(self):
+        self._stop.clear()
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _wake(self):
+        self._stop.set()
+
+    def _wait(self, timeout):
+        while not self._stop.wait(self.interval if timeout is None else min(timeout, self.interval)):
+            signature = self._stat()
+            if signature != self._signature:
+                self._signature = signature
+                return CHANGED
+            if timeout is not None:
+                return TIMEOUT
+        return STOPPED
+
+
+def make_watcher(path, callback):
+    """按平台选择监视方式，初始化失败时退回到轮询"""
+    if sys.platform.startswith("linux"):
+        watcher_class = InotifyWatcher
+    elif sys.platform == "win32":
+        watcher_class = Win32ChangeWatcher
+    else:
+        watcher_class = PollingWatcher
+    watcher = watcher_class(path, callback)
+    try:
+        watcher.start()
+    except (OSError, AttributeError) as e:
+        print(f"无法使用 {watcher_class.__name__} 监视配置文件，改为轮询: {e}")
+        watcher = PollingWatcher(path, callback)
+        watcher.start()
+    return watcher
+
+
+class SettingsWatcher:
+    """配置文件被外部修改时重新读取，把校验后的新快照交给 on_reload(snapshot)
+
+    本程序自己写入的内容（IniSettings 记录了最近一次写入的文本）不会触发重新加载。
+    """
+
+    def __init__(self, settings, on_reload):
+        self.settings = settings
+        self.on_reload = on_reload
+        self.watcher = make_watcher(settings.file_path, self._changed)
+
+    def _changed(self):
+        if self.settings.reload():
+            print("检测到配置文件修改，已重新加载")
+            self.on_reload(self.settings.snapshot())
+
+    def stop(self):
+        self.watcher.stop()
@@ -0,0 +1,106 @@
+import sys
+
+import pytest
+
+if not sys.platform.startswith("linux"):
+    pytest.skip("evdev backend is Linux only", allow_module_level=True)
+
+from evdev_backend import (EV_KEY, EV_REL, EV_SYN, REL_WHEEL, REL_WHEEL_HI_RES, SYN_REPORT,
+                           EvdevScrollFilter, FakeEventSink, FakeEventSource, pack_events)
+from scroll_filter import ScrollFilter
+from scroll_pipeline import Pipeline
+
+MS = 1_000_000
+REL_X = 0x00
+BTN_LEFT = 0x110
+
+
+def wheel_frame(timestamp, notches, hires=False):
+    events = [(timestamp, EV_REL, REL_WHEEL, notches)]
+    if hires:
+        events.insert(0, (timestamp, EV_REL, REL_WHEEL_HI_RES, notches * 120))
+    return events + [(timestamp, EV_SYN, SYN_REPORT, 0)]
+
+
+def run_backend(events):
+    source = FakeEventSource()
+    sink = FakeEventSink()
+    backend = EvdevScrollFilter(source, sink, Pipeline(ScrollFilter(0.5, 3)))
+    source.write_events(events)
+    source.close_writer()
+    backend.run()
+    source.close()
+    assert not source.grabbed
+    return backend, sink.events()
+
+
+def test_bounce_frame_is_dropped_and_scroll_is_reemitted_with_syn():
+    scroll = wheel_frame(1000 * MS, -1)
+    bounce = wheel_frame(1010 * MS, 1)
+    backend, out = run_backend(scroll + bounce)
+    assert out == scroll
+    assert backend.blocked_frames == 1
+    assert backend.events == 4
+
+
+def test_hires_frames_are_filtered_as_one_event():
+    scroll = wheel_frame(1000 * MS, -1, hires=True)
+    bounce = wheel_frame(1010 * MS, 1, hires=True)
+    backend, out = run_backend(scroll + bounce)
+    assert out == scroll
+    assert backend.pipeline.filter.total_events == 1
+    assert backend.pipeline.filter.blocked_events == 1
+
+
+def test_non_wheel_events_pass_through():
+    move = [(1000 * MS, EV_REL, REL_X, 5), (1000 * MS, EV_SYN, SYN_REPORT, 0)]
+    click = [(1001 * MS, EV_KEY, BTN_LEFT, 1), (1001 * MS, EV_SYN, SYN_REPORT, 0)]
+    backend, out = run_backend(move + click)
+    assert out == move + click
+    assert backend.pipeline.filter.total_events == 0
+
+
+def test_blocked_wheel_is_removed_from_mixed_frame():
+    scroll = wheel_frame(1000 * MS, -1)
+    mixed = [(1010 * MS, EV_REL, REL_X, 3)] + wheel_frame(1010 * MS, 1)
+    backend, out = run_backend(scroll + mixed)
+    assert out == scroll + [(1010 * MS, EV_REL, REL_X, 3), (1010 * MS, EV_SYN, SYN_REPORT, 0)]
+
+
+def test_frame_split_across_reads_is_kept_until_syn():
+    sink = FakeEventSink()
+    backend = EvdevScrollFilter(FakeEventSource(), sink)
+    data = pack_events(wheel_frame(1000 * MS, -1) + wheel_frame(1100 * MS, -1))
+    cut = len(data) - 5
+    backend.in_buffer[:cut] = data[:cut]
+    backend.process(cut)
+    assert sink.events() == wheel_frame(1000 * MS, -1)
+    pending = backend.pending
+    backend.in_buffer[pending:pending + 5] = data[cut:]
+    backend.process(pending + 5)
+    assert sink.events() == wheel_frame(1000 * MS, -1) + wheel_frame(1100 * MS, -1)
+    assert backend.pending == 0
+    backend.source.close_writer()
+    backend.source.close()
+
+
+def test_main_closes_device_when_uinput_fails(tmp_path, monkeypatch):
+    import evdev_backend
+
+    opened = []
+
+    class Device:
+        def __init__(self, path):
+            self.closed = False
+            opened.append(self)
+
+        def close(self):
+            self.closed = True
+
+    def failing_sink(device):
+        raise PermissionError("/dev/uinput")
+
+    monkeypatch.setattr(evdev_backend, "EvdevDevice", Device)
+    monkeypatch.setattr(evdev_backend, "UinputSink", failing_sink)
+    assert evdev_backend.main(["/dev/input/event0", "--config", str(tmp_path / "Settings.ini")]) == 1
+    assert len(opened) == 1 and opened[0].closed
@@ -0,0 +1,105 @@
+import pytest
+
+from event_ring import EventRing
+from scroll_filter import ALLOW, BLOCK
+
+
+def push_range(ring, start, stop):
+    for i in range(start, stop):
+        ring.push(i, -i, 0, BLOCK if i % 2 else ALLOW, 0)
+
+
+def drained(reader, n):
+    return list(reader.timestamps[:n])
+
+
+class OverwritingColumn:
+    """代替 EventRing 的一个字段：读取者第一次复制时，写入者在复制过程中再写入 pushes 个事件"""
+
+    def __init__(self, ring, pushes):
+        self.ring = ring
+        self.column = ring.timestamps
+        self.pushes = pushes
+
+    def __getitem__(self, key):
+        pushes, self.pushes = self.pushes, 0
+        if pushes:
+            start = self.ring.write_index
+            push_range(self.ring, start, start + pushes)
+        return self.column[key]
+
+    def __setitem__(self, key, value):
+        self.column[key] = value
+
+
+def test_capacity_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        EventRing(6)
+
+
+def test_reader_sees_only_new_events_by_default():
+    ring = EventRing(8)
+    push_range(ring, 0, 3)
+    assert ring.reader().pending() == 0
+    assert ring.reader(from_start=True).pending() == 3
+
+
+def test_drain_across_wrap_around():
+    ring = EventRing(8)
+    reader = ring.reader()
+    push_range(ring, 0, 6)
+    assert drained(reader, reader.drain()) == [0, 1, 2, 3, 4, 5]
+    push_range(ring, 6, 12)
+    n = reader.drain()
+    assert drained(reader, n) == [6, 7, 8, 9, 10, 11]
+    assert list(reader.deltas[:n]) == [-6, -7, -8, -9, -10, -11]
+    assert list(reader.decisions[:n]) == [ALLOW, BLOCK] * 3
+    assert reader.drain() == 0
+    assert reader.dropped == 0
+
+
+def test_drain_in_batches():
+    ring = EventRing(16)
+    reader = ring.reader(batch_size=4)
+    push_range(ring, 0, 10)
+    assert drained(reader, reader.drain()) == [0, 1, 2, 3]
+    assert drained(reader, reader.drain()) == [4, 5, 6, 7]
+    assert drained(reader, reader.drain()) == [8, 9]
+    assert reader.drain() == 0
+
+
+def test_lapped_reader_skips_overwritten_events():
+    ring = EventRing(8)
+    reader = ring.reader()
+    push_range(ring, 0, 20)
+    n = reader.drain()
+    # 落后超过一圈：只剩最近的一圈，写入者下一个要写的槽位也视为已覆盖
+    assert drained(reader, n) == [13, 14, 15, 16, 17, 18, 19]
+    assert reader.dropped == 13
+    assert reader.pending() == 0
+
+
+def test_batch_overwritten_during_copy_is_retried():
+    ring = EventRing(8)
+    reader = ring.reader(batch_size=4, from_start=True)
+    push_range(ring, 0, 8)
+    ring.timestamps = OverwritingColumn(ring, 8)
+
+    n = reader.drain()
+    # 正在复制的 0..3 全部被覆盖，从新的位置重新读取，而不是返回 0
+    assert drained(reader, n) == [9, 10, 11]
+    assert reader.dropped == 9
+    assert drained(reader, reader.drain()) == [12, 13, 14, 15]
+    assert reader.drain() == 0
+    assert reader.dropped + 3 + 4 == ring.write_index
+
+
+def test_partially_overwritten_batch_keeps_newest_events():
+    ring = EventRing(8)
+    reader = ring.reader(batch_size=8, from_start=True)
+    push_range(ring, 0, 8)
+    ring.timestamps = OverwritingColumn(ring, 2)
+
+    n = reader.drain()
+    assert drained(reader, n) == [3, 4, 5, 6, 7]
+    assert reader.dropped == 3
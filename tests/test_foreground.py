@@ -0,0 +1,73 @@
+from foreground import FakeProcessResolver, ForegroundTracker, Win32ForegroundWatcher
+
+EDITOR, BROWSER, GAME = 0x100, 0x200, 0x300
+
+
+def make_tracker(cache_size=64):
+    resolver = FakeProcessResolver(
+        windows={EDITOR: 10, BROWSER: 20, GAME: 30},
+        processes={10: "Code.exe", 20: "firefox.exe", 30: "game.exe"})
+    changes = []
+    return resolver, ForegroundTracker(resolver, changes.append, cache_size), changes
+
+
+def test_switching_back_hits_cache():
+    resolver, tracker, changes = make_tracker()
+    for hwnd in (EDITOR, BROWSER, EDITOR, BROWSER):
+        tracker.update(hwnd)
+    assert changes == ["code.exe", "firefox.exe", "code.exe", "firefox.exe"]
+    assert resolver.lookups == 2
+
+
+def test_same_process_does_not_notify_again():
+    resolver, tracker, changes = make_tracker()
+    tracker.update(EDITOR)
+    tracker.update(EDITOR)
+    assert changes == ["code.exe"]
+
+
+def test_least_recently_used_window_is_evicted():
+    resolver, tracker, changes = make_tracker(cache_size=2)
+    tracker.lookup(EDITOR)
+    tracker.lookup(BROWSER)
+    tracker.lookup(EDITOR)      # BROWSER 变为最久未用
+    tracker.lookup(GAME)
+    assert resolver.lookups == 3
+    tracker.lookup(EDITOR)
+    assert resolver.lookups == 3
+    tracker.lookup(BROWSER)
+    assert resolver.lookups == 4
+
+
+def test_invalidate_drops_reused_window():
+    resolver, tracker, changes = make_tracker()
+    assert tracker.lookup(EDITOR) == "code.exe"
+    # 进程退出后同一个句柄和进程 ID 被新进程重用
+    resolver.processes[10] = "notepad.exe"
+    assert tracker.lookup(EDITOR) == "code.exe"
+    tracker.invalidate(EDITOR)
+    assert tracker.lookup(EDITOR) == "notepad.exe"
+
+
+def test_invalidate_all():
+    resolver, tracker, changes = make_tracker()
+    tracker.lookup(EDITOR)
+    tracker.lookup(BROWSER)
+    tracker.invalidate()
+    tracker.lookup(EDITOR)
+    tracker.lookup(BROWSER)
+    assert resolver.lookups == 4
+
+
+def test_watcher_invalidates_destroyed_windows():
+    resolver, tracker, changes = make_tracker()
+    watcher = Win32ForegroundWatcher(tracker)
+    watcher.handle_event(watcher.EVENT_SYSTEM_FOREGROUND, EDITOR)
+    assert changes == ["code.exe"]
+    # 子对象的销毁不影响缓存
+    watcher.handle_event(watcher.EVENT_OBJECT_DESTROY, EDITOR, id_object=-4)
+    tracker.lookup(EDITOR)
+    assert resolver.lookups == 1
+    watcher.handle_event(watcher.EVENT_OBJECT_DESTROY, EDITOR)
+    tracker.lookup(EDITOR)
+    assert resolver.lookups == 2
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from hook_metrics import BUCKET_COUNT, LatencyHistogram, bucket_index, bucket_upper_bound, format_ns
+
+
+def test_bucket_index_matches_upper_bounds():
+    for ns in list(range(0, 2000)) + [random.Random(1).randrange(1, 1 << 40) for _ in range(5000)]:
+        index = bucket_index(ns)
+        assert ns <= bucket_upper_bound(index)
+        if index:
+            assert ns > bucket_upper_bound(index - 1)
+
+
+def test_bucket_relative_error_is_bounded():
+    for ns in (17, 1000, 123_456, 987_654_321):
+        upper = bucket_upper_bound(bucket_index(ns))
+        assert (upper - ns) / ns <= 0.125
+
+
+def test_huge_values_go_to_last_bucket():
+    assert bucket_index(1 << 50) == BUCKET_COUNT - 1
+    assert bucket_index(-5) == 0
+
+
+def test_record_matches_bucket_index():
+    histogram = LatencyHistogram()
+    values = [0, 1, 15, 16, 999, 1_000_000, 1 << 45]
+    for ns in values:
+        histogram.record(ns)
+    for ns in values:
+        assert histogram.counts[bucket_index(ns)] >= 1
+    assert sum(histogram.counts) == histogram.count == len(values)
+
+
+def test_snapshot_percentiles_and_budget():
+    histogram = LatencyHistogram(budget_ns=50_000)
+    for _ in range(995):
+        histogram.record(10_000)
+    for _ in range(5):
+        histogram.record(100_000)
+    histogram.record(2_000_000)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 1001
+    assert 10_000 <= snapshot["p50"] <= 10_000 * 1.125
+    assert 10_000 <= snapshot["p99"] <= 10_000 * 1.125
+    assert 100_000 <= snapshot["p999"] <= 100_000 * 1.125
+    assert snapshot["max"] == 2_000_000
+    assert snapshot["over_budget"] == 6
+    assert snapshot["budget"] == 50_000
+
+
+def test_percentile_never_exceeds_max():
+    histogram = LatencyHistogram()
+    histogram.record(1001)
+    assert histogram.percentile(0.5) == 1001
+
+
+def test_reset_clears_counts():
+    histogram = LatencyHistogram(budget_ns=10)
+    histogram.record(100)
+    created = histogram.created
+    histogram.reset()
+    assert histogram.snapshot() == {"count": 0, "p50": 0, "p99": 0, "p999": 0, "max": 0,
+                                    "over_budget": 0, "budget": 10}
+    assert histogram.created >= created
+
+
+@pytest.mark.parametrize("ns, text", [(999, "999ns"), (1500, "1.5µs"), (2_500_000, "2.50ms"),
+                                      (3_000_000_000, "3.00s")])
+def test_format_ns(ns, text):
+    assert format_ns(ns) == text
@@ -0,0 +1,73 @@
+import ctypes
+
+import scroll_bench
+from event_ring import EventRing
+from hook_path import HookState, make_hook_proc
+from hook_struct import LLMHF_INJECTED, MSLLHOOKSTRUCT, WM_MOUSEWHEEL
+from scroll_clock import EventTickClock
+from scroll_coalesce import COALESCE_TAG, FakeInjector, WheelCoalescer
+from scroll_filter import ScrollFilter
+from scroll_pipeline import Pipeline
+
+PASSED = 7      # call_next_hook 的返回值，表示事件被放行
+
+
+def make_event(delta, tick, flags=0, extra=0):
+    ms = MSLLHOOKSTRUCT()
+    ms.mouseData = (delta & 0xFFFF) << 16
+    ms.time = tick
+    ms.flags = flags
+    ms.dwExtraInfo = extra
+    return ms
+
+
+def make_hook():
+    hook = HookState(Pipeline(ScrollFilter(0.5, 3), EventRing(64)), EventTickClock())
+    calls = []
+
+    def call_next_hook(hook_id, nCode, wParam, lParam):
+        calls.append(lParam)
+        return PASSED
+    return hook, make_hook_proc(hook, call_next_hook), calls
+
+
+def test_hook_proc_blocks_bounce_and_passes_scroll():
+    hook, hook_proc, calls = make_hook()
+    down, bounce = make_event(-120, 1000), make_event(120, 1010)
+    assert hook_proc(0, WM_MOUSEWHEEL, ctypes.addressof(down)) == PASSED
+    assert hook_proc(0, WM_MOUSEWHEEL, ctypes.addressof(bounce)) == 1
+    assert calls == [ctypes.addressof(down)]
+    assert hook.generation == 2 and hook.heartbeat == 2
+
+
+def test_hook_proc_passes_reinjected_events_without_filtering():
+    hook, hook_proc, calls = make_hook()
+    injected = make_event(120, 1000, LLMHF_INJECTED, COALESCE_TAG)
+    assert hook_proc(0, WM_MOUSEWHEEL, ctypes.addressof(injected)) == PASSED
+    assert hook.generation == 0
+    assert hook.pipeline.filter.total_events == 0
+
+
+def test_hook_proc_hands_allowed_events_to_coalescer():
+    hook, hook_proc, calls = make_hook()
+    hook.coalescer = WheelCoalescer(FakeInjector(), 10.0)
+    first, second = make_event(-120, 1000), make_event(-120, 1001)
+    assert hook_proc(0, WM_MOUSEWHEEL, ctypes.addressof(first)) == PASSED
+    assert hook_proc(0, WM_MOUSEWHEEL, ctypes.addressof(second)) == 1
+    assert hook.coalescer.coalesced == 1
+
+
+def test_hook_proc_has_no_net_allocations():
+    size, count, peak = scroll_bench.check_allocations(events=20_000, warmup=5_000)
+    assert scroll_bench.allocations_ok(size, count, peak), (size, count, peak)
+
+
+def test_allocation_check_detects_growth():
+    kept = []
+
+    def leaking_stage(delta, timestamp, decision):
+        kept.append(delta * 1000)
+        return decision
+
+    size, count, peak = scroll_bench.check_allocations(events=20_000, warmup=5_000, stages=(leaking_stage,))
+    assert not scroll_bench.allocations_ok(size, count, peak)
@@ -0,0 +1,160 @@
+import ctypes
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from hook_supervisor import HookSupervisor
+
+
+class FakeHook:
+    """代替 MouseHook：start() 在调用线程中"安装"钩子并运行到 stop()，记录同时运行的钩子线程数"""
+
+    def __init__(self):
+        self.installed = threading.Event()
+        self.install_ok = False
+        self.heartbeat = 0
+        self.pong = 0
+        self.starts = 0
+        self.active = 0
+        self.max_active = 0
+        self.answer_pings = True    # False 模拟卡住的消息循环
+        self.ignore_stop = False    # True 模拟不响应 WM_QUIT 的钩子线程
+        self.services = 0
+        self._quit = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        quit = threading.Event()
+        with self._lock:
+            self._quit = quit
+            self.starts += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.install_ok = True
+        self.installed.set()
+        quit.wait()
+        with self._lock:
+            self.active -= 1
+
+    def stop(self):
+        if not self.ignore_stop:
+            self._quit.set()
+
+    def crash(self):
+        """钩子线程意外退出"""
+        self._quit.set()
+
+    def post(self, message):
+        quit = self._quit
+        if quit is None or quit.is_set():
+            return False
+        if self.answer_pings:
+            self.pong += 1
+        return True
+
+    def start_services(self):
+        self.services += 1
+
+    def stop_services(self):
+        self.services -= 1
+
+
+@pytest.fixture
+def make_supervisor(monkeypatch):
+    def no_op(pointer):
+        return 1
+    user32 = SimpleNamespace(GetLastInputInfo=no_op, GetCursorPos=no_op)
+    monkeypatch.setattr(ctypes, "windll", SimpleNamespace(user32=user32), raising=False)
+    supervisors = []
+
+    def make(check_interval=0.02):
+        hook = FakeHook()
+        supervisor = HookSupervisor(hook, check_interval=check_interval, stop_timeout=0.2)
+        reasons = []
+        supervisor.on_restart = reasons.append
+        supervisors.append(supervisor)
+        return supervisor, hook, reasons
+
+    yield make
+    for supervisor in supervisors:
+        supervisor.hook.ignore_stop = False
+        supervisor.stop()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_start_and_stop(make_supervisor):
+    supervisor, hook, reasons = make_supervisor(check_interval=10)
+    assert supervisor.start(1.0) is True
+    assert supervisor.alive
+    assert hook.services == 1
+    supervisor.stop()
+    assert not supervisor.alive
+    assert hook.active == 0
+    assert hook.services == 0
+    assert reasons == []
+
+
+def test_exited_hook_thread_is_reinstalled(make_supervisor):
+    supervisor, hook, reasons = make_supervisor()
+    supervisor.start(1.0)
+    hook.crash()
+    # restarts 先于 on_restart 更新，等待 on_restart 被调用
+    assert wait_for(lambda: reasons)
+    assert reasons == ["thread exited"]
+    assert supervisor.restarts == 1
+    assert wait_for(lambda: supervisor.alive)
+    assert hook.starts == 2
+    assert hook.max_active == 1
+
+
+def test_stalled_message_loop_is_reinstalled(make_supervisor):
+    supervisor, hook, reasons = make_supervisor()
+    supervisor.start(1.0)
+    hook.answer_pings = False
+    assert wait_for(lambda: reasons)
+    assert reasons[0] == "message loop stalled"
+    assert hook.max_active == 1
+
+
+def test_hook_removed_by_system_is_reinstalled(make_supervisor):
+    supervisor, hook, reasons = make_supervisor()
+    # 每次检查都有新的鼠标输入，但钩子回调没有被调用（heartbeat 不变）
+    ticks = iter(range(1, 1_000_000))
+    supervisor._input_tick = lambda: (next(ticks), (next(ticks), 0))
+    supervisor.start(1.0)
+    assert wait_for(lambda: reasons)
+    assert reasons[0] == "hook removed by system"
+
+
+def test_moving_mouse_with_working_hook_is_not_reinstalled(make_supervisor):
+    supervisor, hook, reasons = make_supervisor()
+    ticks = iter(range(1, 1_000_000))
+
+    def input_tick():
+        hook.heartbeat += 1
+        return next(ticks), (next(ticks), 0)
+    supervisor._input_tick = input_tick
+    supervisor.start(1.0)
+    time.sleep(0.2)
+    assert supervisor.restarts == 0
+    assert reasons == []
+
+
+def test_no_second_hook_while_old_thread_is_alive(make_supervisor):
+    supervisor, hook, reasons = make_supervisor(check_interval=10)
+    supervisor.start(1.0)
+    hook.ignore_stop = True
+    assert supervisor.restart("manual") is False
+    assert hook.starts == 1
+    assert hook.max_active == 1
+    assert reasons == []
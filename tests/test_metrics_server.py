@@ -0,0 +1,116 @@
+import socket
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+from event_ring import EventRing
+from hook_metrics import LatencyHistogram
+from metrics_server import CONTENT_TYPE, LATENCY_BUCKETS, MetricsServer, render
+from pipeline_sinks import CounterSink
+from scroll_filter import STATUS_BLOCKED, STATUS_DIRECTION_CHANGED, WHEEL_DELTA, ScrollFilter
+from scroll_pipeline import Pipeline
+
+MS = 1_000_000
+
+
+def make_supervisor(coalescer=None):
+    scroll_filter = ScrollFilter(0.5, 3)
+    pipeline = Pipeline(scroll_filter, EventRing(64))
+    reader = pipeline.ring.reader()
+    # 向下滚动，抖动一次（拦截），然后有意换向（第 3 个反向事件放行）
+    events = [(-WHEEL_DELTA, 0), (WHEEL_DELTA, 10 * MS), (-WHEEL_DELTA, 50 * MS),
+              (WHEEL_DELTA, 100 * MS), (WHEEL_DELTA, 110 * MS), (WHEEL_DELTA, 120 * MS)]
+    for delta, timestamp in events:
+        pipeline.process(delta, timestamp)
+    counter = CounterSink()
+    counter.consume(reader, reader.drain())
+
+    latency = LatencyHistogram(budget_ns=1_000_000)
+    for ns in (500, 500, 500, 3_000, 3_000, 2_000_000_000):
+        latency.record(ns)
+    hook = SimpleNamespace(filter=scroll_filter, latency=latency, heartbeat=42, coalescer=coalescer)
+    return SimpleNamespace(hook=hook, restarts=2, alive=True), counter
+
+
+def parse(text):
+    """样本行 -> {名称和标签: 值}"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_render_counters():
+    supervisor, counter = make_supervisor()
+    text = render(supervisor, counter)
+    samples = parse(text)
+
+    assert text.endswith("# EOF\n")
+    # ScrollFilter.total_events 只计放行的事件
+    assert samples['mss_events_total{decision="allowed"}'] == counter.allowed == 3
+    assert samples['mss_events_total{decision="blocked"}'] == counter.blocked == 3
+    assert samples['mss_event_reasons_total{reason="blocked"}'] == counter.reasons[STATUS_BLOCKED]
+    assert samples["mss_direction_changes_total"] == counter.reasons[STATUS_DIRECTION_CHANGED] == 1
+    assert samples["mss_metrics_dropped_events_total"] == 0
+    assert samples["mss_hook_callbacks_total"] == 42
+    assert samples["mss_hook_over_budget_total"] == 1
+    assert samples["mss_hook_reinstalls_total"] == 2
+    assert samples["mss_hook_installed"] == 1
+    assert "mss_coalesced_events_total" not in samples
+
+
+def test_render_latency_histogram_is_cumulative():
+    supervisor, counter = make_supervisor()
+    samples = parse(render(supervisor, counter))
+
+    buckets = [samples[f'mss_hook_latency_seconds_bucket{{le="{le}"}}']
+               for le in ("0.000001", "0.000002", "0.000005", "0.00001")]
+    assert buckets == [3, 3, 5, 5]
+    values = [value for name, value in samples.items() if name.startswith("mss_hook_latency_seconds_bucket")]
+    assert len(values) == len(LATENCY_BUCKETS) + 1
+    assert values == sorted(values)
+    # 2 秒超过所有边界，只计入 +Inf
+    assert samples['mss_hook_latency_seconds_bucket{le="1"}'] == 5
+    assert samples['mss_hook_latency_seconds_bucket{le="+Inf"}'] == 6
+    assert samples["mss_hook_latency_seconds_count"] == 6
+    assert samples["mss_hook_latency_seconds_created"] == pytest.approx(supervisor.hook.latency.created, abs=1e-3)
+
+
+def test_render_coalescer_counters():
+    supervisor, counter = make_supervisor(SimpleNamespace(coalesced=7, injected=3))
+    samples = parse(render(supervisor, counter))
+    assert samples["mss_coalesced_events_total"] == 7
+    assert samples["mss_injected_events_total"] == 3
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_server_serves_metrics_on_loopback():
+    supervisor, counter = make_supervisor()
+    server = MetricsServer(supervisor, free_port(), counter)
+    server.start()
+    try:
+        assert server.httpd.server_address[0] == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert response.read().decode() == render(supervisor, counter)
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/other", timeout=5)
+        assert exc.value.code == 404
+    finally:
+        server.stop()
+
+
+@pytest.mark.parametrize("port", [0, 65536])
+def test_invalid_port_is_rejected(port):
+    supervisor, counter = make_supervisor()
+    with pytest.raises(ValueError):
+        MetricsServer(supervisor, port, counter)
@@ -0,0 +1,139 @@
+import random
+
+import pytest
+
+from scroll_adaptive import MIN_JITTER_SAMPLES, AdaptiveBounds, AdaptiveTuner, P2Quantile
+from scroll_filter import ALLOW, WHEEL_DELTA, FilterConfig, ScrollFilter
+
+MS = 1_000_000
+
+
+def estimate(p, samples):
+    quantile = P2Quantile(p)
+    for x in samples:
+        quantile.add(x)
+    return quantile.value()
+
+
+@pytest.mark.parametrize("p", [0.5, 0.95, 0.99])
+def test_p2_uniform_quantiles(p):
+    rnd = random.Random(1)
+    assert estimate(p, (rnd.random() for _ in range(20_000))) == pytest.approx(p, abs=0.01)
+
+
+@pytest.mark.parametrize("p, expected", [(0.5, 1.0), (0.95, 3.467), (0.99, 4.490)])
+def test_p2_normal_quantiles(p, expected):
+    # 正态分布 N(1, 1.5²) 的分位数：1 + 1.5 × (0, 1.645, 2.326)
+    rnd = random.Random(2)
+    assert estimate(p, (rnd.gauss(1.0, 1.5) for _ in range(50_000))) == pytest.approx(expected, abs=0.1)
+
+
+def test_p2_exponential_median():
+    rnd = random.Random(3)
+    # Exp(1) 的中位数为 ln 2
+    assert estimate(0.5, (rnd.expovariate(1.0) for _ in range(20_000))) == pytest.approx(0.693, abs=0.03)
+
+
+def test_p2_few_samples_use_sample_quantile():
+    assert P2Quantile(0.5).value() == 0.0
+    assert estimate(0.5, [3.0, 1.0, 2.0]) == 2.0
+    assert estimate(0.99, [3.0, 1.0, 2.0]) == 3.0
+
+
+def test_p2_rejects_invalid_quantile():
+    with pytest.raises(ValueError):
+        P2Quantile(1.0)
+
+
+def make_tuner(bounds, config=None):
+    scroll_filter = ScrollFilter(config=config or FilterConfig(0.5, 3))
+    return AdaptiveTuner(scroll_filter, bounds), scroll_filter
+
+
+def fill(tuner, jitter_gap, run_length, same_gap, count=MIN_JITTER_SAMPLES):
+    for _ in range(count):
+        tuner.jitter_gap.add(jitter_gap)
+        tuner.run_length.add(run_length)
+        tuner.same_gap.add(same_gap)
+
+
+def test_derive_clamps_to_upper_bounds():
+    bounds = AdaptiveBounds(0.05, 0.3, 2, 4)
+    tuner, scroll_filter = make_tuner(bounds)
+    fill(tuner, jitter_gap=900 * MS, run_length=10, same_gap=40 * MS)
+    tuner._derive()
+    assert scroll_filter.config.block_interval_ns == bounds.max_interval_ns
+    assert scroll_filter.config.direction_change_threshold == 4
+
+
+def test_derive_clamps_to_lower_bounds():
+    bounds = AdaptiveBounds(0.2, 1.0, 3, 6)
+    tuner, scroll_filter = make_tuner(bounds)
+    fill(tuner, jitter_gap=5 * MS, run_length=1, same_gap=10 * MS)
+    tuner._derive()
+    assert scroll_filter.config.block_interval_ns == bounds.min_interval_ns
+    assert scroll_filter.config.direction_change_threshold == 3
+
+
+def test_derive_within_bounds_rounds_interval_up():
+    tuner, scroll_filter = make_tuner(AdaptiveBounds())
+    fill(tuner, jitter_gap=101 * MS, run_length=2, same_gap=40 * MS)
+    tuner._derive()
+    # 101ms × 1.5 = 151.5ms，取整到 10ms
+    assert scroll_filter.config.block_interval_ns == 160 * MS
+    assert scroll_filter.config.direction_change_threshold == 3
+
+
+def test_derive_waits_for_enough_jitter():
+    tuner, scroll_filter = make_tuner(AdaptiveBounds())
+    fill(tuner, jitter_gap=100 * MS, run_length=1, same_gap=40 * MS, count=MIN_JITTER_SAMPLES - 1)
+    tuner._derive()
+    assert scroll_filter.config == FilterConfig(0.5, 3)
+
+
+def test_learns_from_jitter_stream():
+    """同向滚动中夹杂短间隔的反向单格：学到的参数拦截抖动，并在范围之内"""
+    bounds = AdaptiveBounds()
+    tuner, scroll_filter = make_tuner(bounds)
+    rnd = random.Random(4)
+    now = 0
+    for _ in range(5000):
+        if rnd.random() < 0.1:
+            now += rnd.randrange(2, 10) * MS
+            tuner(-WHEEL_DELTA, now, ALLOW)
+        else:
+            now += rnd.randrange(30, 60) * MS
+            tuner(WHEEL_DELTA, now, ALLOW)
+    assert tuner.jitter_gap.count >= MIN_JITTER_SAMPLES
+    config = scroll_filter.config
+    assert bounds.min_interval_ns <= config.block_interval_ns <= bounds.max_interval_ns
+    assert config.block_interval_ns >= 10 * MS * 1.5
+    assert bounds.min_threshold <= config.direction_change_threshold <= bounds.max_threshold
+
+
+def test_rebase_rederives_with_new_bounds():
+    tuner, scroll_filter = make_tuner(AdaptiveBounds())
+    fill(tuner, jitter_gap=300 * MS, run_length=2, same_gap=40 * MS)
+    tuner._derive()
+    assert scroll_filter.config.block_interval_ns == 450 * MS
+
+    tuner.rebase(FilterConfig(0.5, 3, enabled=False), AdaptiveBounds(0.05, 0.2, 2, 6))
+    assert scroll_filter.config.block_interval_ns == 200 * MS
+    assert scroll_filter.config.enabled is False
+
+
+def test_pinned_profile_is_kept_until_unpinned():
+    tuner, scroll_filter = make_tuner(AdaptiveBounds())
+    fill(tuner, jitter_gap=100 * MS, run_length=1, same_gap=40 * MS)
+    tuner._derive()
+    learned = scroll_filter.config
+
+    profile = FilterConfig(0.8, 5)
+    tuner.rebase(profile, pinned=True)
+    assert scroll_filter.config is profile
+    fill(tuner, jitter_gap=100 * MS, run_length=1, same_gap=40 * MS)
+    tuner._derive()
+    assert scroll_filter.config is profile
+
+    tuner.rebase(FilterConfig(0.5, 3))
+    assert scroll_filter.config == learned
@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from scroll_coalesce import MAX_INJECT_DELTA, FakeInjector, WheelCoalescer
+
+MS = 1_000_000
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000 * MS
+
+    def __call__(self):
+        return self.now
+
+
+def make_coalescer(window_ms=4.0):
+    clock = FakeClock()
+    injector = FakeInjector()
+    return WheelCoalescer(injector, window_ms, clock), injector, clock
+
+
+def test_events_inside_window_are_merged():
+    coalescer, injector, clock = make_coalescer()
+    assert coalescer.take(-120) is False        # 窗口外：直接放行并打开窗口
+    clock.now += 1 * MS
+    assert coalescer.take(-120) is True
+    clock.now += 1 * MS
+    assert coalescer.take(-120) is True
+    assert coalescer.flush() == 1
+    assert injector.deltas == [-240]
+    assert coalescer.coalesced == 2
+    assert coalescer.injected == 1
+
+
+def test_event_after_window_passes_through():
+    coalescer, injector, clock = make_coalescer()
+    assert coalescer.take(120) is False
+    clock.now += 5 * MS
+    assert coalescer.take(120) is False
+    assert coalescer.flush() == 0
+    assert injector.batches == []
+
+
+def test_direction_change_keeps_order():
+    coalescer, injector, clock = make_coalescer()
+    coalescer.take(-120)
+    for delta in (-120, -120, 120, 120, -120):
+        assert coalescer.take(delta) is True
+    assert coalescer.flush() == 3
+    assert injector.deltas == [-240, 240, -120]
+    assert coalescer.injected == 3
+
+
+def test_large_total_is_split_and_counted_per_event():
+    coalescer, injector, clock = make_coalescer()
+    coalescer.take(120)
+    for _ in range(300):
+        coalescer.take(120)
+    assert coalescer.flush() == 2
+    assert injector.deltas == [MAX_INJECT_DELTA, 300 * 120 - MAX_INJECT_DELTA]
+    assert coalescer.injected == 2
+
+
+def test_injection_thread_flushes_when_window_ends():
+    injector = FakeInjector()
+    coalescer = WheelCoalescer(injector, 2.0)
+    coalescer.start()
+    try:
+        assert coalescer.take(-120) is False
+        opened = time.perf_counter_ns()
+        assert coalescer.take(-120) is True
+        assert injector.injected.wait(1.0)
+        injected_at, batch = injector.batches[0]
+        assert batch == [-120]
+        assert injected_at >= opened + 2 * MS - MS // 2
+        assert coalescer.injected == 1
+    finally:
+        coalescer.stop()
+
+
+def test_stop_injects_pending_events():
+    coalescer, injector, clock = make_coalescer()
+    coalescer.take(120)
+    coalescer.take(120)
+    coalescer.stop()
+    assert injector.deltas == [120]
+
+
+def test_take_after_stop_passes_events_through():
+    coalescer, injector, clock = make_coalescer()
+    coalescer.take(120)
+    coalescer.stop()
+    clock.now += 1 * MS
+    assert coalescer.take(120) is False
+    assert coalescer.flush() == 0
+    assert injector.deltas == []
+    assert coalescer.coalesced == 0
+
+
+@pytest.mark.parametrize("window_ms", [0, -1, 10.5, float("nan")])
+def test_invalid_window_is_rejected(window_ms):
+    with pytest.raises(ValueError):
+        WheelCoalescer(FakeInjector(), window_ms)
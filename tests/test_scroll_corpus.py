@@ -0,0 +1,91 @@
+import pytest
+
+import scroll_corpus
+from scroll_filter import ALLOW, BLOCK, WHEEL_DELTA
+from scroll_trace import TraceWriter, delta_to_wheel_data
+
+MS = 1_000_000
+CONFIG = {"interval": 0.5, "threshold": 3, "baseline_interval": 0.2, "baseline_threshold": 3}
+
+
+def write_trace(path, events):
+    writer = TraceWriter(str(path))
+    for timestamp, delta, decision in events:
+        writer.write(timestamp, delta_to_wheel_data(delta), 0, decision)
+    writer.close()
+    return str(path)
+
+
+def jitter_trace(path, count):
+    """向下滚动，每隔 3 格夹一个 300ms 后的反向单格（参照标为拦截）"""
+    events = []
+    now = 0
+    for i in range(count):
+        if i % 4 == 3:
+            now += 300 * MS
+            events.append((now, WHEEL_DELTA, BLOCK))
+        else:
+            now += 30 * MS
+            events.append((now, -WHEEL_DELTA, ALLOW))
+    return write_trace(path, events)
+
+
+def test_run_corpus_evaluates_and_resumes_from_journal(tmp_path):
+    traces = [jitter_trace(tmp_path / "a.bin", 40), jitter_trace(tmp_path / "b.bin", 80)]
+    journal = str(tmp_path / "journal.jsonl")
+    seen = []
+
+    results = scroll_corpus.run_corpus(traces, CONFIG, workers=2, journal=journal,
+                                       progress=lambda path, result: seen.append(path))
+
+    assert sorted(seen) == traces
+    a, b = results[traces[0]], results[traces[1]]
+    assert (a["events"], b["events"]) == (40, 80)
+    # 候选参数（0.5 秒）拦截全部反向单格，与参照一致
+    assert (a["blocked"], a["false_blocks"], a["misses"]) == (10, 0, 0)
+    # 基线参数（0.2 秒）放行反向单格，并因此改变之后的方向
+    assert a["baseline_diffs"] >= 10
+    assert scroll_corpus.rates(scroll_corpus.aggregate(results))["block_rate"] == 0.25
+
+    # 用同样的参数再次运行：全部复用日志中的结果
+    seen.clear()
+    again = scroll_corpus.run_corpus(traces, CONFIG, workers=2, journal=journal,
+                                     progress=lambda path, result: seen.append(path))
+    assert seen == []
+    assert again == results
+
+    # 追加了事件的 trace（TraceWriter 在已有文件末尾追加）和新参数会重新评估
+    jitter_trace(tmp_path / "b.bin", 60)
+    again = scroll_corpus.run_corpus(traces, CONFIG, workers=2, journal=journal,
+                                     progress=lambda path, result: seen.append(path))
+    assert seen == [traces[1]]
+    assert again[traces[1]]["events"] == 140
+    seen.clear()
+    same_baseline = dict(CONFIG, baseline_interval=0.5)
+    again = scroll_corpus.run_corpus(traces, same_baseline, workers=2, journal=journal,
+                                     progress=lambda path, result: seen.append(path))
+    assert sorted(seen) == traces
+    assert scroll_corpus.aggregate(again)["baseline_diffs"] == 0
+
+
+def test_partial_journal_line_is_ignored(tmp_path):
+    trace = jitter_trace(tmp_path / "a.bin", 8)
+    journal = tmp_path / "journal.jsonl"
+    scroll_corpus.run_corpus([trace], CONFIG, workers=1, journal=str(journal))
+    with open(journal, 'a', encoding='utf-8') as f:
+        f.write('{"key": {"path"')
+    assert len(scroll_corpus.load_journal(str(journal))) == 1
+
+
+@pytest.mark.parametrize("args", [
+    ["--interval", "0"],
+    ["--interval", "-0.1"],
+    ["--threshold", "0"],
+    ["--baseline-interval", "0"],
+    ["--baseline-threshold", "-1"],
+    ["--workers", "0"],
+])
+def test_invalid_arguments_are_rejected(tmp_path, args):
+    with pytest.raises(SystemExit) as exc:
+        scroll_corpus.main([str(tmp_path)] + args)
+    assert exc.value.code == 2
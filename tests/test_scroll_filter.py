@@ -0,0 +1,38 @@
+from scroll_filter import ALLOW, BLOCK, WHEEL_DELTA, ScrollFilter
+
+MS = 1_000_000
+
+
+def feed_all(scroll_filter, events):
+    return [scroll_filter.feed(delta, timestamp) for delta, timestamp in events]
+
+
+def test_hires_bounce_after_full_notch_is_blocked():
+    """高精度滚轮向下滚了几格后，反向的 1/8 格回弹不能因为最后一小段滚动量小而缩短拦截窗口"""
+    events = [(-15, i * 2 * MS) for i in range(40)]
+    start = events[-1][1]
+    events += [(15 if i % 2 == 0 else -15, start + (i + 1) * 100 * MS) for i in range(20)]
+
+    decisions = feed_all(ScrollFilter(0.5, 3), events)
+
+    assert decisions[:40] == [ALLOW] * 40
+    tail = decisions[40:]
+    assert tail[0::2] == [BLOCK] * 10
+    assert tail[1::2] == [ALLOW] * 10
+
+
+def test_sub_notch_reverse_window_is_scaled():
+    """方向确定以来不足一格时，拦截窗口按滚动量缩短"""
+    scroll_filter = ScrollFilter(0.4, 3)
+    assert scroll_filter.feed(-30, 0) == ALLOW
+    # 窗口为 0.4s × 30/120 = 100ms
+    assert scroll_filter.feed(30, 99 * MS) == BLOCK
+    assert scroll_filter.feed(30, 101 * MS) == ALLOW
+
+
+def test_deliberate_reversal_switches_after_threshold():
+    scroll_filter = ScrollFilter(0.5, 2)
+    assert scroll_filter.feed(-WHEEL_DELTA, 0) == ALLOW
+    assert scroll_filter.feed(WHEEL_DELTA, 10 * MS) == BLOCK
+    assert scroll_filter.feed(WHEEL_DELTA, 20 * MS) == ALLOW
+    assert scroll_filter.current_direction == 1
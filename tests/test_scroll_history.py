@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from event_ring import EventRing
+from pipeline_sinks import HistorySink
+from scroll_clock import ManualClock, NS_PER_SECOND
+from scroll_filter import ALLOW, BLOCK, STATUS_BLOCKED, STATUS_DIRECTION_CHANGED, STATUS_SAME_DIRECTION
+from scroll_history import DAY, HOUR, MINUTE, HistoryStore
+
+
+@pytest.fixture
+def timezone():
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset is not available")
+    saved = os.environ.get("TZ")
+
+    def set_timezone(name):
+        os.environ["TZ"] = name
+        time.tzset()
+
+    yield set_timezone
+    if saved is None:
+        os.environ.pop("TZ", None)
+    else:
+        os.environ["TZ"] = saved
+    time.tzset()
+
+
+def local(*fields):
+    return int(time.mktime(fields + (0, 0, -1)))
+
+
+def test_hours_and_days_follow_local_time(tmp_path, timezone):
+    timezone("Asia/Shanghai")
+    store = HistoryStore(str(tmp_path / "history.bin"))
+    try:
+        # 本地 07:30 是 UTC 前一天 23:30
+        store.add(local(2026, 10, 18, 7, 30, 0), allowed=3)
+        store.add(local(2026, 10, 17, 23, 30, 0), allowed=5)
+        start, end = local(2026, 10, 16, 0, 0, 0), local(2026, 10, 19, 0, 0, 0)
+        days = store.series(DAY, start, end)
+        assert [(row[0], row[1]) for row in days] == [
+            (local(2026, 10, 17, 0, 0, 0), 5), (local(2026, 10, 18, 0, 0, 0), 3)]
+        hours = store.series(HOUR, start, end)
+        assert [row[0] for row in hours] == [local(2026, 10, 17, 23, 0, 0), local(2026, 10, 18, 7, 0, 0)]
+        # 查询范围的边界也按本地时间
+        assert store.series(DAY, local(2026, 10, 18, 0, 0, 0), end)[0][1] == 3
+    finally:
+        store.close()
+
+
+def test_daylight_saving_day_is_one_bucket(tmp_path, timezone):
+    timezone("America/New_York")
+    store = HistoryStore(str(tmp_path / "history.bin"))
+    try:
+        # 2026-11-01 夏令时结束，这一天有 25 小时
+        store.add(local(2026, 11, 1, 0, 30, 0), allowed=1)
+        store.add(local(2026, 11, 1, 23, 30, 0), allowed=1)
+        days = store.series(DAY, local(2026, 10, 31, 0, 0, 0), local(2026, 11, 3, 0, 0, 0))
+        assert [(row[0], row[1]) for row in days] == [(local(2026, 11, 1, 0, 0, 0), 2)]
+    finally:
+        store.close()
+
+
+def test_history_sink_uses_event_timestamps(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.bin"))
+    try:
+        clock = ManualClock(10_000 * NS_PER_SECOND)
+        ring = EventRing(16)
+        reader = ring.reader()
+        now = time.time()
+        # 两分钟前的两个事件和刚刚的两个事件（例如 sink 落后时同一批中跨了分钟）
+        ring.push(clock.now_ns - 120 * NS_PER_SECOND, -120, 0, ALLOW, STATUS_SAME_DIRECTION)
+        ring.push(clock.now_ns - 120 * NS_PER_SECOND, 120, 0, BLOCK, STATUS_BLOCKED)
+        ring.push(clock.now_ns, 120, 0, ALLOW, STATUS_DIRECTION_CHANGED)
+        ring.push(clock.now_ns, 120, 0, ALLOW, STATUS_SAME_DIRECTION)
+        HistorySink(store, clock.now).consume(reader, reader.drain())
+
+        rows = store.series(MINUTE, now - 600, now + 60)
+        assert [row[1:] for row in rows] == [(1, 1, 0), (2, 0, 1)]
+        assert rows[0][0] <= now - 120 < rows[0][0] + 60
+        assert rows[1][0] <= now + 1
+    finally:
+        store.close()
@@ -0,0 +1,148 @@
+import asyncio
+
+from event_ring import EventRing
+from pipeline_sinks import CallbackSink, CounterSink, Sink, SinkRunner, run_source
+from scroll_filter import ALLOW, BLOCK, STATUS_BLOCKED, WHEEL_DELTA, ScrollFilter
+from scroll_pipeline import ListSource, Pipeline
+
+MS = 1_000_000
+
+
+def jitter_events(count):
+    """向下滚动，每隔 3 格夹一个 10ms 后的反向单格"""
+    events = []
+    now = 0
+    for i in range(count):
+        now += 10 * MS if i % 4 == 3 else 40 * MS
+        events.append((now, WHEEL_DELTA if i % 4 == 3 else -WHEEL_DELTA))
+    return events
+
+
+class RecordingSink(Sink):
+    interval = 0.01
+
+    def __init__(self):
+        self.timestamps = []
+        self.closed = 0
+
+    def consume(self, reader, n):
+        self.timestamps.extend(reader.timestamps[:n])
+
+    def close(self):
+        self.closed += 1
+
+
+class FailingSink(Sink):
+    interval = 0.01
+
+    def __init__(self):
+        self.closed = 0
+
+    def consume(self, reader, n):
+        raise RuntimeError("broken sink")
+
+    def close(self):
+        self.closed += 1
+
+
+def test_process_writes_decision_to_ring():
+    pipeline = Pipeline(ScrollFilter(0.5, 3), EventRing(16))
+    reader = pipeline.ring.reader()
+    assert pipeline.process(-WHEEL_DELTA, 0, 0x10) == ALLOW
+    assert pipeline.process(WHEEL_DELTA, 10 * MS) == BLOCK
+    assert reader.drain() == 2
+    assert list(reader.deltas[:2]) == [-WHEEL_DELTA, WHEEL_DELTA]
+    assert list(reader.flags[:2]) == [0x10, 0]
+    assert list(reader.decisions[:2]) == [ALLOW, BLOCK]
+    assert reader.reasons[1] == STATUS_BLOCKED
+
+
+def test_stages_run_in_order_and_can_be_replaced():
+    pipeline = Pipeline(ScrollFilter(0.5, 3), EventRing(16))
+    calls = []
+
+    def allow_all(delta, timestamp, decision):
+        calls.append(("allow_all", decision))
+        return ALLOW
+
+    def observe(delta, timestamp, decision):
+        calls.append(("observe", decision))
+        return decision
+
+    pipeline.set_stages((allow_all, observe))
+    pipeline.process(-WHEEL_DELTA, 0)
+    assert pipeline.process(WHEEL_DELTA, 10 * MS) == ALLOW
+    assert calls[-2:] == [("allow_all", BLOCK), ("observe", ALLOW)]
+
+    pipeline.set_stages(())
+    assert pipeline.process(WHEEL_DELTA, 20 * MS) == BLOCK
+    assert len(calls) == 4
+
+
+def test_run_source_counts_every_event_with_small_ring():
+    events = jitter_events(1000)
+    expected = ScrollFilter(0.5, 3)
+    for timestamp, delta in events:
+        expected.feed(delta, timestamp)
+
+    counter = CounterSink()
+    recorder = RecordingSink()
+    count = run_source(ListSource(events), Pipeline(ScrollFilter(0.5, 3), EventRing(16)), [counter, recorder])
+
+    assert count == 1000
+    assert counter.events == 1000
+    assert counter.dropped == 0
+    assert counter.blocked == expected.blocked_events == 250
+    assert counter.reasons[STATUS_BLOCKED] == 250
+    assert recorder.timestamps == [timestamp for timestamp, _ in events]
+    assert recorder.closed == 1
+
+
+def test_sink_runner_reads_live_events_and_closes_sinks():
+    pipeline = Pipeline(ScrollFilter(0.5, 3), EventRing(1024))
+    recorder = RecordingSink()
+    seen = []
+
+    async def consume(reader, n):
+        await asyncio.sleep(0)
+        seen.extend(reader.deltas[:n])
+
+    runner = SinkRunner(pipeline.ring, [recorder, CallbackSink(consume, interval=0.01)])
+    runner.start()
+    for timestamp, delta in jitter_events(100):
+        pipeline.process(delta, timestamp)
+    runner.stop()
+
+    assert len(recorder.timestamps) == 100
+    assert len(seen) == 100
+    assert recorder.closed == 1
+
+
+def test_failing_sink_does_not_stop_others():
+    pipeline = Pipeline(ScrollFilter(0.5, 3), EventRing(1024))
+    failing = FailingSink()
+    recorder = RecordingSink()
+    runner = SinkRunner(pipeline.ring, [failing, recorder])
+    runner.start()
+    for timestamp, delta in jitter_events(50):
+        pipeline.process(delta, timestamp)
+    runner.stop()
+
+    assert failing.closed == 1
+    assert len(recorder.timestamps) == 50
+
+
+def test_sink_added_while_running_reads_only_new_events():
+    pipeline = Pipeline(ScrollFilter(0.5, 3), EventRing(1024))
+    runner = SinkRunner(pipeline.ring)
+    runner.start()
+    events = jitter_events(20)
+    for timestamp, delta in events[:10]:
+        pipeline.process(delta, timestamp)
+    recorder = runner.add(RecordingSink())
+    for timestamp, delta in events[10:]:
+        pipeline.process(delta, timestamp)
+    runner.stop()
+
+    assert recorder.timestamps == [timestamp for timestamp, _ in events[10:]]
+    assert runner.sinks == [recorder]
@@ -0,0 +1,28 @@
+from scroll_filter import ALLOW, BLOCK
+from scroll_trace import (HEADER, RECORD, TraceFile, TraceWriter, delta_to_wheel_data, read_header,
+                          wheel_data_to_delta)
+
+
+def test_wheel_data_round_trip():
+    for delta in (120, -120, 15, -15, 32640, -32640):
+        assert wheel_data_to_delta(delta_to_wheel_data(delta)) == delta
+
+
+def test_partial_record_is_truncated_before_appending(tmp_path):
+    path = str(tmp_path / "trace.bin")
+    writer = TraceWriter(path)
+    writer.write(1000, delta_to_wheel_data(-120), 0, ALLOW)
+    writer.close()
+    # 异常退出时只写了半条记录
+    with open(path, 'ab') as f:
+        f.write(RECORD.pack(2000, delta_to_wheel_data(120), 0, BLOCK)[:7])
+
+    writer = TraceWriter(path)
+    writer.write(3000, delta_to_wheel_data(120), 0, BLOCK)
+    writer.close()
+
+    assert read_header(path) == 2
+    with TraceFile(path) as trace:
+        records = list(trace)
+    assert records == [(1000, delta_to_wheel_data(-120), 0, ALLOW), (3000, delta_to_wheel_data(120), 0, BLOCK)]
+    assert (tmp_path / "trace.bin").stat().st_size == HEADER.size + 2 * RECORD.size
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+import scroll_synth
+import scroll_tuner
+from scroll_filter import BLOCK, ScrollFilter
+
+INTERVALS = np.array([0.05, 0.1, 0.3, 0.5])
+THRESHOLDS = np.array([1, 2, 3, 5])
+
+
+def filter_blocked(timestamps, deltas):
+    blocked = np.zeros((len(INTERVALS), len(THRESHOLDS)), np.int64)
+    for a, interval in enumerate(INTERVALS):
+        for b, threshold in enumerate(THRESHOLDS):
+            scroll_filter = ScrollFilter(float(interval), int(threshold))
+            blocked[a, b] = sum(scroll_filter.feed(int(delta), int(timestamp)) == BLOCK
+                                for delta, timestamp in zip(deltas, timestamps))
+    return blocked
+
+
+@pytest.mark.parametrize("preset", ["typical", "hires", "worn"])
+@pytest.mark.parametrize("chunk_runs", [1_000_000, 37])
+def test_grid_matches_scroll_filter(preset, chunk_runs):
+    stream = scroll_synth.generate(scroll_synth.PRESETS[preset], 3000, seed=5)
+    result = scroll_tuner.evaluate(stream.timestamps, stream.deltas, stream.is_jitter,
+                                   INTERVALS, THRESHOLDS, chunk_runs=chunk_runs)
+    assert np.array_equal(result.blocked, filter_blocked(stream.timestamps, stream.deltas))
@@ -0,0 +1,120 @@
+import os
+import time
+
+import pytest
+
+import settings as settings_module
+from settings import Settings
+
+
+def test_snapshot_version_includes_defaults_written_while_reading(tmp_path):
+    path = tmp_path / "Settings.ini"
+    # 旧版本的配置文件：开启了自适应模式，但没有范围设置
+    path.write_text("[General]\nblock_interval = 0.5\ndirection_change_threshold = 3\nadaptive = True\n",
+                    encoding="utf-8")
+    settings = Settings(str(path))
+    snapshot = settings.snapshot()
+    assert snapshot.adaptive is not None
+    assert snapshot.version == settings.version
+    assert settings.snapshot() is snapshot
+
+
+def test_snapshot_changes_with_settings(tmp_path):
+    settings = Settings(str(tmp_path / "Settings.ini"))
+    snapshot = settings.snapshot()
+    settings.set_interval(0.25)
+    changed = settings.snapshot()
+    assert changed is not snapshot
+    assert changed.filter.block_interval_ns == 250_000_000
+
+
+def count_replaces(monkeypatch):
+    """统计写入配置文件（os.replace）的次数"""
+    calls = []
+    replace = settings_module.os.replace
+
+    def counting_replace(src, dst):
+        calls.append(dst)
+        replace(src, dst)
+    monkeypatch.setattr(settings_module.os, "replace", counting_replace)
+    return calls
+
+
+def test_save_later_coalesces_changes_into_one_write(tmp_path, monkeypatch):
+    path = tmp_path / "Settings.ini"
+    settings = Settings(str(path))
+    settings.save_delay = 0.05
+    replaces = count_replaces(monkeypatch)
+
+    for interval in (0.1, 0.2, 0.3):
+        settings.set_interval(interval)
+        settings.save_later()
+    deadline = time.monotonic() + 2.0
+    while not replaces and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.15)
+
+    assert replaces == [str(path)]
+    assert "block_interval = 0.3" in path.read_text(encoding="utf-8")
+    assert not os.path.exists(str(path) + ".tmp")
+    # 没有新的修改：flush 不再写入
+    assert settings.flush() is False
+    assert len(replaces) == 1
+
+
+def test_flush_writes_pending_changes_immediately(tmp_path):
+    path = tmp_path / "Settings.ini"
+    settings = Settings(str(path))
+    settings.save_delay = 60
+    settings.set_direction_change_threshold(5)
+    settings.save_later()
+    assert settings.flush() is True
+    assert "direction_change_threshold = 5" in path.read_text(encoding="utf-8")
+
+
+def test_unchanged_settings_are_not_written(tmp_path, monkeypatch):
+    settings = Settings(str(tmp_path / "Settings.ini"))
+    replaces = count_replaces(monkeypatch)
+    version = settings.version
+    settings.set_interval(settings.get_interval())
+    assert settings.version == version
+    assert settings.sync() is False
+    settings.set_interval(0.75)
+    assert settings.sync() is True
+    assert settings.sync() is False
+    assert len(replaces) == 1
+
+
+def test_failed_write_keeps_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "Settings.ini"
+    settings = Settings(str(path))
+    before = path.read_text(encoding="utf-8")
+
+    def crash(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(settings_module.os, "fsync", crash)
+    settings.set_interval(0.75)
+    with pytest.raises(OSError):
+        settings.sync()
+    assert path.read_text(encoding="utf-8") == before
+
+    monkeypatch.undo()
+    assert settings.sync() is True
+    assert "block_interval = 0.75" in path.read_text(encoding="utf-8")
+
+
+def test_reload_ignores_own_writes_and_invalid_files(tmp_path):
+    path = tmp_path / "Settings.ini"
+    settings = Settings(str(path))
+    settings.set_interval(0.75)
+    settings.sync()
+    assert settings.reload() is False
+
+    path.write_text(path.read_text(encoding="utf-8").replace("block_interval = 0.75", "block_interval = 0.4"),
+                    encoding="utf-8")
+    assert settings.reload() is True
+    assert settings.get_interval() == 0.4
+
+    path.write_text("not an ini file", encoding="utf-8")
+    assert settings.reload() is False
+    assert settings.get_interval() == 0.4
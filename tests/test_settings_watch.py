@@ -0,0 +1,34 @@
+import sys
+import threading
+
+import pytest
+
+from settings_watch import FILE_NOTIFY_INFORMATION, InotifyWatcher, notify_names
+
+
+def notify_record(name, last=False):
+    encoded = name.encode("utf-16-le")
+    size = FILE_NOTIFY_INFORMATION.size + len(encoded)
+    size += -size % 4       # 每项按 DWORD 对齐
+    header = FILE_NOTIFY_INFORMATION.pack(0 if last else size, 3, len(encoded))
+    return (header + encoded).ljust(size, b"\0")
+
+
+def test_notify_names_walks_the_list():
+    data = notify_record("history.bin") + notify_record("Settings.ini.tmp") + notify_record("Settings.ini", last=True)
+    assert notify_names(data) == ["history.bin", "Settings.ini.tmp", "Settings.ini"]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_ignores_other_files_in_directory(tmp_path):
+    changed = threading.Event()
+    watcher = InotifyWatcher(str(tmp_path / "Settings.ini"), changed.set)
+    watcher.start()
+    try:
+        for _ in range(5):
+            (tmp_path / "history.bin").write_bytes(b"\0" * 64)
+        assert not changed.wait(0.3)
+        (tmp_path / "Settings.ini").write_text("[General]\n")
+        assert changed.wait(2.0)
+    finally:
+        watcher.stop()
@@ -0,0 +1,189 @@
+from scroll_filter import (
+    STATUS_WAITING, STATUS_DISABLED, STATUS_INITIAL_UP, STATUS_INITIAL_DOWN,
+    STATUS_SAME_DIRECTION, STATUS_DIRECTION_CHANGED, STATUS_BLOCKED, WHEEL_DELTA,
+)
+
+# 状态码 -> 翻译键
+STATUS_KEYS = {
+    STATUS_WAITING: 'status_waiting',
+    STATUS_DISABLED: 'status_disabled',
+    STATUS_INITIAL_UP: 'status_initial_up',
+    STATUS_INITIAL_DOWN: 'status_initial_down',
+    STATUS_SAME_DIRECTION: 'status_same_direction',
+    STATUS_DIRECTION_CHANGED: 'status_direction_changed',
+    STATUS_BLOCKED: 'status_blocked',
+}
+STATUS_CODES = tuple(sorted(STATUS_KEYS))
+
+# =========================
+# Language Support
+# =========================
+class Translator:
+    def __init__(self):
+        self.languages = {
+            'zh_CN': {
+                'app_title': '鼠标滚轮防抖工具',
+                'settings': '防抖设置',
+                'block_interval': '时间阈值:',
+                'direction_threshold': '方向改变阈值:',
+                'enable_blocking': '启用滚轮防抖',
+                'startup': '开机自动启动',
+                'adaptive': '自适应（根据滚动习惯自动调整阈值）',
+                'adaptive_estimates': '自适应参数:',
+                'adaptive_learning': '学习中（已观察 {samples} 次抖动）',
+                'adaptive_value': '{interval}秒 / {threshold} 次（抖动间隔 p95 {jitter}）',
+                'status': '实时状态',
+                'total_events': '总滚轮事件:',
+                'blocked_events': '已拦截事件:',
+                'current_direction': '当前方向:',
+                'direction_up': '↑ 向上',
+                'direction_down': '↓ 向下',
+                'direction_none': '无',
+                'status_label': '状态:',
+                'how_it_works': '工作原理',
+                'how_it_works_text': '''• 时间阈值：距离上次滚轮事件的时间在阈值内，如果出现反方向滚轮事件，则阻塞该事件
+• 次数阈值：连续的反方向滚轮事件（每个事件距离上次滚轮时间在时间阈值内）达到次数阈值，则改变初始方向并允许此事件
+• 这样可以有效防止因鼠标滚轮抖动导致的意外滚动''',
+                'restart_hook': '重启钩子',
+                'minimize_to_tray': '最小化到托盘',
+                'quit': '退出',
+                'tray_show': '显示窗口',
+                'tray_quit': '退出',
+                'confirm_quit': '确认退出',
+                'quit_message': '确定要退出鼠标滚轮防抖工具吗？',
+                'tray_message_title': '鼠标滚轮防抖工具',
+                'tray_message_content': '程序已最小化到系统托盘，点击托盘图标可以重新打开窗口。',
+                'hook_started': '钩子已启动',
+                'hook_restarting': '正在重启钩子...',
+                'hook_restarted': '钩子已重启',
+                'hook_failed': '钩子启动失败',
+                'seconds': ' 秒',
+                'status_waiting': '等待滚轮事件',
+                'status_disabled': '拦截已关闭',
+                'status_initial_up': '初始方向: 向上',
+                'status_initial_down': '初始方向: 向下',
+                'status_same_direction': '同方向滚动',
+                'status_direction_changed': '方向改变 (反向 {count} 格)',
+                'status_blocked': '已拦截 (反向 {current}/{threshold} 格)',
+                'hook_latency': '回调延迟:',
+                'latency_value': 'p50 {p50} / p99 {p99} / p99.9 {p999} / 最大 {max}',
+                'over_budget': '超出预算:',
+                'over_budget_value': '{count} 次 (> {budget})',
+                'reset_latency': '重置延迟统计',
+                'recent_events': '最近事件:',
+                'event_allowed': '放行',
+                'event_blocked': '拦截',
+                'reason_direction_changed': '方向改变',
+                'reason_blocked': '抖动',
+                'history': '统计历史',
+                'history_title': '滚动统计历史',
+                'history_range_day': '最近 24 小时',
+                'history_range_week': '最近 7 天',
+                'history_range_month': '最近 30 天',
+                'history_range_year': '最近一年',
+                'history_time': '时间',
+                'history_allowed': '放行',
+                'history_blocked': '拦截',
+                'history_changes': '方向切换',
+                'history_block_rate': '拦截率',
+                'history_summary': '放行 {allowed} 次，拦截 {blocked} 次（拦截率 {rate}），方向切换 {changes} 次',
+                'history_unavailable': '统计历史未开启或无法打开（见配置项 history_path）'
+            },
+            'en_US': {
+                'app_title': 'Mouse Scroll Stabilizer',
+                'settings': 'Stabilization Settings',
+                'block_interval': 'Time Threshold:',
+                'direction_threshold': 'Direction Change Threshold:',
+                'enable_blocking': 'Enable Scroll Stabilization',
+                'startup': 'Start Automatically at Boot',
+                'adaptive': 'Adaptive (tune thresholds to your scrolling)',
+                'adaptive_estimates': 'Adaptive Values:',
+                'adaptive_learning': 'Learning ({samples} jitter events seen)',
+                'adaptive_value': '{interval}s / {threshold} events (jitter gap p95 {jitter})',
+                'status': 'Real-time Status',
+                'total_events': 'Total Scroll Events:',
+                'blocked_events': 'Blocked Events:',
+                'current_direction': 'Current Direction:',
+                'direction_up': '↑ Up',
+                'direction_down': '↓ Down',
+                'direction_none': 'None',
+                'status_label': 'Status:',
+                'how_it_works': 'How It Works',
+                'how_it_works_text': '''• Time Threshold: If a reverse scroll event occurs within the threshold time after the last scroll event, it will be blocked
+• Count Threshold: When consecutive reverse scroll events (each within the time threshold) reach the count threshold, the initial direction changes and the event is allowed
+• This effectively prevents accidental scrolling caused by mouse wheel jitter''',
+                'restart_hook': 'Restart Hook',
+                'minimize_to_tray': 'Minimize to Tray',
+                'quit': 'Quit',
+                'tray_show': 'Show Window',
+                'tray_quit': 'Quit',
+                'confirm_quit': 'Confirm Quit',
+                'quit_message': 'Are you sure you want to quit Mouse Scroll Stabilizer?',
+                'tray_message_title': 'Mouse Scroll Stabilizer',
+                'tray_message_content': 'The program has been minimized to the system tray. Click the tray icon to reopen the window.',
+                'hook_started': 'Hook Started',
+                'hook_restarting': 'Restarting Hook...',
+                'hook_restarted': 'Hook Restarted',
+                'hook_failed': 'Hook Failed to Start',
+                'seconds': ' seconds',
+                'status_waiting': 'Waiting for scroll events',
+                'status_disabled': 'Blocking disabled',
+                'status_initial_up': 'Initial direction: Up',
+                'status_initial_down': 'Initial direction: Down',
+                'status_same_direction': 'Same direction scrolling',
+                'status_direction_changed': 'Direction changed (reversed {count} notches)',
+                'status_blocked': 'Blocked (reversed {current}/{threshold} notches)',
+                'hook_latency': 'Hook Latency:',
+                'latency_value': 'p50 {p50} / p99 {p99} / p99.9 {p999} / max {max}',
+                'over_budget': 'Over Budget:',
+                'over_budget_value': '{count} times (> {budget})',
+                'reset_latency': 'Reset Latency Stats',
+                'recent_events': 'Recent Events:',
+                'event_allowed': 'allowed',
+                'event_blocked': 'blocked',
+                'reason_direction_changed': 'Direction changed',
+                'reason_blocked': 'Jitter',
+                'history': 'History',
+                'history_title': 'Scroll Statistics History',
+                'history_range_day': 'Last 24 hours',
+                'history_range_week': 'Last 7 days',
+                'history_range_month': 'Last 30 days',
+                'history_range_year': 'Last year',
+                'history_time': 'Time',
+                'history_allowed': 'Allowed',
+                'history_blocked': 'Blocked',
+                'history_changes': 'Direction changes',
+                'history_block_rate': 'Block rate',
+                'history_summary': '{allowed} allowed, {blocked} blocked ({rate} blocked), {changes} direction changes',
+                'history_unavailable': 'History is disabled or could not be opened (see the history_path setting)'
+            }
+        }
+        self.current_lang = 'zh_CN'
+        # 每种语言预编译的状态模板: lang -> {状态码: str.format}
+        self._status_templates = {}
+    
+    def set_language(self, lang):
+        if lang in self.languages:
+            self.current_lang = lang
+    
+    def tr(self, key, **kwargs):
+        text = self.languages[self.current_lang].get(key, key)
+        # Format text with kwargs if needed
+        if kwargs:
+            try:
+                text = text.format(**kwargs)
+            except KeyError:
+                pass
+        return text
+
+    def format_status(self, code, arg=0, threshold=0):
+        """把钩子记录的状态码和整数参数格式化为当前语言的文字"""
+        lang = self.current_lang
+        templates = self._status_templates.get(lang)
+        if templates is None:
+            texts = self.languages[lang]
+            templates = {c: texts.get(STATUS_KEYS[c], STATUS_KEYS[c]).format for c in STATUS_CODES}
+            self._status_templates[lang] = templates
+        # arg 为反向滚动量（1/WHEEL_DELTA 格），显示为格数；高精度滚轮不足整格时保留一位小数
+        notches = arg // WHEEL_DELTA if arg % WHEEL_DELTA == 0 else f"{arg / WHEEL_DELTA:.1f}"
+        return templates[code](current=notches, count=notches, threshold=threshold)